@@ -0,0 +1,120 @@
+"""Controle de admissão: limite de sessões jogando ao mesmo tempo e fila de espera FIFO.
+
+Sem Streamlit; o app guarda uma instância por processo (get_admission_controller).
+"""
+import collections
+import itertools
+import threading
+import time
+
+# Limites iniciais (ajustáveis no painel admin) e tempos de concessão
+DEFAULT_MAX_ACTIVE_PLAYERS = 150  # Sessões iniciando ou jogando ao mesmo tempo
+DEFAULT_MAX_STARTING_PLAYERS = 20  # Sessões carregando o quiz ao mesmo tempo
+DEFAULT_QUIZ_SECONDS_ESTIMATE = 180  # Duração média inicial de uma partida
+ADMISSION_LEASE_SECONDS = 180  # Sem sinal por esse tempo, a vaga é liberada
+WAITING_LEASE_SECONDS = 30  # Sem sinal por esse tempo, o lugar na fila é liberado
+
+
+class AdmissionController:
+    """Limita quantas sessões podem estar iniciando ou jogando ao mesmo tempo.
+
+    Quem excede o limite entra numa fila FIFO e é admitido conforme as vagas são
+    liberadas. Sessões que param de dar sinal (aba fechada, celular bloqueado)
+    perdem a vaga ou o lugar na fila depois do tempo de concessão; um jogador que
+    perdeu a vaga só a recupera pela mesma fila, respeitando o limite.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.max_active = DEFAULT_MAX_ACTIVE_PLAYERS
+        self.max_starting = DEFAULT_MAX_STARTING_PLAYERS
+        self.starting = {}  # sessão -> último sinal
+        self.playing = {}  # sessão -> (início do jogo, último sinal)
+        self.waiting = collections.OrderedDict()  # sessão -> (senha, último sinal), em ordem de chegada
+        self.tickets = itertools.count(1)
+        self.avg_quiz_seconds = DEFAULT_QUIZ_SECONDS_ESTIMATE
+
+    def _expire(self, now):
+        for key in [k for k, seen in self.starting.items() if now - seen > ADMISSION_LEASE_SECONDS]:
+            del self.starting[key]
+        for key in [k for k, (_, seen) in self.playing.items() if now - seen > ADMISSION_LEASE_SECONDS]:
+            del self.playing[key]
+        for key in [k for k, (_, seen) in self.waiting.items() if now - seen > WAITING_LEASE_SECONDS]:
+            del self.waiting[key]
+
+    def _free_slots(self):
+        return max(0, min(self.max_active - len(self.starting) - len(self.playing),
+                          self.max_starting - len(self.starting)))
+
+    def _admit(self, key, now):
+        """Coloca a sessão na fila (ou renova o lugar) e diz se ela está entre as próximas vagas"""
+        self._expire(now)
+        ticket = self.waiting[key][0] if key in self.waiting else next(self.tickets)
+        self.waiting[key] = (ticket, now)
+        if key in itertools.islice(self.waiting, self._free_slots()):
+            del self.waiting[key]
+            return True
+        return False
+
+    def request(self, key):
+        """Tenta admitir a sessão; se não houver vaga, ela entra (ou continua) na fila"""
+        now = time.time()
+        with self.lock:
+            if key in self.starting or key in self.playing:
+                return True
+            if self._admit(key, now):
+                self.starting[key] = now
+                return True
+            return False
+
+    def mark_playing(self, key):
+        now = time.time()
+        with self.lock:
+            self.starting.pop(key, None)
+            self.playing[key] = (now, now)
+
+    def heartbeat(self, key):
+        """Renova a vaga de quem está jogando; quem a perdeu volta pela fila (False enquanto espera)"""
+        now = time.time()
+        with self.lock:
+            if key in self.playing:
+                self.playing[key] = (self.playing[key][0], now)
+                return True
+            if self._admit(key, now):
+                self.starting.pop(key, None)
+                self.playing[key] = (now, now)
+                return True
+            return False
+
+    def release(self, key, finished=False):
+        with self.lock:
+            self.starting.pop(key, None)
+            self.waiting.pop(key, None)
+            started = self.playing.pop(key, None)
+            if finished and started:
+                duration = time.time() - started[0]
+                self.avg_quiz_seconds = 0.8 * self.avg_quiz_seconds + 0.2 * duration
+
+    def position(self, key):
+        """Posição pela senha, relativa à primeira da fila (quem saiu do meio ainda conta)"""
+        with self.lock:
+            entry = self.waiting.get(key)
+            if entry is None:
+                return 0
+            first_ticket, _ = next(iter(self.waiting.values()))
+            return entry[0] - first_ticket + 1
+
+    def estimated_wait(self, position):
+        """Segundos estimados até a admissão, pela vazão média de jogadores"""
+        with self.lock:
+            return position * self.avg_quiz_seconds / max(1, self.max_active)
+
+    def configure(self, max_active, max_starting):
+        with self.lock:
+            self.max_active = max(1, int(max_active))
+            self.max_starting = max(1, int(max_starting))
+
+    def status(self):
+        with self.lock:
+            self._expire(time.time())
+            return {'starting': len(self.starting), 'playing': len(self.playing), 'waiting': len(self.waiting)}
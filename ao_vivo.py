@@ -0,0 +1,187 @@
+"""Modo ao vivo: o apresentador conduz as perguntas e todos respondem ao mesmo tempo.
+
+Estado do jogo em memória, sem Streamlit; o app guarda uma instância por processo
+(get_live_game) e desenha o telão e os celulares a partir de view() e player().
+"""
+import threading
+import time
+
+from nomes import normalize_name
+from perguntas import parse_options
+
+LIVE_POINTS = 10  # Pontos por resposta certa
+
+
+class LiveGame:
+    """Jogo ao vivo conduzido pelo apresentador, compartilhado por todas as sessões do processo.
+
+    Cada mudança de fase (sala, pergunta, resposta revelada, fim) incrementa `revision`;
+    as sessões só fazem um rerun completo quando a revisão muda. Uma resposta atualiza
+    o contador da opção e a pontuação do jogador em O(1), sem mudar a revisão. O fim da
+    pergunta vem do relógio: toda leitura (phase, view, player, poll) revela a resposta
+    se o prazo passou, sem depender de alguma tela estar consultando.
+    """
+
+    def __init__(self, question_seconds):
+        self.lock = threading.Lock()
+        self.question_seconds = question_seconds
+        self.revision = 0
+        self._phase = 'off'  # off, lobby, question, reveal, finished
+        self.sheet_id = None
+        self.questions = []
+        self.index = -1
+        self.players = {}  # sessão -> {'nome', 'setor', 'pontuacao', 'tempo_total', 'codigo'}
+        self.names = {}  # nome normalizado -> sessão
+        self.answers = {}  # sessão -> (opção, correta), só da pergunta atual
+        self.shown = {}  # sessão -> quando a pergunta atual apareceu no celular
+        self.counts = []
+        self.started_at = self.deadline = None
+
+    def _set_phase(self, phase):
+        self._phase = phase
+        self.revision += 1
+
+    def _advance(self):
+        """Encerra a pergunta cujo prazo passou ou que todos já responderam (com o lock)"""
+        if self._phase == 'question' and (time.time() > self.deadline or
+                                          (self.players and len(self.answers) >= len(self.players))):
+            self._reveal()
+
+    def _reveal(self):
+        # Quem não respondeu leva o tempo inteiro, como no quiz individual
+        for key, player in self.players.items():
+            if key not in self.answers:
+                player['tempo_total'] += self.question_seconds
+        self._set_phase('reveal')
+
+    @property
+    def phase(self):
+        with self.lock:
+            self._advance()
+            return self._phase
+
+    @property
+    def active(self):
+        return self.phase != 'off'
+
+    def open(self, sheet_id, questions):
+        """Abre a sala para um jogo novo, descartando o anterior"""
+        with self.lock:
+            self.sheet_id = sheet_id
+            self.questions = questions
+            self.index = -1
+            self.players, self.names, self.answers, self.shown, self.counts = {}, {}, {}, {}, []
+            self.started_at = self.deadline = None
+            self._set_phase('lobby')
+
+    def close(self):
+        with self.lock:
+            self._set_phase('off')
+
+    def join(self, key, name, sector, code):
+        """Inscreve a sessão no jogo; retorna uma mensagem de erro ou None.
+
+        Se o nome já está no jogo com o mesmo código (o jogador recarregou a página), a nova
+        sessão assume o jogador, com a pontuação e a resposta da pergunta atual.
+        """
+        normalized = normalize_name(name)
+        with self.lock:
+            if self._phase in ('off', 'finished'):
+                return "O jogo ao vivo não está aberto."
+            owner = self.names.get(normalized)
+            if owner is not None and owner != key:
+                if not code or self.players[owner]['codigo'] != code:
+                    return "Já existe um jogador com esse nome no jogo."
+                self.players[key] = self.players.pop(owner)
+                for per_session in (self.answers, self.shown):
+                    if owner in per_session:
+                        per_session[key] = per_session.pop(owner)
+                self.names[normalized] = key
+            elif key not in self.players:
+                self.players[key] = {'nome': name, 'setor': sector, 'pontuacao': 0, 'tempo_total': 0.0,
+                                     'codigo': code}
+                self.names[normalized] = key
+            return None
+
+    def next_question(self):
+        with self.lock:
+            self._advance()
+            if self._phase not in ('lobby', 'reveal') or self.index + 1 >= len(self.questions):
+                return False
+            self.index += 1
+            self.answers, self.shown = {}, {}
+            self.counts = [0] * len(parse_options(self.questions[self.index]))
+            self.started_at = time.time()
+            self.deadline = self.started_at + self.question_seconds
+            self._set_phase('question')
+            return True
+
+    def mark_shown(self, key):
+        """Marca quando a pergunta atual apareceu para a sessão (só a primeira vez); retorna o horário"""
+        with self.lock:
+            self._advance()
+            if self._phase != 'question' or key not in self.players:
+                return None
+            return self.shown.setdefault(key, time.time())
+
+    def answer(self, key, option_index, correct):
+        """Registra a resposta da sessão na pergunta atual; retorna os segundos gastos ou None.
+
+        O tempo conta de quando a pergunta apareceu no celular, para que o intervalo de
+        consulta não pese contra quem a recebeu por último.
+        """
+        now = time.time()
+        with self.lock:
+            player = self.players.get(key)
+            self._advance()
+            if self._phase != 'question' or player is None or key in self.answers or now > self.deadline:
+                return None
+            elapsed = now - self.shown.get(key, self.started_at)
+            self.answers[key] = (option_index, correct)
+            self.counts[option_index] += 1
+            player['tempo_total'] += elapsed
+            if correct:
+                player['pontuacao'] += LIVE_POINTS
+            self._advance()  # A última resposta revela na hora
+            return elapsed
+
+    def reveal(self):
+        with self.lock:
+            if self._phase == 'question':
+                self._reveal()
+
+    def poll(self):
+        """Revisão atual (já considerando o fim da pergunta pelo relógio)"""
+        with self.lock:
+            self._advance()
+            return self.revision
+
+    def view(self):
+        """Cópia consistente do estado para renderizar uma tela"""
+        with self.lock:
+            self._advance()
+            question = self.questions[self.index] if 0 <= self.index < len(self.questions) else None
+            return {
+                'revision': self.revision, 'phase': self._phase, 'index': self.index,
+                'total_questions': len(self.questions), 'question': question,
+                'counts': list(self.counts), 'answered': len(self.answers), 'players': len(self.players),
+                'started_at': self.started_at, 'deadline': self.deadline
+            }
+
+    def player(self, key):
+        """Dados da sessão no jogo e a resposta dela na pergunta atual (ou None)"""
+        with self.lock:
+            self._advance()
+            player = self.players.get(key)
+            if player is None:
+                return None
+            return dict(player, resposta=self.answers.get(key))
+
+    def results(self):
+        with self.lock:
+            return sorted((dict(p) for p in self.players.values()),
+                          key=lambda p: (-p['pontuacao'], p['tempo_total']))
+
+    def finish(self):
+        with self.lock:
+            self._set_phase('finished')
@@ -1,64 +1,1098 @@
+import time
+
+# Os tempos de importação entram no relatório de inicialização do painel admin
+_SCRIPT_STARTED = time.perf_counter()
 import streamlit as st
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+_STARTUP_IMPORTS = [('import streamlit', time.perf_counter() - _SCRIPT_STARTED)]
+
+_phase_started = time.perf_counter()
 import pandas as pd
-import qrcode
+import numpy as np
+_STARTUP_IMPORTS.append(('import pandas/numpy', time.perf_counter() - _phase_started))
+
+_phase_started = time.perf_counter()
 from io import BytesIO
 import random
-import time
-from streamlit_autorefresh import st_autorefresh
+import hashlib
+import threading
+import re
+import itertools
+import importlib
+import sys
+import os
+import json
+import uuid
+import secrets
+import pickle
+import socket
+import sqlite3
+import io
+import csv
+import atexit
+import logging
+import heapq
+import collections
+import cProfile
+import pstats
+import traceback
+import urllib.parse
+import urllib.request
+import multiprocessing
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from datetime import timezone
+from pathlib import Path
+_STARTUP_IMPORTS.append(('import biblioteca padrão', time.perf_counter() - _phase_started))
+
+_phase_started = time.perf_counter()
+from admissao import AdmissionController
+from ao_vivo import LIVE_POINTS, LiveGame
+from historico import ParticipantHistory
+from miniaturas import THUMBNAIL_WIDTHS, ThumbnailCache
+from nomes import find_duplicate_names, normalize_name, normalize_names
+from perguntas import (REQUIRED_QUESTION_COLS, cell_value, parse_options, question_id, validate_question_edits,
+                       validate_questions_chunk)
+from retomada import CheckpointStore
+_STARTUP_IMPORTS.append(('import módulos do app', time.perf_counter() - _phase_started))
+
+# gspread, oauth2client, qrcode, openpyxl, streamlit_autorefresh e as ferramentas de PDF
+# são importados só no primeiro uso, via lazy_import()
 
 # --- CONFIGURAÇÕES DA PÁGINA ---
 st.set_page_config(page_title="De olho no risco", page_icon="🏆", layout="wide")
 
 # --- CONFIGURAÇÕES E CONSTANTES ---
 QUESTION_TIMER = 30
+EVENT_ID = "sipat-2025"  # Identificador da edição atual, usado para particionar dados históricos
+EVENT_TITLE = "SIPAT 2025 - De olho no risco"  # Usado em certificados e cartazes
+DATA_DIR = Path(__file__).resolve().parent / "dados"  # Armazenamento local do servidor
 CORRECT_MESSAGES = ["Excelente!", "Mandou bem!", "Correto!", "Isso aí!", "Perfeito!"]
 WRONG_MESSAGES = ["Não foi dessa vez.", "Quase lá!", "Ops!", "Resposta incorreta."]
 
+# Botões de resposta (cor e forma por posição da opção)
+ANSWER_STYLES = [
+    {"class": "red", "shape": "🔺"},
+    {"class": "blue", "shape": "♦️"},
+    {"class": "yellow", "shape": "🟡"},
+    {"class": "green", "shape": "🟩"}
+]
+
+# Modo ao vivo (apresentador conduz as perguntas)
+LIVE_POLL_SECONDS = 1  # Intervalo em que o telão confere se o jogo mudou de fase
+# Nos celulares o intervalo é maior: 500 jogadores a cada 5 s são 100 reruns de fragmento por
+# segundo (a 3 s eram ~166). O fim da pergunta vem do relógio, então o intervalo só atrasa a
+# chegada da próxima pergunta, e o tempo de resposta conta de quando ela apareceu no celular
+LIVE_PLAYER_POLL_SECONDS = 5
+LIVE_QUERY_PARAM = "jogo"  # Código do jogador no link, para voltar ao jogo depois de recarregar a página
+
+# Retomada de partidas interrompidas
+CHECKPOINT_DB = DATA_DIR / "progresso.sqlite"  # Com estado compartilhado, usa o arquivo comum às réplicas
+RESUME_QUERY_PARAM = "retomar"
+RESUME_TOKEN_CHARS = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"  # Sem caracteres ambíguos (0/O, 1/I)
+RESUME_TOKEN_LENGTH = 6
+
+# Ranking e competição por setor
+RANKING_COLUMNS = ['nome', 'pontuacao', 'tempo_total', 'setor']
+ARCHIVE_RUN_COLUMN = 'arquivamento'  # Lote de arquivamento de cada linha arquivada
+SECTORS_TAB = "Setores"  # Aba opcional: setor, colaboradores
+
+# Cache das planilhas
+SHEET_CACHE_TTL = 60  # Segundos em que uma cópia é usada sem nenhuma consulta ao Google
+SHEET_VERSION_CHECK_INTERVAL = 5  # Consultas de revisão ao Drive são compartilhadas nesse intervalo
+DRIVE_FILES_URL = "https://www.googleapis.com/drive/v3/files/{}"
+APPEND_ONLY_TABS = {"Ranking"}  # Abas sincronizadas de forma incremental (só as linhas novas)
+# Nas demais abas, a revisão do Drive muda a cada linha nova do Ranking (ela é do arquivo,
+# não da aba); a aba é relida, mas se o digest de todos os valores não mudou a cópia é mantida
+SNAPSHOT_DIR = DATA_DIR / "snapshots"  # Última cópia de cada aba, para reiniciar sem esperar o Google
+SNAPSHOT_FORMAT = 1  # Incrementar ao mudar o conteúdo gravado; arquivos de outro formato são ignorados
+SNAPSHOT_MAX_AGE = 7 * 24 * 3600
+
+# Estado compartilhado entre réplicas (opcional). O SQLite em modo WAL depende de memória
+# compartilhada entre processos: as réplicas precisam estar na MESMA máquina, com o arquivo
+# num disco local (volume do host). NFS/SMB e outros sistemas de rede são recusados.
+SHARED_STATE_ENV_VAR = "DEOLHO_SHARED_STATE_DB"  # Caminho do arquivo SQLite comum às réplicas
+SHARED_HOST_HEARTBEAT = 30  # Intervalo em que a máquina dona do arquivo renova o registro
+SHARED_HOST_TIMEOUT = 90  # Sem renovação por esse tempo, outra máquina pode assumir o arquivo
+NETWORK_FILESYSTEMS = {'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'fuse.sshfs', 'fuse.s3fs', 'fuse.gcsfuse',
+                       'glusterfs', 'ceph', 'lustre', 'afs', '9p', 'virtiofs', 'fuse.rclone'}
+SHARED_FETCH_LEASE_SECONDS = 30  # Tempo máximo que uma réplica segura o download de uma aba
+SHARED_FETCH_WAIT_SECONDS = 5  # Espera pelo download de outra réplica antes de baixar por conta própria
+GOOGLE_READS_PER_MINUTE = 50  # Leituras por minuto somando todas as réplicas (cota do Sheets: 60)
+GOOGLE_READS_BURST = 10
+QUIZ_STATUS_SHARED_TTL = 300  # Segundos em que o status compartilhado dispensa a aba Config
+
+# Perfilamento (também pode ser ligado pelo painel admin)
+PROFILE_ENV_VAR = "DEOLHO_PROFILE"
+PROFILE_WINDOW = 500  # Amostras mantidas por tela/seção
+PROFILE_SLOWEST = 5  # Execuções mais lentas guardadas com cProfile
+PROFILE_STATS_LINES = 25
+
+# Sala de espera
+WAITING_REFRESH_MS = 2000
+
+# Conexões HTTP com o Google
+# Conexões keep-alive guardadas por servidor do Google. Cada sessão do Streamlit roda o script
+# numa thread própria e o pool não bloqueia: acima disso, a chamada abre uma conexão extra que é
+# fechada ao terminar. Ajustável pela variável de ambiente para servidores com mais threads ativas
+HTTP_POOL_SIZE = int(os.environ.get("DEOLHO_HTTP_POOL_SIZE", "32"))
+HTTP_POOL_HOSTS = 4  # Sheets, Drive e autenticação
+HTTP_TIMEOUT = (5, 30)  # Segundos para conectar e para ler cada resposta
+HTTP_USER_AGENT = "de-olho-no-risco (gzip)"  # As APIs do Google só comprimem se o User-Agent contiver "gzip"
+TOKEN_REFRESH_MARGIN = 300  # O token é renovado em segundo plano esse tempo antes de expirar
+TOKEN_REFRESH_MIN_WAIT = 30
+
+# Importação de perguntas
+UPLOAD_CHUNK_ROWS = 2000  # Linhas lidas por bloco do arquivo enviado
+SHEET_WRITE_BATCH_ROWS = 500  # Linhas enviadas por requisição ao Google Sheets
+UPLOAD_PREVIEW_ROWS = 50
+
+# Editor de perguntas
+QUESTION_PAGE_SIZES = [25, 50, 100]
+QUESTION_CATEGORY_COLUMN = 'categoria'  # Coluna opcional usada como filtro no editor
+QUESTION_DELETE_COLUMN = '🗑️ Excluir'
+QUESTION_FILTER_CACHE = 32  # Resultados de busca guardados por sessão
+
+# Eventos de resposta
+ANSWER_EVENT_COLUMNS = ['timestamp', 'nome', 'pergunta_id', 'opcao', 'correta', 'tempo_ms']
+RESPONSE_TIME_BUCKET_MS = 250
+RESPONSE_TIME_BUCKETS = QUESTION_TIMER * 1000 // RESPONSE_TIME_BUCKET_MS + 1
+ARCHIVE_FLUSH_BATCH = 500
+ARCHIVE_FLUSH_INTERVAL = 60
+
+# Imagens das perguntas
+QUESTION_IMAGE_COLUMN = 'imagem'  # Coluna opcional: URL da foto ou arquivo em assets/perguntas
+THUMBNAIL_CACHE_DIR = DATA_DIR / "miniaturas"
+THUMBNAIL_CACHE_MAX_BYTES = 256 * 1024 * 1024  # Acima disso, as variantes menos usadas são apagadas
+
+# QR Codes e cartazes
+QR_ERROR_LEVELS = {"Baixa (7%)": 'L', "Média (15%)": 'M', "Alta (25%)": 'Q', "Máxima (30%)": 'H'}
+QR_POSTER_LAYOUTS = {1: (1, 1), 2: (1, 2), 4: (2, 2), 6: (2, 3)}  # Cartazes por página -> (colunas, linhas)
+QR_POSTER_BOX_SIZE = 20  # Pixels por módulo no PDF: nítido na impressão em A4
+QR_LOCATION_PARAM = "local"  # Códigos de sala viram <URL do app>?local=<código>
+
+# Certificados
+CERTIFICATE_WORKERS = max(1, min(8, os.cpu_count() or 1))
+CERTIFICATE_WINDOW = 200  # Certificados em processamento por vez
+
+
+# --- RELATÓRIO DE INICIALIZAÇÃO ---
+class StartupReport:
+    """Tempos da primeira execução do script no processo, por fase de importação e inicialização"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.phases = {}
+
+    def record(self, phase, seconds, category):
+        with self.lock:
+            self.phases.setdefault(phase, (category, seconds))
+
+    @contextmanager
+    def phase(self, phase, category='inicialização'):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - started, category)
+
+    def to_dataframe(self):
+        with self.lock:
+            items = list(self.phases.items())
+        return pd.DataFrame([{'Fase': phase, 'Categoria': category, 'Tempo (ms)': round(seconds * 1000, 1)}
+                             for phase, (category, seconds) in items])
+
+
+@st.cache_resource
+def get_startup_report():
+    report = StartupReport()
+    for phase, seconds in _STARTUP_IMPORTS:
+        report.record(phase, seconds, 'importação')
+    return report
+
+
+def lazy_import(module_name):
+    """Importa um módulo só no primeiro uso, registrando o tempo gasto no relatório de inicialização"""
+    module = sys.modules.get(module_name)
+    if module is None:
+        started = time.perf_counter()
+        module = importlib.import_module(module_name)
+        get_startup_report().record(f'import {module_name}', time.perf_counter() - started, 'importação (sob demanda)')
+    return module
+
+
+logger = logging.getLogger("deolho_no_risco")
+
+
+def run_periodically(name, function, interval):
+    """Chama function() a cada `interval` segundos numa thread e uma última vez ao encerrar o processo.
+
+    Usado pelos buffers em memória, para que o último lote não dependa de uma nova jogada
+    para ser gravado nem se perca num reinício.
+    """
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                function()
+            except Exception:
+                logger.exception("Falha na tarefa periódica %s", name)
+
+    threading.Thread(target=loop, daemon=True, name=name).start()
+    atexit.register(function)
+
+
+# --- PERFILAMENTO POR TELA ---
+class RenderProfiler:
+    """Perfilamento opcional das execuções do script, por tela e por seção marcada.
+
+    Desligado (padrão), run_screen só chama a tela e profile_section devolve um
+    contexto vazio. Ligado, guarda as últimas PROFILE_WINDOW amostras de cada chave
+    e, sob demanda, roda as próximas execuções com cProfile, mantendo as mais lentas.
+    """
+
+    def __init__(self):
+        self.enabled = os.environ.get(PROFILE_ENV_VAR, '').lower() in ('1', 'true', 'sim')
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.capture_remaining = 0
+        self.slowest = []
+        self.sequence = itertools.count()
+
+    def add(self, key, seconds):
+        with self.lock:
+            window = self.samples.get(key)
+            if window is None:
+                window = self.samples[key] = collections.deque(maxlen=PROFILE_WINDOW)
+            window.append(seconds)
+
+    @contextmanager
+    def section(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(f'seção: {name}', time.perf_counter() - started)
+
+    def run_screen(self, name, screen_function):
+        if not self.enabled:
+            return screen_function()
+
+        with self.lock:
+            capture = self.capture_remaining > 0
+            if capture:
+                self.capture_remaining -= 1
+        profiler = cProfile.Profile() if capture else None
+        started = time.perf_counter()
+        try:
+            if profiler:
+                try:
+                    profiler.enable()
+                except ValueError:  # Outro perfilador já ativo nesta thread
+                    profiler = None
+            return screen_function()
+        finally:
+            if profiler:
+                profiler.disable()
+            elapsed = time.perf_counter() - started
+            self.add(f'tela: {name}', elapsed)
+            if profiler:
+                self._keep_if_slow(name, elapsed, profiler)
+
+    def _keep_if_slow(self, name, elapsed, profiler):
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(PROFILE_STATS_LINES)
+        entry = (elapsed, next(self.sequence), name, time.strftime('%H:%M:%S'), output.getvalue())
+        with self.lock:
+            if len(self.slowest) < PROFILE_SLOWEST:
+                heapq.heappush(self.slowest, entry)
+            elif elapsed > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, entry)
+
+    def request_capture(self, reruns):
+        with self.lock:
+            self.capture_remaining = reruns
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.slowest = []
+            self.capture_remaining = 0
+
+    def summary(self):
+        """Percentis das janelas móveis de cada tela/seção, em milissegundos"""
+        with self.lock:
+            items = [(key, np.array(window)) for key, window in self.samples.items()]
+        rows = [{
+            'Chave': key,
+            'Amostras': len(values),
+            'p50 (ms)': round(np.percentile(values, 50) * 1000, 1),
+            'p90 (ms)': round(np.percentile(values, 90) * 1000, 1),
+            'p99 (ms)': round(np.percentile(values, 99) * 1000, 1),
+            'Máx (ms)': round(values.max() * 1000, 1)
+        } for key, values in items if len(values)]
+        if not rows:
+            return pd.DataFrame()
+        return pd.DataFrame(rows).sort_values('p90 (ms)', ascending=False).reset_index(drop=True)
+
+    def slowest_dumps(self):
+        with self.lock:
+            return sorted(self.slowest, reverse=True)
+
+
+@st.cache_resource
+def get_render_profiler():
+    return RenderProfiler()
+
+
+_NO_PROFILE_SECTION = nullcontext()
+
+
+def profile_section(name):
+    """Marca uma seção para o perfilamento; custo desprezível quando ele está desligado"""
+    profiler = get_render_profiler()
+    if not profiler.enabled:
+        return _NO_PROFILE_SECTION
+    return profiler.section(name)
+
+
+def dump_thread_stacks():
+    """Pilhas de chamada de todas as threads do processo neste instante"""
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    dumps = []
+    for ident, frame in sys._current_frames().items():
+        dumps.append(f"--- Thread {names.get(ident, ident)} ---\n" + ''.join(traceback.format_stack(frame)))
+    return '\n'.join(dumps)
+
 
 # --- FUNÇÕES AUXILIARES E CONEXÃO ---
 def df_to_excel_bytes(df):
+    lazy_import('openpyxl')
     output = BytesIO()
     with pd.ExcelWriter(output, engine='openpyxl') as writer:
         df.to_excel(writer, index=False, sheet_name='Ranking')
     return output.getvalue()
 
 
+class GoogleTransport:
+    """Sessão HTTP única e persistente para todas as chamadas ao Google (Sheets e Drive).
+
+    O pool de conexões keep-alive (HTTP_POOL_SIZE por servidor) faz as requisições
+    reaproveitarem conexões TLS já abertas. O timeout é configurado no cliente do gspread
+    (set_timeout) e as requisições são contadas por um hook de resposta. O token de acesso
+    é renovado por uma thread antes de expirar, fora do caminho dos jogadores.
+    """
+
+    def __init__(self, credentials):
+        google_requests = lazy_import('google.auth.transport.requests')
+        HTTPAdapter = lazy_import('requests.adapters').HTTPAdapter
+        Retry = lazy_import('urllib3.util.retry').Retry
+
+        self.credentials = credentials
+        self.session = google_requests.AuthorizedSession(credentials)
+        # Só repete falhas de conexão: repetir uma escrita já recebida poderia duplicar linhas
+        self.adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_SIZE,
+                                   max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.3))
+        self.session.mount('https://', self.adapter)
+        self.session.headers.update({'User-Agent': HTTP_USER_AGENT, 'Accept-Encoding': 'gzip'})
+        self.session.hooks['response'].append(self._count)
+        self.stats_lock = threading.Lock()
+        self.requests = collections.Counter()  # servidor -> requisições
+        self.seconds = collections.Counter()  # servidor -> tempo somado das respostas
+        self.errors = collections.Counter()  # servidor -> respostas com erro
+
+        self.refresh_request = google_requests.Request()  # Conexão própria, fora do pool dos jogadores
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.refresh_token()
+        threading.Thread(target=self._refresh_loop, daemon=True, name='google-token').start()
+
+    def refresh_token(self):
+        self.credentials.refresh(self.refresh_request)
+        self.refreshes += 1
+
+    def seconds_to_expiry(self):
+        expiry = self.credentials.expiry  # datetime UTC sem fuso, como o google-auth guarda
+        if expiry is None:
+            return None
+        return expiry.replace(tzinfo=timezone.utc).timestamp() - time.time()
+
+    def _refresh_loop(self):
+        while True:
+            remaining = self.seconds_to_expiry()
+            wait = TOKEN_REFRESH_MARGIN if remaining is None else remaining - TOKEN_REFRESH_MARGIN
+            time.sleep(max(TOKEN_REFRESH_MIN_WAIT, wait))
+            try:
+                self.refresh_token()
+            except Exception as e:
+                self.refresh_errors += 1
+                logger.warning("Não foi possível renovar o token do Google: %s", e)
+
+    def _count(self, response, *args, **kwargs):
+        host = urllib.parse.urlsplit(response.url).hostname
+        with self.stats_lock:
+            self.requests[host] += 1
+            self.seconds[host] += response.elapsed.total_seconds()
+            if not response.ok:
+                self.errors[host] += 1
+        return response
+
+    def status(self):
+        """Requisições por servidor e a situação do token"""
+        with self.stats_lock:
+            rows = [{
+                'Servidor': host,
+                'Requisições': count,
+                'Com erro': self.errors[host],
+                'Tempo médio (ms)': round(1000 * self.seconds[host] / count)
+            } for host, count in self.requests.most_common()]
+        remaining = self.seconds_to_expiry()
+        return pd.DataFrame(rows), {
+            'Renovações de token': self.refreshes,
+            'Falhas de renovação': self.refresh_errors,
+            'Token expira em (s)': None if remaining is None else int(remaining)
+        }
+
+
 @st.cache_resource
 def connect_to_google_sheets():
+    gspread = lazy_import('gspread')
+    ServiceAccountCredentials = lazy_import('oauth2client.service_account').ServiceAccountCredentials
     scopes = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-    try:
-        creds_dict = st.secrets["gcp_service_account"]
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scopes)
-    except (FileNotFoundError, KeyError):
+    with get_startup_report().phase('autorização Google Sheets'):
         try:
-            creds = ServiceAccountCredentials.from_json_keyfile_name("google_sheets_credentials.json", scopes)
-        except FileNotFoundError:
-            st.error("Credenciais não encontradas.")
-            st.stop()
-    return gspread.authorize(creds)
+            creds_dict = st.secrets["gcp_service_account"]
+            creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scopes)
+        except (FileNotFoundError, KeyError):
+            try:
+                creds = ServiceAccountCredentials.from_json_keyfile_name("google_sheets_credentials.json", scopes)
+            except FileNotFoundError:
+                st.error("Credenciais não encontradas.")
+                st.stop()
+        # Mesmas credenciais no formato do google-auth, com a sessão HTTP configurada aqui
+        transport = GoogleTransport(gspread.utils.convert_credentials(creds))
+        client = gspread.Client(auth=transport.credentials, session=transport.session)
+        client.set_timeout(HTTP_TIMEOUT)  # Sem isso o gspread espera para sempre por uma resposta
+        client.transport = transport
+        return client
+
+
+def get_gsheets_client():
+    """Cliente do Google Sheets, criado e autorizado só no primeiro acesso aos dados"""
+    return connect_to_google_sheets()
+
+
+# --- ESTADO COMPARTILHADO ENTRE RÉPLICAS ---
+class SharedStateStore:
+    """Estado compartilhado entre réplicas do app num arquivo SQLite (modo WAL).
+
+    Opcional: ativado com DEOLHO_SHARED_STATE_DB apontando para um arquivo num volume
+    comum às réplicas. Guarda os snapshots das abas, as fichas do limite de leituras
+    no Google, o índice de participantes e o status do quiz, para que N réplicas
+    custem à API praticamente o mesmo que uma.
+
+    Limite: todas as réplicas na mesma máquina. O WAL coordena os processos por um
+    arquivo -shm mapeado em memória, o que não funciona entre máquinas nem sobre
+    NFS/SMB (travas e memória compartilhada não são confiáveis). O construtor recusa
+    sistemas de arquivos de rede e o registro 'host' impede que uma segunda máquina
+    use o arquivo enquanto a primeira estiver ativa.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS snapshots (
+            key TEXT PRIMARY KEY, version TEXT, generation TEXT, rows INTEGER,
+            fetched_at REAL, validated_at REAL, payload BLOB);
+        CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT, expires_at REAL);
+        CREATE TABLE IF NOT EXISTS tokens (name TEXT PRIMARY KEY, tokens REAL, updated_at REAL);
+        CREATE TABLE IF NOT EXISTS participants (name TEXT PRIMARY KEY, added_at REAL);
+        CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT, updated_at REAL);
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.owner = f"{socket.gethostname()}-{os.getpid()}"
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self.machine = machine_id()
+        self.claim_host()
+
+    def claim_host(self):
+        """Registra (ou renova) esta máquina como a única que usa o arquivo"""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT value, updated_at FROM kv WHERE key = 'host'").fetchone()
+            if row and row[0] != self.machine and now - row[1] < SHARED_HOST_TIMEOUT:
+                raise RuntimeError(f"{self.path} está em uso por outra máquina ({row[0]}); "
+                                   f"o estado compartilhado só funciona com as réplicas numa mesma máquina")
+            conn.execute("INSERT OR REPLACE INTO kv VALUES ('host', ?, ?)", (self.machine, now))
+
+    def _query(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    @contextmanager
+    def _transaction(self):
+        """Transação com trava de escrita imediata (serializa réplicas concorrentes)"""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    # Snapshots das abas
+    def snapshot_meta(self, key):
+        rows = self._query("SELECT version, generation, rows, fetched_at, validated_at FROM snapshots WHERE key = ?",
+                           (key,))
+        if not rows:
+            return None
+        version, generation, row_count, fetched_at, validated_at = rows[0]
+        return {'version': version, 'generation': generation, 'rows': row_count,
+                'fetched_at': fetched_at, 'validated_at': validated_at}
+
+    def load_snapshot(self, key):
+        rows = self._query("SELECT payload FROM snapshots WHERE key = ?", (key,))
+        return pickle.loads(rows[0][0]) if rows else None
+
+    def put_snapshot(self, key, snapshot):
+        payload = {k: v for k, v in snapshot.items()
+                   if k not in ('version', 'generation', 'fetched_at', 'validated_at', 'warm')}
+        self._query("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, None if snapshot['version'] is None else str(snapshot['version']),
+                     snapshot['generation'], len(snapshot['frame']), snapshot['fetched_at'],
+                     snapshot['validated_at'], pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)))
+
+    def expire_snapshots(self, sheet_name=None):
+        if sheet_name is None:
+            self._query("UPDATE snapshots SET validated_at = 0")
+        else:
+            suffix = f"/{sheet_name}"
+            self._query("UPDATE snapshots SET validated_at = 0 WHERE substr(key, -?) = ?", (len(suffix), suffix))
+
+    def touch_snapshot(self, key, validated_at):
+        self._query("UPDATE snapshots SET validated_at = ? WHERE key = ?", (validated_at, key))
+
+    # Concessões (uma réplica por vez baixa cada aba)
+    def try_lease(self, name, seconds):
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT owner, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+            if row and row[0] != self.owner and row[1] > now:
+                return False
+            conn.execute("INSERT OR REPLACE INTO leases VALUES (?, ?, ?)", (name, self.owner, now + seconds))
+            return True
+
+    def release_lease(self, name):
+        self._query("DELETE FROM leases WHERE name = ? AND owner = ?", (name, self.owner))
+
+    # Limite de chamadas (balde de fichas compartilhado)
+    def take_token(self, name, rate_per_second, burst):
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT tokens, updated_at FROM tokens WHERE name = ?", (name,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + (now - row[1]) * rate_per_second)
+            allowed = tokens >= 1
+            conn.execute("INSERT OR REPLACE INTO tokens VALUES (?, ?, ?)",
+                         (name, tokens - 1 if allowed else tokens, now))
+            return allowed
+
+    # Índice de participantes do evento atual
+    def add_participant(self, name):
+        self._query("INSERT OR IGNORE INTO participants VALUES (?, ?)", (normalize_name(name), time.time()))
+
+    def has_participant(self, name):
+        return bool(self._query("SELECT 1 FROM participants WHERE name = ?", (normalize_name(name),)))
+
+    def remove_participant(self, name):
+        self._query("DELETE FROM participants WHERE name = ?", (normalize_name(name),))
+
+    def clear_participants(self):
+        self._query("DELETE FROM participants")
+
+    # Valores simples (status do quiz)
+    def set_value(self, key, value):
+        self._query("INSERT OR REPLACE INTO kv VALUES (?, ?, ?)", (key, value, time.time()))
+
+    def get_value(self, key):
+        rows = self._query("SELECT value, updated_at FROM kv WHERE key = ?", (key,))
+        return rows[0] if rows else (None, None)
+
+    def status(self):
+        return {
+            'Snapshots': self._query("SELECT COUNT(*) FROM snapshots")[0][0],
+            'Participantes indexados': self._query("SELECT COUNT(*) FROM participants")[0][0],
+            'Concessões ativas': self._query("SELECT COUNT(*) FROM leases WHERE expires_at > ?", (time.time(),))[0][0]
+        }
+
+
+def machine_id():
+    """Identificador da máquina: igual entre contêineres do mesmo host (mesmo kernel)"""
+    try:
+        with open('/proc/sys/kernel/random/boot_id', encoding='ascii') as f:
+            return f.read().strip()
+    except OSError:
+        return socket.gethostname()
 
 
-gsheets_client = connect_to_google_sheets()
+def filesystem_type(path):
+    """Tipo do sistema de arquivos que contém path (Linux, via /proc/mounts); None se desconhecido"""
+    try:
+        with open('/proc/mounts', encoding='utf-8') as f:
+            mounts = [line.split()[1:3] for line in f if len(line.split()) >= 3]
+    except OSError:
+        return None
+    resolved = str(Path(path).resolve())
+    best_point, best_type = '', None
+    for mount_point, fs_type in mounts:
+        mount_point = mount_point.replace('\\040', ' ')
+        inside = resolved == mount_point or resolved.startswith(mount_point.rstrip('/') + '/')
+        if inside and len(mount_point) >= len(best_point):
+            best_point, best_type = mount_point, fs_type
+    return best_type
 
 
-@st.cache_data(ttl=60)
-def load_data(sheet_id, sheet_name):
+@st.cache_resource
+def get_shared_state():
+    """Store compartilhado, ou None quando o app roda como réplica única.
+
+    Também devolve None (com erro no log) se o arquivo estiver num sistema de
+    arquivos de rede ou em uso por outra máquina: ver o limite em SharedStateStore.
+    """
+    path = os.environ.get(SHARED_STATE_ENV_VAR)
+    if not path:
+        return None
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    fs_type = filesystem_type(Path(path).parent)
+    if fs_type in NETWORK_FILESYSTEMS:
+        logger.error("Estado compartilhado desativado: %s está num sistema de arquivos de rede (%s); "
+                     "use um disco local da máquina das réplicas", path, fs_type)
+        return None
     try:
-        sheet = gsheets_client.open_by_key(sheet_id).worksheet(sheet_name)
-        data = sheet.get_all_records()
-        return pd.DataFrame(data)
+        store = SharedStateStore(path)
     except Exception as e:
-        st.error(f"Erro ao carregar dados: {e}")
-        return pd.DataFrame()
+        logger.error("Estado compartilhado desativado: %s", e)
+        return None
+    run_periodically('estado-compartilhado', store.claim_host, SHARED_HOST_HEARTBEAT)
+    return store
+
+
+# --- CACHE DE PLANILHAS COM VALIDAÇÃO CONDICIONAL ---
+class SheetSnapshotCache:
+    """Última cópia baixada de cada aba, com a revisão (Drive) da planilha no momento do download.
+
+    Passado o TTL, a cópia não é descartada: antes de baixar a aba inteira de novo,
+    consulta-se a revisão da planilha no Drive (uma chamada pequena, compartilhada por
+    todas as abas). Se a revisão não mudou, a cópia ganha mais um TTL de validade.
+    Como a revisão é do arquivo inteiro, abas que só mudam por edição são relidas e
+    comparadas pelo digest de todos os valores: iguais, a cópia (e a geração) continua.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshots = {}  # (sheet_id, aba) -> {'frame', 'version', 'fetched_at', 'validated_at'}
+        self.versions = {}  # sheet_id -> (revisão, consultada_em)
+        self.fetch_locks = collections.defaultdict(threading.Lock)
+        self.stats = collections.Counter()
+        self.owner = f"{socket.gethostname()}-{os.getpid()}"
+        self.persist_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='snapshots')
+        self.revalidating = set()
+        with get_startup_report().phase('cópias locais das planilhas'):
+            self._load_persisted()
+
+    def get(self, sheet_id, sheet_name):
+        key = (sheet_id, sheet_name)
+        snapshot = self.snapshots.get(key)
+        if snapshot and time.time() - snapshot['validated_at'] < SHEET_CACHE_TTL:
+            self._count('hits')
+            return snapshot['frame']
+
+        # Cópia gravada em disco antes de um reinício: serve já e valida em segundo plano
+        if snapshot and snapshot.get('warm'):
+            self._revalidate_in_background(key)
+            self._count('warm_hits')
+            return snapshot['frame']
+        return self._fetch(key)
+
+    def _count(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+
+    def _revalidate_in_background(self, key):
+        with self.lock:
+            if key in self.revalidating:
+                return
+            self.revalidating.add(key)
+
+        def revalidate():
+            try:
+                self._fetch(key)
+                snapshot = self.snapshots.get(key)
+                if snapshot is not None:
+                    snapshot.pop('warm', None)  # Validada: volta ao fluxo normal
+            except Exception as e:
+                logger.warning("Não foi possível validar a cópia local de %s: %s", key[1], e)
+            finally:
+                with self.lock:
+                    self.revalidating.discard(key)
+        threading.Thread(target=revalidate, daemon=True, name='revalidacao-planilhas').start()
+
+    def _fetch(self, key):
+        sheet_id, sheet_name = key
+        # Uma sessão por aba valida/baixa; as demais esperam e reaproveitam o resultado
+        with self.fetch_locks[key]:
+            snapshot = self.snapshots.get(key)
+            if snapshot and time.time() - snapshot['validated_at'] < SHEET_CACHE_TTL:
+                self._count('hits')
+                return snapshot['frame']
+
+            shared = get_shared_state()
+            if shared is None:
+                return self._refresh(key, snapshot)
+
+            # Com réplicas: usa o que outra réplica já validou e só uma delas consulta o Google por vez
+            adopted = self._adopt_shared(shared, key)
+            if adopted is not None:
+                return adopted['frame']
+            lease = f"fetch:{sheet_id}/{sheet_name}"
+            deadline = time.time() + SHARED_FETCH_WAIT_SECONDS
+            while not shared.try_lease(lease, SHARED_FETCH_LEASE_SECONDS) and time.time() < deadline:
+                time.sleep(0.2)
+                adopted = self._adopt_shared(shared, key)
+                if adopted is not None:
+                    return adopted['frame']
+            try:
+                if snapshot and not shared.take_token('google-reads', GOOGLE_READS_PER_MINUTE / 60,
+                                                      GOOGLE_READS_BURST):
+                    self._count('rate_limited')
+                    return snapshot['frame']
+                return self._refresh(key, snapshot)
+            finally:
+                shared.release_lease(lease)
+
+    def _adopt_shared(self, shared, key):
+        """Adota o snapshot publicado por outra réplica, se ainda estiver dentro do TTL"""
+        meta = shared.snapshot_meta(f"{key[0]}/{key[1]}")
+        if not meta or time.time() - meta['validated_at'] >= SHEET_CACHE_TTL:
+            return None
+        snapshot = self.snapshots.get(key)
+        same_content = (snapshot is not None and snapshot.get('generation') == meta['generation']
+                        and len(snapshot['frame']) == meta['rows'])
+        if not same_content:
+            payload = shared.load_snapshot(f"{key[0]}/{key[1]}")
+            if payload is None:
+                return None
+            snapshot = dict(payload, version=meta['version'], generation=meta['generation'],
+                            fetched_at=meta['fetched_at'])
+            with self.lock:
+                self.snapshots[key] = snapshot
+            self._persist(key)
+        snapshot['validated_at'] = meta['validated_at']
+        self._count('shared_hits')
+        return snapshot
+
+    def _publish(self, key, touch_only=False):
+        if not touch_only:
+            self._persist(key)
+        shared = get_shared_state()
+        if shared is None:
+            return
+        snapshot = self.snapshots[key]
+        try:
+            if touch_only:
+                shared.touch_snapshot(f"{key[0]}/{key[1]}", snapshot['validated_at'])
+            else:
+                shared.put_snapshot(f"{key[0]}/{key[1]}", snapshot)
+        except Exception as e:
+            logger.warning("Não foi possível publicar o snapshot compartilhado: %s", e)
+
+    def _refresh(self, key, snapshot):
+        """Valida pela revisão do Drive e, se mudou, sincroniza ou baixa a aba"""
+        sheet_id, sheet_name = key
+        version = self.current_version(sheet_id)
+        if snapshot and version is not None and version == snapshot['version']:
+            snapshot['validated_at'] = time.time()
+            self._count('revalidated')
+            self._publish(key, touch_only=True)
+            return snapshot['frame']
+
+        try:
+            if snapshot and sheet_name in APPEND_ONLY_TABS:
+                synced = self.sync_tail(sheet_id, sheet_name, snapshot)
+                if synced is not None:
+                    now = time.time()
+                    with self.lock:
+                        self.snapshots[key] = dict(synced, version=version, fetched_at=now, validated_at=now,
+                                                   generation=snapshot.get('generation'))
+                    self._count('tail_syncs')
+                    self._publish(key)
+                    return synced['frame']
+                self._count('full_resyncs')
+            downloaded = self.download(sheet_id, sheet_name)
+        except Exception:
+            if snapshot:  # Melhor servir a última cópia do que uma aba vazia
+                self._count('stale_served')
+                return snapshot['frame']
+            raise
+        if snapshot and downloaded.get('digest') is not None and downloaded['digest'] == snapshot.get('digest'):
+            # A revisão mudou por causa de outra aba: mesma cópia, sem nova geração
+            snapshot['version'] = version
+            snapshot['validated_at'] = time.time()
+            self._count('unchanged_downloads')
+            self._publish(key, touch_only=True)
+            return snapshot['frame']
+        now = time.time()
+        # A geração muda a cada download completo (não no sync incremental) e é única entre réplicas
+        with self.lock:
+            self.snapshots[key] = dict(downloaded, version=version, fetched_at=now, validated_at=now,
+                                       generation=f"{self.owner}-{time.time_ns()}")
+        self._count('downloads')
+        self._publish(key)
+        return downloaded['frame']
+
+    def _snapshot_path(self, key):
+        sheet_id, sheet_name = key
+        safe_name = re.sub(r'[^\w-]', '_', sheet_name)
+        return SNAPSHOT_DIR / f"{hashlib.sha1(sheet_id.encode()).hexdigest()[:12]}-{safe_name}.pkl"
+
+    def _persist(self, key):
+        """Agenda a gravação da cópia atual da aba em disco (fora da thread de quem pediu)"""
+        # Cópia rasa sob o lock: outras threads continuam mexendo no dicionário durante a gravação
+        with self.lock:
+            snapshot = self.snapshots.get(key)
+            snapshot = dict(snapshot) if snapshot is not None else None
+        if snapshot is not None:
+            future = self.persist_executor.submit(self._write_snapshot, key, snapshot)
+            future.add_done_callback(lambda f, name=key[1]: self._persist_failed(name, f))
+
+    def _persist_failed(self, sheet_name, future):
+        # O executor guarda a exceção no future; sem isso, uma falha na gravação passaria em silêncio
+        if future.exception() is not None:
+            logger.error("Erro ao gravar a cópia local de %s: %r", sheet_name, future.exception())
+
+    def _write_snapshot(self, key, snapshot):
+        record = {
+            'formato': SNAPSHOT_FORMAT,
+            'pandas': pd.__version__,  # DataFrames em pickle não são garantidos entre versões do pandas
+            'sheet_id': key[0],
+            'sheet_name': key[1],
+            'version': snapshot['version'],
+            'generation': snapshot.get('generation'),
+            'fetched_at': snapshot['fetched_at'],
+            'payload': {k: v for k, v in snapshot.items()
+                        if k not in ('version', 'generation', 'fetched_at', 'validated_at', 'warm')}
+        }
+        path = self._snapshot_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self._count('persisted')
+        except Exception as e:
+            logger.warning("Não foi possível gravar a cópia local de %s: %s", key[1], e)
+
+    def _load_persisted(self):
+        """Carrega as cópias gravadas antes do reinício; ficam marcadas para validação imediata"""
+        if not SNAPSHOT_DIR.exists():
+            return
+        for path in SNAPSHOT_DIR.glob('*.pkl'):
+            try:
+                with open(path, 'rb') as f:
+                    record = pickle.load(f)
+                if (record.get('formato') != SNAPSHOT_FORMAT or record.get('pandas') != pd.__version__
+                        or time.time() - record['fetched_at'] > SNAPSHOT_MAX_AGE):
+                    continue
+                key = (record['sheet_id'], record['sheet_name'])
+                self.snapshots[key] = dict(record['payload'], version=record['version'],
+                                           generation=record['generation'], fetched_at=record['fetched_at'],
+                                           validated_at=0, warm=True)
+                self._count('warm_loaded')
+            except Exception as e:
+                logger.warning("Cópia local ignorada (%s): %s", path.name, e)
+
+    def peek(self, sheet_id, sheet_name):
+        """Cópia em memória, mesmo vencida, sem esperar o Google; vencida ou ausente, valida em segundo plano"""
+        key = (sheet_id, sheet_name)
+        snapshot = self.snapshots.get(key)
+        if snapshot is None or time.time() - snapshot['validated_at'] >= SHEET_CACHE_TTL:
+            self._revalidate_in_background(key)
+        return None if snapshot is None else snapshot['frame']
+
+    def get_snapshot(self, sheet_id, sheet_name):
+        """Snapshot completo (frame, geração, ...) já validado; somente leitura para quem chama"""
+        self.get(sheet_id, sheet_name)
+        return self.snapshots.get((sheet_id, sheet_name))
+
+    def download(self, sheet_id, sheet_name):
+        """Baixa a aba inteira; abas só de inclusão guardam cabeçalho e última linha para o sync incremental"""
+        try:
+            sheet = get_gsheets_client().open_by_key(sheet_id).worksheet(sheet_name)
+        except lazy_import('gspread').exceptions.WorksheetNotFound:
+            # Aba opcional ausente: guarda um snapshot vazio para não consultar de novo a cada acesso
+            return {'frame': pd.DataFrame(), 'header': [], 'last_row': None}
+        if sheet_name not in APPEND_ONLY_TABS:
+            # Valores brutos (em vez de get_all_records) para o digest vir da mesma leitura
+            values = sheet.get_all_values()
+            if not values:
+                return {'frame': pd.DataFrame(), 'digest': values_digest([])}
+            return {'frame': records_frame(values[0], values[1:]), 'digest': values_digest(values)}
+
+        values = sheet.get_all_values()
+        if not values:
+            return {'frame': pd.DataFrame(), 'header': [], 'last_row': None}
+        header, rows = values[0], values[1:]
+        return {
+            'frame': records_frame(header, rows),
+            'header': header,
+            'last_row': _pad_row(rows[-1], len(header)) if rows else None
+        }
+
+    def sync_tail(self, sheet_id, sheet_name, snapshot):
+        """Busca só as linhas novas de uma aba em que linhas são apenas acrescentadas.
+
+        Relê a partir da última linha conhecida: se ela não for mais a mesma (linhas
+        apagadas ou reescritas) ou a aba encolheu, retorna None para forçar o download
+        completo. O custo cresce com o número de linhas novas, não com o total.
+        """
+        header, last_row = snapshot.get('header'), snapshot.get('last_row')
+        if not header or last_row is None:
+            return None
+
+        known_rows = len(snapshot['frame'])
+        sheet = get_gsheets_client().open_by_key(sheet_id).worksheet(sheet_name)
+        # Linha 1 é o cabeçalho, então a última linha conhecida é a known_rows + 1
+        header_range, tail_range = sheet.batch_get(
+            ['1:1', f"{known_rows + 1}:{max(sheet.row_count, known_rows + 1)}"])
+        current_header = list(header_range[0]) if header_range else []
+        if _trim_row(current_header) != _trim_row(header):
+            return None  # Colunas mudaram
+        values = [_pad_row(row, len(header)) for row in tail_range]
+        if not values or values[0] != last_row:
+            return None
+
+        new_rows = values[1:]
+        if not new_rows:
+            return dict(snapshot)
+        frame = pd.concat([snapshot['frame'], records_frame(header, new_rows)], ignore_index=True)
+        return {'frame': frame, 'header': header, 'last_row': new_rows[-1]}
+
+    def current_version(self, sheet_id):
+        """Revisão atual da planilha no Drive (None se não for possível consultar)"""
+        with self.lock:
+            cached = self.versions.get(sheet_id)
+        if cached and time.time() - cached[1] < SHEET_VERSION_CHECK_INTERVAL:
+            return cached[0]
+        try:
+            version = fetch_drive_version(sheet_id)
+        except Exception as e:
+            logger.warning("Não foi possível consultar a revisão da planilha: %s", e)
+            return None
+        with self.lock:
+            self.versions[sheet_id] = (version, time.time())
+        self._count('version_checks')
+        return version
+
+    def invalidate(self, sheet_name=None):
+        """Força a validação no próximo acesso, sem descartar as cópias.
+
+        Sem sheet_name vale para todas as abas e esquece as revisões consultadas. Com
+        sheet_name, só a cópia daquela aba perde a revisão, e as demais continuam
+        aproveitando a consulta ao Drive já feita.
+        """
+        with self.lock:
+            if sheet_name is None:
+                self.versions.clear()
+            for (_, name), snapshot in self.snapshots.items():
+                if sheet_name is None or name == sheet_name:
+                    snapshot['validated_at'] = 0
+                    snapshot['version'] = None
+        shared = get_shared_state()
+        if shared is not None:
+            shared.expire_snapshots(sheet_name)
+
+    def status(self):
+        now = time.time()
+        rows = [{'Aba': name, 'Linhas': len(s['frame']), 'Revisão': s['version'],
+                 'Baixada há (s)': round(now - s['fetched_at']), 'Validada há (s)': round(now - s['validated_at'])}
+                for (_, name), s in list(self.snapshots.items())]
+        with self.lock:
+            stats = dict(self.stats)
+        return pd.DataFrame(rows), stats
+
+
+def _trim_row(row):
+    row = [str(value) for value in row]
+    while row and row[-1] == '':
+        row.pop()
+    return row
+
+
+def _pad_row(row, width):
+    row = [str(value) for value in row[:width]]
+    return row + [''] * (width - len(row))
+
+
+def values_digest(values):
+    """Digest de todos os valores da aba (vazios no fim das linhas e da aba ignorados)"""
+    rows = [_trim_row(row) for row in values]
+    while rows and not rows[-1]:
+        rows.pop()
+    return hashlib.sha1(json.dumps(rows, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def records_frame(header, rows):
+    """DataFrame equivalente ao de get_all_records (números convertidos) a partir de valores brutos"""
+    numericise_all = lazy_import('gspread.utils').numericise_all
+    return pd.DataFrame([numericise_all(_pad_row(row, len(header))) for row in rows], columns=header)
+
+
+def fetch_drive_version(sheet_id):
+    """Consulta só os metadados de revisão do arquivo no Drive"""
+    client = get_gsheets_client()
+    http = getattr(client, 'http_client', client)  # gspread 6 expõe http_client; o 5 faz a requisição no cliente
+    response = http.request('get', DRIVE_FILES_URL.format(sheet_id),
+                            params={'fields': 'version,modifiedTime', 'supportsAllDrives': 'true'})
+    metadata = response.json()
+    return metadata.get('version') or metadata.get('modifiedTime')
+
+
+@st.cache_resource
+def get_sheet_cache():
+    return SheetSnapshotCache()
+
+
+def invalidate_sheet_cache(sheet_name=None):
+    """Marca as cópias das abas (ou só de sheet_name) para revalidação no próximo acesso"""
+    get_sheet_cache().invalidate(sheet_name)
+
+
+def load_data(sheet_id, sheet_name):
+    with profile_section(f'dados: {sheet_name}'):
+        try:
+            # Cópia para que quem chama possa alterar o DataFrame sem mexer no cache
+            return get_sheet_cache().get(sheet_id, sheet_name).copy()
+        except Exception as e:
+            st.error(f"Erro ao carregar dados: {e}")
+            return pd.DataFrame()
+
+
+def build_sheet_payload(dataframe):
+    """Cabeçalho + linhas no formato de lista de listas esperado pelo gspread"""
+    return [dataframe.columns.values.tolist()] + dataframe.values.tolist()
 
 
 def update_sheet_from_df(sheet_id, sheet_name, dataframe):
     try:
-        sheet = gsheets_client.open_by_key(sheet_id).worksheet(sheet_name)
+        sheet = get_gsheets_client().open_by_key(sheet_id).worksheet(sheet_name)
         sheet.clear()
-        sheet.update([dataframe.columns.values.tolist()] + dataframe.values.tolist())
+        sheet.update(build_sheet_payload(dataframe))
         return True
     except Exception as e:
         st.error(f"Erro ao atualizar planilha: {e}")
@@ -67,7 +1101,7 @@ def update_sheet_from_df(sheet_id, sheet_name, dataframe):
 
 def append_row_to_sheet(sheet_id, sheet_name, row_list):
     try:
-        sheet = gsheets_client.open_by_key(sheet_id).worksheet(sheet_name)
+        sheet = get_gsheets_client().open_by_key(sheet_id).worksheet(sheet_name)
         sheet.append_row(row_list)
         return True
     except Exception as e:
@@ -75,6 +1109,26 @@ def append_row_to_sheet(sheet_id, sheet_name, row_list):
         return False
 
 
+def append_rows_to_sheet(sheet_id, sheet_name, rows, header=None):
+    """Adiciona várias linhas numa só requisição; cria a aba se ela não existir.
+
+    Pode rodar fora da thread do Streamlit, por isso não usa st.error.
+    """
+    try:
+        workbook = get_gsheets_client().open_by_key(sheet_id)
+        try:
+            sheet = workbook.worksheet(sheet_name)
+        except lazy_import('gspread').exceptions.WorksheetNotFound:
+            sheet = workbook.add_worksheet(title=sheet_name, rows=1000, cols=max(len(header or rows[0]), 1))
+            if header:
+                sheet.append_row(header)
+        sheet.append_rows(rows)
+        return True
+    except Exception as e:
+        logger.error("Erro ao adicionar linhas em %s: %s", sheet_name, e)
+        return False
+
+
 # --- ESTILO CSS MELHORADO ---
 def inject_custom_styles():
     st.markdown("""
@@ -516,6 +1570,29 @@ def inject_custom_styles():
             background: linear-gradient(135deg, #10b981 0%, #059669 100%) !important; 
         }
 
+        /* DISTRIBUIÇÃO DAS RESPOSTAS (PROJETOR) */
+        .live-bar {
+            display: flex;
+            align-items: center;
+            margin: 0.6rem 0;
+            font-size: 1.4rem;
+            font-weight: 700;
+        }
+
+        .live-bar .fill {
+            height: 56px;
+            min-width: 8px;
+            border-radius: 12px;
+            margin-right: 1rem;
+            transition: width 0.5s ease;
+        }
+
+        .live-bar.red .fill { background: linear-gradient(135deg, #ef4444 0%, #dc2626 100%); }
+        .live-bar.blue .fill { background: linear-gradient(135deg, #3b82f6 0%, #2563eb 100%); }
+        .live-bar.yellow .fill { background: linear-gradient(135deg, #f59e0b 0%, #d97706 100%); }
+        .live-bar.green .fill { background: linear-gradient(135deg, #10b981 0%, #059669 100%); }
+        .live-bar.dimmed { opacity: 0.35; }
+
         /* ALERTAS */
         .stAlert > div {
             border-radius: 12px;
@@ -579,27 +1656,78 @@ if 'initialized' not in st.session_state:
     st.session_state.quiz_enabled = True  # Controle do quiz
 
 
+# --- REMOÇÃO DE PARTICIPAÇÕES REPETIDAS (a detecção fica em nomes.py) ---
+def _same_cell(cell, value):
+    try:
+        return float(cell) == float(value)
+    except (TypeError, ValueError):
+        return str(cell).strip() == str(value).strip()
+
+
+def delete_ranking_row(sheet_id, record, expected_index):
+    """Apaga só a linha do participante repetido, localizada numa leitura atual da aba.
+
+    O relatório de duplicados pode estar desatualizado (outras pessoas terminaram o
+    quiz desde então), então a linha é procurada pelo conteúdo e, entre linhas
+    iguais, a mais próxima da posição original é a escolhida.
+    """
+    try:
+        sheet = get_gsheets_client().open_by_key(sheet_id).worksheet("Ranking")
+        values = sheet.get_all_values()
+        if not values:
+            st.error("Aba Ranking vazia.")
+            return False
+        header = values[0]
+        columns = [column for column in ('nome', 'pontuacao', 'tempo_total') if column in header]
+        positions = [header.index(column) for column in columns]
+        matches = [
+            number for number, row in enumerate(values[1:], start=2)
+            if all(position < len(row) and _same_cell(row[position], record[column])
+                   for column, position in zip(columns, positions))
+        ]
+        if not matches:
+            st.error("Linha não encontrada no ranking atual; atualize a lista de duplicados.")
+            return False
+        sheet.delete_rows(min(matches, key=lambda number: abs(number - (expected_index + 2))))
+        return True
+    except Exception as e:
+        st.error(f"Erro ao remover linha do ranking: {e}")
+        return False
+
+
 # --- FUNÇÕES DE CONTROLE DE PARTICIPAÇÃO ---
 def check_user_participation(name):
-    """Verifica se o usuário já participou do quiz"""
+    """Verifica se o usuário já participou do quiz nesta edição (EVENT_ID)"""
     try:
+        # Resultados desta edição já arquivados saíram da aba Ranking, mas continuam no índice histórico
+        if get_participant_history().participated(name, EVENT_ID):
+            return True
+        # O índice compartilhado já conhece quem terminou em qualquer réplica, antes da planilha
+        shared = get_shared_state()
+        if shared is not None and shared.has_participant(name):
+            return True
         ranking_df = load_data(st.session_state.sheet_id, "Ranking")
-        if not ranking_df.empty and 'nome' in ranking_df.columns:
-            # Normalizar nomes para comparação (minúsculo, sem espaços extras)
-            existing_names = ranking_df['nome'].str.lower().str.strip()
-            user_name = name.lower().strip()
-            return user_name in existing_names.values
-        return False
+        return is_name_in_ranking(ranking_df, name)
     except Exception as e:
         return False
 
 
+def is_name_in_ranking(ranking_df, name):
+    """Busca do nome no ranking, sem acesso à planilha"""
+    if not ranking_df.empty and 'nome' in ranking_df.columns:
+        # Normalizar nomes para comparação (minúsculo, sem acentos, sem espaços extras)
+        existing_names = normalize_names(ranking_df['nome'])
+        user_name = normalize_name(name)
+        return user_name in existing_names.values
+    return False
+
+
 def get_user_score(name):
     """Recupera a pontuação do usuário se ele já participou"""
     try:
         ranking_df = load_data(st.session_state.sheet_id, "Ranking")
         if not ranking_df.empty and 'nome' in ranking_df.columns:
-            user_row = ranking_df[ranking_df['nome'].str.lower().str.strip() == name.lower().strip()]
+            user_row = ranking_df[normalize_names(ranking_df['nome']) == normalize_name(name)]
             if not user_row.empty:
                 return {
                     'score': user_row.iloc[0]['pontuacao'],
@@ -610,20 +1738,166 @@ def get_user_score(name):
         return None
 
 
+def prepare_ranking(ranking_df):
+    """Normaliza os tipos do ranking e ordena por pontuação (desc) e tempo (asc)"""
+    ranking_df = ranking_df.copy()
+    ranking_df['nome'] = ranking_df['nome'].astype(str)
+    if 'tempo_total' not in ranking_df.columns:
+        ranking_df['tempo_total'] = 999.0
+    ranking_df['pontuacao'] = pd.to_numeric(ranking_df['pontuacao'], errors='coerce').fillna(0)
+    ranking_df['tempo_total'] = pd.to_numeric(ranking_df['tempo_total'], errors='coerce').fillna(999)
+
+    return ranking_df.sort_values(
+        by=['pontuacao', 'tempo_total'],
+        ascending=[False, True]
+    )
+
+
+def build_top_ranking(ranking_df, limit=100):
+    """Top N do ranking ordenado e a versão formatada para exibição"""
+    sorted_ranking = prepare_ranking(ranking_df).head(limit).reset_index(drop=True)
+
+    sorted_ranking['Tempo (s)'] = sorted_ranking['tempo_total'].apply(lambda t: f"{t:.1f}")
+    display_ranking = sorted_ranking[['nome', 'pontuacao', 'Tempo (s)']]
+    display_ranking.columns = ['Nome', 'Pontuação', 'Tempo (s)']
+    display_ranking.index += 1
+    return sorted_ranking, display_ranking
+
+
+# --- ARQUIVAMENTO DO RANKING ---
+@st.cache_resource
+def get_participant_history():
+    return ParticipantHistory(DATA_DIR / "historico_participantes.json")
+
+
+def _rows_digest(rows):
+    return hashlib.sha1(json.dumps(rows, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def archive_ranking(sheet_id, event_id):
+    """Move as linhas do Ranking ao vivo para o arquivo da edição e compacta a aba.
+
+    As linhas vão para uma aba 'Ranking_<edição>', para um CSV local e para o índice
+    histórico. Só as linhas copiadas são apagadas da aba ao vivo, então quem terminar
+    o quiz durante o arquivamento não é perdido. Retorna o número de linhas movidas.
+
+    Cada arquivamento recebe um identificador gravado na coluna ARCHIVE_RUN_COLUMN e
+    num arquivo '.pendente.json' até a aba ao vivo ser compactada. Se uma etapa falhar,
+    a nova tentativa retoma o mesmo lote e pula os destinos que já o contêm.
+    """
+    try:
+        workbook = get_gsheets_client().open_by_key(sheet_id)
+        sheet = workbook.worksheet("Ranking")
+        values = sheet.get_all_values()
+
+        local_dir = DATA_DIR / "ranking_arquivo"
+        local_dir.mkdir(parents=True, exist_ok=True)
+        pending_path = local_dir / f"{event_id}.pendente.json"
+        pending = json.loads(pending_path.read_text(encoding='utf-8')) if pending_path.exists() else None
+        if pending and _rows_digest(values[1:pending['linhas'] + 1]) == pending['digest']:
+            run_id, count = pending['arquivamento'], pending['linhas']
+        else:
+            if len(values) <= 1:
+                pending_path.unlink(missing_ok=True)
+                return 0
+            run_id, count = uuid.uuid4().hex[:12], len(values) - 1
+            pending_path.write_text(json.dumps({
+                'arquivamento': run_id, 'linhas': count, 'digest': _rows_digest(values[1:count + 1])
+            }), encoding='utf-8')
+
+        header, rows = values[0], values[1:count + 1]
+        archived_df = pd.DataFrame(rows, columns=header)
+        archived_df[ARCHIVE_RUN_COLUMN] = run_id
+        tagged_rows = [row + [run_id] for row in rows]
+
+        # Cópia local (acumula se a mesma edição for arquivada em mais de uma etapa)
+        local_path = local_dir / f"{event_id}.csv.gz"
+        local_df = archived_df
+        if local_path.exists():
+            existing_df = pd.read_csv(local_path, dtype=str, keep_default_na=False)
+            if ARCHIVE_RUN_COLUMN in existing_df.columns and (existing_df[ARCHIVE_RUN_COLUMN] == run_id).any():
+                local_df = None  # Já gravado numa tentativa anterior
+            else:
+                local_df = pd.concat([existing_df, archived_df], ignore_index=True)
+        if local_df is not None:
+            tmp_path = local_path.with_name(local_path.name + '.tmp')
+            local_df.to_csv(tmp_path, index=False, compression='gzip')
+            os.replace(tmp_path, local_path)
+
+        # Aba de arquivo na planilha (append_rows é uma única requisição: tudo ou nada)
+        archive_title = f"Ranking_{event_id}"
+        try:
+            archive_sheet = workbook.worksheet(archive_title)
+            archive_header = archive_sheet.row_values(1)
+            if ARCHIVE_RUN_COLUMN in archive_header:
+                run_column = archive_header.index(ARCHIVE_RUN_COLUMN) + 1
+                already_archived = run_id in archive_sheet.col_values(run_column)
+            else:
+                # Aba criada antes da coluna de lote existir
+                if archive_sheet.col_count < len(header) + 1:
+                    archive_sheet.add_cols(len(header) + 1 - archive_sheet.col_count)
+                archive_sheet.update_cell(1, len(header) + 1, ARCHIVE_RUN_COLUMN)
+                already_archived = False
+            if not already_archived:
+                archive_sheet.append_rows(tagged_rows)
+        except lazy_import('gspread').exceptions.WorksheetNotFound:
+            archive_sheet = workbook.add_worksheet(title=archive_title, rows=len(rows) + 1, cols=len(header) + 1)
+            archive_sheet.update([header + [ARCHIVE_RUN_COLUMN]] + tagged_rows)
+
+        get_participant_history().add_event(event_id, archived_df['nome'] if 'nome' in archived_df else [])
+
+        # Remove da aba ao vivo apenas as linhas copiadas
+        sheet.delete_rows(2, count + 1)
+        pending_path.unlink(missing_ok=True)
+        return count
+    except Exception as e:
+        st.error(f"Erro ao arquivar ranking: {e}")
+        return None
+
+
 # --- FUNÇÕES DE CONTROLE DO QUIZ ---
 def load_quiz_status():
-    """Carrega o status do quiz da planilha"""
+    """Carrega o status do quiz (do estado compartilhado entre réplicas, se houver, ou da planilha).
+
+    Só lê: o estado compartilhado é escrito apenas por save_quiz_status, depois que a aba
+    Config aceitou a mudança, para que uma cópia antiga da Config não sobrescreva um
+    status recém-publicado por outra réplica.
+    """
+    shared = get_shared_state()
+    if shared is not None:
+        value, updated_at = shared.get_value('quiz_enabled')
+        if value is not None and time.time() - updated_at < QUIZ_STATUS_SHARED_TTL:
+            return value == '1'
+
     try:
-        config_df = load_data(st.session_state.sheet_id, "Config")
-        if not config_df.empty and 'quiz_enabled' in config_df.columns:
-            status = config_df.iloc[0]['quiz_enabled']
-            return str(status).lower() in ['true', '1', 'sim', 'habilitado', 'enabled']
-        return True  # Default habilitado se não encontrar configuração
+        return quiz_status_from_config(load_data(st.session_state.sheet_id, "Config"))
     except Exception as e:
         # Se a planilha Config não existir, retorna True (habilitado por padrão)
         return True
 
 
+def quiz_status_from_config(config_df):
+    if not config_df.empty and 'quiz_enabled' in config_df.columns:
+        status = config_df.iloc[0]['quiz_enabled']
+        return str(status).lower() in ['true', '1', 'sim', 'habilitado', 'enabled']
+    return True  # Default habilitado se não encontrar configuração
+
+
+def peek_quiz_status():
+    """Status já conhecido sem acessar o Google (estado compartilhado ou cópia da Config em memória).
+
+    Retorna None se ainda não há cópia; nesse caso a Config é baixada em segundo plano e
+    start_quiz faz a verificação completa no clique.
+    """
+    shared = get_shared_state()
+    if shared is not None:
+        value, updated_at = shared.get_value('quiz_enabled')
+        if value is not None and time.time() - updated_at < QUIZ_STATUS_SHARED_TTL:
+            return value == '1'
+    config_df = get_sheet_cache().peek(st.session_state.sheet_id, "Config")
+    return None if config_df is None else quiz_status_from_config(config_df)
+
+
 def save_quiz_status(enabled):
     """Salva o status do quiz na planilha"""
     try:
@@ -635,18 +1909,24 @@ def save_quiz_status(enabled):
 
         # Tentar atualizar planilha existente
         try:
-            return update_sheet_from_df(st.session_state.sheet_id, "Config", config_data)
+            saved = update_sheet_from_df(st.session_state.sheet_id, "Config", config_data)
         except:
             # Se falhar, tentar criar nova planilha
             try:
-                workbook = gsheets_client.open_by_key(st.session_state.sheet_id)
+                workbook = get_gsheets_client().open_by_key(st.session_state.sheet_id)
                 config_sheet = workbook.add_worksheet(title="Config", rows=100, cols=10)
                 config_sheet.update([config_data.columns.values.tolist()] + config_data.values.tolist())
-                return True
+                saved = True
             except Exception as create_error:
                 st.error(f"Erro ao criar planilha Config: {create_error}")
                 return False
 
+        # Só publica para as outras réplicas depois que a planilha aceitou a mudança
+        shared = get_shared_state()
+        if saved and shared is not None:
+            shared.set_value('quiz_enabled', '1' if enabled else '0')
+        return saved
+
     except Exception as e:
         st.error(f"Erro ao salvar status: {e}")
         return False
@@ -657,6 +1937,672 @@ def check_quiz_availability():
     return load_quiz_status()
 
 
+# --- ANÁLISE DE RESPOSTAS POR PERGUNTA ---
+class AnswerAnalytics:
+    """Agregados incrementais por pergunta, em memória; os eventos em si vão para o AnswerArchive"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def record(self, question_data, option_index, correct, ms_taken):
+        """Registra uma resposta (option_index = -1 para tempo esgotado); custo O(1)"""
+        qid = question_id(question_data)
+        ms_taken = max(0, min(int(ms_taken), QUESTION_TIMER * 1000))
+
+        with self.lock:
+            stats = self.stats.get(qid)
+            if stats is None:
+                stats = self.stats[qid] = {
+                    'pergunta': str(question_data.get('pergunta', '')),
+                    'opcoes': parse_options(question_data),
+                    'respostas': 0,
+                    'acertos': 0,
+                    'escolhas': {},
+                    'tempos': [0] * RESPONSE_TIME_BUCKETS
+                }
+            stats['respostas'] += 1
+            stats['acertos'] += int(correct)
+            stats['escolhas'][option_index] = stats['escolhas'].get(option_index, 0) + 1
+            stats['tempos'][min(ms_taken // RESPONSE_TIME_BUCKET_MS, RESPONSE_TIME_BUCKETS - 1)] += 1
+
+    def summary(self):
+        """Tabela de agregados por pergunta, das que mais erram para as que mais acertam"""
+        with self.lock:
+            items = [(qid, dict(s, escolhas=dict(s['escolhas']), tempos=list(s['tempos'])))
+                     for qid, s in self.stats.items()]
+
+        rows = []
+        for qid, s in items:
+            total = s['respostas']
+            distribution = []
+            for index, count in sorted(s['escolhas'].items()):
+                label = "⏱️ Tempo esgotado" if index < 0 else (
+                    s['opcoes'][index] if index < len(s['opcoes']) else f"Opção {index + 1}")
+                distribution.append(f"{label}: {count / total:.0%}")
+            rows.append({
+                'id': qid,
+                'Pergunta': s['pergunta'],
+                'Respostas': total,
+                'Acerto (%)': round(100 * s['acertos'] / total, 1),
+                'Tempo p50 (s)': _histogram_percentile(s['tempos'], total, 0.5) / 1000,
+                'Tempo p90 (s)': _histogram_percentile(s['tempos'], total, 0.9) / 1000,
+                'Distribuição das escolhas': ' · '.join(distribution)
+            })
+        if not rows:
+            return pd.DataFrame()
+        return pd.DataFrame(rows).sort_values('Acerto (%)').reset_index(drop=True)
+
+
+def _histogram_percentile(histogram, total, fraction):
+    """Percentil aproximado (limite superior do balde) a partir do histograma de tempos"""
+    target = fraction * total
+    cumulative = 0
+    for bucket, count in enumerate(histogram):
+        cumulative += count
+        if cumulative >= target:
+            return (bucket + 1) * RESPONSE_TIME_BUCKET_MS
+    return len(histogram) * RESPONSE_TIME_BUCKET_MS
+
+
+@st.cache_resource
+def get_answer_analytics():
+    return AnswerAnalytics()
+
+
+def record_answer(question_data, option_index, correct):
+    """Registra a resposta do jogador atual com o tempo medido em milissegundos"""
+    started_at = st.session_state.get('question_started_at')
+    if started_at is None:
+        ms_taken = (QUESTION_TIMER - st.session_state.timer) * 1000
+    else:
+        ms_taken = (time.time() - started_at) * 1000
+    ms_taken = max(0, min(int(ms_taken), QUESTION_TIMER * 1000))
+    get_answer_analytics().record(question_data, option_index, correct, ms_taken)
+    get_answer_archive().push(EVENT_ID, st.session_state.player_name, question_id(question_data),
+                              option_index, correct, ms_taken)
+
+
+# --- ARQUIVO COLUNAR DE RESPOSTAS ---
+class AnswerArchive:
+    """Arquivo local de eventos de resposta em colunas binárias de largura fixa.
+
+    Layout: <raiz>/evento=<id>/dia=<AAAA-MM-DD>/parte-<...>/<coluna>.npy, com os nomes e os
+    ids de pergunta codificados por dicionário (<coluna>.json). Cada envio grava uma parte nova,
+    de forma atômica, e as partes são lidas com memory-map.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.lock = threading.Lock()
+        self.buffer = []
+        self.last_flush = time.time()
+        self.flushing = False
+        self.parts_written = 0
+
+    def push(self, event_id, player, qid, option_index, correct, ms_taken):
+        """Só acrescenta o evento ao buffer em memória; a escrita em disco é feita em lote"""
+        with self.lock:
+            self.buffer.append((event_id, int(time.time() * 1000), player, qid, option_index, correct, ms_taken))
+            due = (len(self.buffer) >= ARCHIVE_FLUSH_BATCH
+                   or time.time() - self.last_flush >= ARCHIVE_FLUSH_INTERVAL)
+            if due and not self.flushing:
+                self.flushing = True
+            else:
+                due = False
+        if due:
+            threading.Thread(target=self.flush, daemon=True).start()
+
+    def flush(self):
+        """Grava os eventos pendentes, uma parte por (evento, dia)"""
+        with self.lock:
+            self.flushing = True
+            batch, self.buffer = self.buffer, []
+        try:
+            partitions = {}
+            for event in batch:
+                day = time.strftime('%Y-%m-%d', time.localtime(event[1] / 1000))
+                partitions.setdefault((event[0], day), []).append(event)
+            for (event_id, day), rows in partitions.items():
+                self._write_part(event_id, day, rows)
+            return len(batch)
+        except Exception as e:
+            logger.error("Erro ao gravar arquivo de respostas: %s", e)
+            with self.lock:
+                self.buffer = batch + self.buffer
+            return 0
+        finally:
+            with self.lock:
+                self.last_flush = time.time()
+                self.flushing = False
+
+    def flush_pending(self):
+        """Gravação periódica e no encerramento: o último lote não espera uma nova resposta"""
+        with self.lock:
+            has_events = bool(self.buffer) and not self.flushing
+        if has_events:
+            self.flush()
+
+    def _write_part(self, event_id, day, rows):
+        _, timestamps, players, qids, options, corrects, times = zip(*rows)
+        with self.lock:
+            self.parts_written += 1
+            part_name = f"parte-{timestamps[0]}-{os.getpid()}-{self.parts_written}"
+        partition_dir = self.root / f"evento={event_id}" / f"dia={day}"
+        partition_dir.mkdir(parents=True, exist_ok=True)
+        tmp_dir = partition_dir / f".{part_name}.tmp"
+        tmp_dir.mkdir()
+
+        np.save(tmp_dir / 'timestamp.npy', np.asarray(timestamps, dtype=np.int64))
+        np.save(tmp_dir / 'opcao.npy', np.asarray(options, dtype=np.int8))
+        np.save(tmp_dir / 'correta.npy', np.asarray(corrects, dtype=np.bool_))
+        np.save(tmp_dir / 'tempo_ms.npy', np.asarray(times, dtype=np.int32))
+        for column, values in (('nome', players), ('pergunta_id', qids)):
+            codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+            np.save(tmp_dir / f'{column}.npy', codes.astype(np.int32))
+            with open(tmp_dir / f'{column}.json', 'w', encoding='utf-8') as f:
+                json.dump([str(u) for u in uniques], f, ensure_ascii=False)
+
+        os.replace(tmp_dir, partition_dir / part_name)
+
+    def _part_dirs(self, event_id=None, day=None):
+        event_glob = f"evento={event_id}" if event_id else "evento=*"
+        day_glob = f"dia={day}" if day else "dia=*"
+        return sorted(self.root.glob(f"{event_glob}/{day_glob}/parte-*"))
+
+    def partitions(self):
+        """Resumo das partições (evento, dia, partes, linhas) lendo só o cabeçalho dos arquivos"""
+        summary = {}
+        for part_dir in self._part_dirs():
+            key = (part_dir.parent.parent.name.split('=', 1)[1], part_dir.parent.name.split('=', 1)[1])
+            rows = np.load(part_dir / 'timestamp.npy', mmap_mode='r').shape[0]
+            parts, total = summary.get(key, (0, 0))
+            summary[key] = (parts + 1, total + rows)
+        return pd.DataFrame([{'evento': e, 'dia': d, 'partes': p, 'respostas': n}
+                             for (e, d), (p, n) in sorted(summary.items())])
+
+    @staticmethod
+    def read_part(part_dir):
+        """Carrega uma parte com memory-map; as colunas numéricas não são copiadas"""
+        columns = {name: np.load(part_dir / f'{name}.npy', mmap_mode='r')
+                   for name in ('timestamp', 'nome', 'pergunta_id', 'opcao', 'correta', 'tempo_ms')}
+        frame = {'timestamp': pd.to_datetime(columns['timestamp'], unit='ms')}
+        for column in ('nome', 'pergunta_id'):
+            with open(part_dir / f'{column}.json', encoding='utf-8') as f:
+                frame[column] = pd.Categorical.from_codes(columns[column], categories=json.load(f))
+        for column in ('opcao', 'correta', 'tempo_ms'):
+            frame[column] = columns[column]
+        return pd.DataFrame(frame, copy=False)
+
+    def read(self, event_id=None, day=None):
+        """Lê as partes de um evento (e opcionalmente de um dia) num único DataFrame"""
+        parts = []
+        for part_dir in self._part_dirs(event_id, day):
+            part = self.read_part(part_dir)
+            part.insert(0, 'evento', part_dir.parent.parent.name.split('=', 1)[1])
+            parts.append(part)
+        if not parts:
+            return pd.DataFrame(columns=['evento'] + ANSWER_EVENT_COLUMNS)
+        df = pd.concat(parts, ignore_index=True)
+        for column in ('evento', 'nome', 'pergunta_id'):
+            df[column] = df[column].astype('category')
+        return df
+
+
+@st.cache_resource
+def get_answer_archive():
+    archive = AnswerArchive(DATA_DIR / "respostas")
+    run_periodically('arquivo-respostas', archive.flush_pending, ARCHIVE_FLUSH_INTERVAL)
+    return archive
+
+
+def export_answer_archive(event_id=None):
+    """Exporta o arquivo de respostas (de um evento ou de todos) como CSV"""
+    return get_answer_archive().read(event_id).to_csv(index=False).encode('utf-8')
+
+
+# --- CERTIFICADOS DE PARTICIPAÇÃO ---
+def generate_certificates_zip(ranking_df, on_progress=None):
+    """Gera os certificados do ranking num pool de processos e grava o ZIP em disco.
+
+    Os PDFs são escritos no ZIP à medida que ficam prontos, em janelas de tamanho
+    limitado, então nunca há mais que uma janela de certificados na memória.
+    """
+    certificados = lazy_import('certificados')
+
+    entries = [(position, row.nome, int(row.pontuacao), float(row.tempo_total))
+               for position, row in enumerate(ranking_df.itertuples(index=False), start=1)]
+    # O servidor do Streamlit tem várias threads: fork copiaria locks em estado
+    # indefinido, então os processos partem de um forkserver (ou spawn no Windows)
+    context = multiprocessing.get_context('forkserver' if os.name == 'posix' else 'spawn')
+    output = tempfile.NamedTemporaryFile(prefix='certificados_', suffix='.zip', delete=False)
+
+    with output, zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive, \
+            ProcessPoolExecutor(max_workers=CERTIFICATE_WORKERS, mp_context=context,
+                                initializer=certificados.init_worker,
+                                initargs=(EVENT_TITLE, time.strftime('%d/%m/%Y'))) as pool:
+        done = 0
+        for start in range(0, len(entries), CERTIFICATE_WINDOW):
+            window = entries[start:start + CERTIFICATE_WINDOW]
+            for filename, pdf_bytes in pool.map(certificados.render_certificate, window,
+                                                chunksize=max(1, len(window) // (CERTIFICATE_WORKERS * 4))):
+                archive.writestr(filename, pdf_bytes)
+                done += 1
+            if on_progress:
+                on_progress(done, len(entries))
+    return output.name
+
+
+# --- CARTAZES COM QR CODE ---
+@st.cache_data(max_entries=256, show_spinner=False)
+def render_qr_png(data, box_size=10, error_level='M'):
+    """PNG do QR Code, gerado uma vez por (conteúdo, tamanho, nível de correção)"""
+    qrcode = lazy_import('qrcode')
+    qr = qrcode.QRCode(version=None, box_size=box_size, border=4,
+                       error_correction=getattr(qrcode.constants, f'ERROR_CORRECT_{error_level}'))
+    qr.add_data(data)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+    buf = BytesIO()
+    img.save(buf, format='PNG')
+    return buf.getvalue()
+
+
+def parse_qr_entries(text, app_url=''):
+    """Uma entrada por linha: 'rótulo | URL', uma URL ou um código de sala/prédio/turno.
+
+    Códigos sem URL apontam para o app com ?local=<código>. Retorna (entradas, linhas inválidas).
+    """
+    base_url = app_url.strip()
+    entries, invalid = [], []
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        label, _, target = (part.strip() for part in line.partition('|')) if '|' in line else (line, '', line)
+        if re.match(r'https?://', target):
+            entries.append((label, target))
+        elif base_url:
+            separator = '&' if '?' in base_url else '?'
+            entries.append((label, f"{base_url}{separator}{QR_LOCATION_PARAM}={urllib.parse.quote(target)}"))
+        else:
+            invalid.append(line_number)
+    return entries, invalid
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def build_qr_posters_pdf(entries, per_page=4, error_level='H', subtitle="Escaneie e teste seu olhar para o risco!"):
+    """PDF para impressão com um cartaz por entrada (rótulo, URL), montado uma vez por lista"""
+    FPDF = lazy_import('fpdf').FPDF
+    certificados = lazy_import('certificados')
+    page_width, page_height, margin, gap = 210, 297, 10, 6  # A4 retrato, em mm
+    columns, rows = QR_POSTER_LAYOUTS[per_page]
+    cell_width = (page_width - 2 * margin - (columns - 1) * gap) / columns
+    cell_height = (page_height - 2 * margin - (rows - 1) * gap) / rows
+    scale = cell_height / (page_height - 2 * margin)  # Fontes proporcionais ao tamanho do cartaz
+
+    pdf = FPDF(orientation='P', unit='mm', format='A4')
+    pdf.set_auto_page_break(False)
+    if os.path.exists(certificados.FONT_PATH):
+        pdf.add_font('Cartaz', '', certificados.FONT_PATH)
+        family, text = 'Cartaz', str
+    else:
+        # As fontes padrão do PDF só cobrem latin-1
+        family, text = 'Helvetica', lambda value: str(value).encode('latin-1', 'replace').decode('latin-1')
+
+    for index, (label, url) in enumerate(entries):
+        slot = index % per_page
+        if slot == 0:
+            pdf.add_page()
+        x = margin + (slot % columns) * (cell_width + gap)
+        y = margin + (slot // columns) * (cell_height + gap)
+
+        pdf.set_draw_color(4, 120, 87)
+        pdf.set_line_width(max(0.6, 2 * scale))
+        pdf.rect(x, y, cell_width, cell_height)
+        pdf.set_fill_color(6, 78, 59)
+        pdf.rect(x, y, cell_width, cell_height * 0.14, style='F')
+
+        pdf.set_text_color(255, 255, 255)
+        pdf.set_font(family, size=max(9, 30 * scale))
+        pdf.set_xy(x, y + cell_height * 0.02)
+        pdf.cell(cell_width, cell_height * 0.06, text(EVENT_TITLE.split(' - ')[0]), align='C')
+        pdf.set_font(family, size=max(8, 22 * scale))
+        pdf.set_xy(x, y + cell_height * 0.075)
+        pdf.cell(cell_width, cell_height * 0.05, text(EVENT_TITLE.split(' - ')[-1]), align='C')
+
+        qr_size = min(cell_width * 0.8, cell_height * 0.58)
+        pdf.image(BytesIO(render_qr_png(url, QR_POSTER_BOX_SIZE, error_level)),
+                  x=x + (cell_width - qr_size) / 2, y=y + cell_height * 0.17, w=qr_size, h=qr_size)
+
+        pdf.set_text_color(6, 78, 59)
+        pdf.set_font(family, size=max(9, 28 * scale))
+        pdf.set_xy(x + 4, y + cell_height * 0.78)
+        pdf.cell(cell_width - 8, cell_height * 0.07, text(label), align='C')
+        pdf.set_font(family, size=max(7, 16 * scale))
+        pdf.set_xy(x + 4, y + cell_height * 0.87)
+        pdf.cell(cell_width - 8, cell_height * 0.05, text(subtitle), align='C')
+    return bytes(pdf.output())
+
+
+# --- CONTROLE DE ADMISSÃO (SALA DE ESPERA) ---
+@st.cache_resource
+def get_admission_controller():
+    return AdmissionController()
+
+
+def get_session_key():
+    if 'session_key' not in st.session_state:
+        st.session_state.session_key = uuid.uuid4().hex
+    return st.session_state.session_key
+
+
+# --- COMPETIÇÃO POR SETOR ---
+def load_sectors():
+    """Setores da aba 'Setores' (colunas setor e colaboradores); vazio desativa o modo por setor"""
+    try:
+        sectors_df = get_sheet_cache().get(st.session_state.sheet_id, SECTORS_TAB)
+    except Exception:
+        return {}
+    if sectors_df.empty or 'setor' not in sectors_df.columns:
+        return {}
+    headcounts = pd.to_numeric(sectors_df.get('colaboradores', pd.Series(0, index=sectors_df.index)),
+                               errors='coerce').fillna(0).astype(int)
+    return {str(sector).strip(): count for sector, count in zip(sectors_df['setor'], headcounts)
+            if str(sector).strip()}
+
+
+class TeamLeaderboard:
+    """Placar por setor mantido de forma incremental.
+
+    Só as linhas do Ranking ainda não contabilizadas são somadas (O(1) por jogador);
+    um download completo da aba (nova geração do snapshot) reconstrói o placar.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation = None
+        self.synced_rows = 0
+        self.teams = {}  # setor -> [jogadores, soma das pontuações, soma dos tempos]
+
+    def sync(self, snapshot):
+        frame = snapshot['frame']
+        with self.lock:
+            if snapshot.get('generation') != self.generation or len(frame) < self.synced_rows:
+                self.generation = snapshot.get('generation')
+                self.synced_rows = 0
+                self.teams = {}
+            if len(frame) == self.synced_rows:
+                return
+            tail = frame.iloc[self.synced_rows:]
+            self.synced_rows = len(frame)
+            if 'setor' not in tail.columns:
+                return
+            scores = pd.to_numeric(tail['pontuacao'], errors='coerce').fillna(0)
+            times = pd.to_numeric(tail['tempo_total'], errors='coerce').fillna(999) \
+                if 'tempo_total' in tail.columns else pd.Series(999.0, index=tail.index)
+            for team, score, total_time in zip(tail['setor'].astype(str).str.strip(), scores, times):
+                if team:
+                    self._add(team, score, total_time)
+
+    def _add(self, team, score, total_time):
+        totals = self.teams.get(team)
+        if totals is None:
+            totals = self.teams[team] = [0, 0.0, 0.0]
+        totals[0] += 1
+        totals[1] += score
+        totals[2] += total_time
+
+    def board(self, headcounts):
+        """Placar ordenado por média de pontos (desc) e tempo médio (asc): O(T log T)"""
+        with self.lock:
+            items = [(team, tuple(totals)) for team, totals in self.teams.items()]
+        rows = []
+        for team, (players, score_sum, time_sum) in items:
+            headcount = headcounts.get(team, 0)
+            rows.append({
+                'Setor': team,
+                'Jogadores': players,
+                'Participação (%)': round(100 * players / headcount, 1) if headcount else None,
+                'Média de pontos': round(score_sum / players, 1),
+                'Tempo médio (s)': round(time_sum / players, 1)
+            })
+        rows.sort(key=lambda r: (-r['Média de pontos'], r['Tempo médio (s)']))
+        board_df = pd.DataFrame(rows)
+        if not board_df.empty:
+            board_df.index += 1
+        return board_df
+
+
+@st.cache_resource
+def get_team_leaderboard():
+    return TeamLeaderboard()
+
+
+def build_team_board(sheet_id):
+    """Sincroniza o placar com as linhas novas do Ranking e devolve a tabela por setor"""
+    snapshot = get_sheet_cache().get_snapshot(sheet_id, "Ranking")
+    leaderboard = get_team_leaderboard()
+    if snapshot:
+        leaderboard.sync(snapshot)
+    return leaderboard.board(load_sectors())
+
+
+@st.cache_resource
+def get_ranking_headers():
+    return {}
+
+
+def ranking_row_for(sheet_id, values):
+    """Monta a linha do Ranking na ordem do cabeçalho da aba, incluindo a coluna 'setor' se faltar"""
+    headers = get_ranking_headers()
+    header = headers.get(sheet_id)
+    if header is None:
+        try:
+            sheet = get_gsheets_client().open_by_key(sheet_id).worksheet("Ranking")
+            header = _trim_row(sheet.row_values(1))
+            missing = [column for column in RANKING_COLUMNS if column not in header]
+            if missing:
+                header = header + missing
+                sheet.update(range_name='A1', values=[header])
+            headers[sheet_id] = header
+        except Exception as e:
+            logger.warning("Não foi possível verificar o cabeçalho do Ranking: %s", e)
+            header = RANKING_COLUMNS
+    return [values.get(column, '') for column in header]
+
+
+# --- MODO AO VIVO ---
+@st.cache_resource
+def get_live_game():
+    return LiveGame(QUESTION_TIMER)
+
+
+def save_live_results(game):
+    """Grava o resultado de todos os jogadores no Ranking com um único append"""
+    results = game.results()
+    if not results:
+        return 0
+    rows = [ranking_row_for(game.sheet_id, {
+        'nome': player['nome'],
+        'pontuacao': player['pontuacao'],
+        'tempo_total': round(player['tempo_total'], 1),
+        'setor': player['setor']
+    }) for player in results]
+    if not append_rows_to_sheet(game.sheet_id, "Ranking", rows):
+        return None
+    shared = get_shared_state()
+    if shared is not None:
+        for player in results:
+            shared.add_participant(player['nome'])
+    invalidate_sheet_cache("Ranking")
+    return len(rows)
+
+
+def join_live_game():
+    """Entrada pelo botão da tela inicial quando há um jogo ao vivo aberto"""
+    if check_user_participation(st.session_state.player_name):
+        st.error(
+            "🚫 Você já participou do quiz. Em caso de erro, verificar com a administração para uma nova tentativa.")
+        return
+    # O código fica no link: quem recarrega a página volta ao jogo digitando o mesmo nome
+    code = st.query_params.get(LIVE_QUERY_PARAM) or new_resume_token()
+    error = get_live_game().join(get_session_key(), st.session_state.player_name,
+                                 st.session_state.player_sector, code)
+    if error:
+        st.error(f"🚫 {error}")
+        return
+    st.query_params[LIVE_QUERY_PARAM] = code
+    st.session_state.live_revision = None
+    st.session_state.screen = 'live'
+
+
+_fragment = getattr(st, 'fragment', None) or st.experimental_fragment
+
+
+@_fragment(run_every=LIVE_PLAYER_POLL_SECONDS)
+def watch_live_game():
+    """Roda sozinho a cada LIVE_PLAYER_POLL_SECONDS e só provoca o rerun completo quando o jogo muda de fase"""
+    game = get_live_game()
+    if game.poll() != st.session_state.get('live_revision'):
+        st.rerun()
+    if game.phase == 'question':
+        remaining = max(0, int(game.deadline - time.time()))
+        timer_class = "timer-critical" if remaining <= 10 else ""
+        st.markdown(f'<div class="timer-display {timer_class}">⏱️ {remaining}s</div>', unsafe_allow_html=True)
+    elif game.phase == 'lobby':
+        st.caption(f"👥 {len(game.players)} jogadores na sala")
+
+
+@_fragment(run_every=LIVE_POLL_SECONDS)
+def show_live_distribution():
+    """Distribuição das respostas da pergunta atual, atualizada no projetor a cada segundo"""
+    game = get_live_game()
+    if game.poll() != st.session_state.get('live_revision'):
+        st.rerun()
+    view = game.view()
+    if view['question'] is None:
+        st.markdown(f"### 👥 {view['players']} jogadores na sala")
+        return
+
+    if view['phase'] == 'question':
+        remaining = max(0, int(view['deadline'] - time.time()))
+        timer_class = "timer-critical" if remaining <= 10 else ""
+        st.markdown(f'<div class="timer-display {timer_class}">⏱️ {remaining}s</div>', unsafe_allow_html=True)
+    st.markdown(f"### ✋ {view['answered']} de {view['players']} responderam")
+
+    options = parse_options(view['question'])
+    correct = str(view['question'].get('resposta_correta', '')).strip().lower()
+    top = max(view['counts'] + [1])
+    bars = []
+    for i, (option, count) in enumerate(zip(options, view['counts'])):
+        style = ANSWER_STYLES[i % len(ANSWER_STYLES)]
+        dimmed = " dimmed" if view['phase'] != 'question' and option.lower() != correct else ""
+        mark = " ✅" if view['phase'] != 'question' and option.lower() == correct else ""
+        bars.append(f'<div class="live-bar {style["class"]}{dimmed}">'
+                    f'<div class="fill" style="width: {70 * count / top:.1f}%"></div>'
+                    f'{style["shape"]} {option}: {count}{mark}</div>')
+    st.markdown(''.join(bars), unsafe_allow_html=True)
+
+
+# --- IMAGENS DAS PERGUNTAS ---
+@st.cache_resource
+def get_thumbnail_cache():
+    return ThumbnailCache(THUMBNAIL_CACHE_DIR, THUMBNAIL_CACHE_MAX_BYTES)
+
+
+def question_image_sources(questions):
+    """Fontes de imagem não vazias de uma lista de perguntas (registros da planilha)"""
+    sources = (str(q.get(QUESTION_IMAGE_COLUMN) or '').strip() for q in questions)
+    return [source for source in sources if source and source.lower() != 'nan']
+
+
+def prefetch_question_images(questions):
+    if questions:
+        return get_thumbnail_cache().prefetch(question_image_sources(questions))
+    return 0
+
+
+# --- RETOMADA DE PARTIDAS ---
+@st.cache_resource
+def get_checkpoint_store():
+    shared = get_shared_state()
+    path = shared.path if shared is not None else CHECKPOINT_DB
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    return CheckpointStore(path)
+
+
+def new_resume_token():
+    return ''.join(secrets.choice(RESUME_TOKEN_CHARS) for _ in range(RESUME_TOKEN_LENGTH))
+
+
+def save_checkpoint():
+    """Registra o progresso da sessão atual para retomada após recarregar a página"""
+    get_checkpoint_store().save(st.session_state.resume_token, {
+        'nome': st.session_state.player_name,
+        'setor': st.session_state.get('player_sector', ''),
+        'token': st.session_state.resume_token,
+        'sessao': get_session_key(),
+        'perguntas': st.session_state.question_ids,
+        'atual': st.session_state.current_question,
+        'pontuacao': st.session_state.score,
+        'tempo_total': st.session_state.total_time,
+        'respondida': st.session_state.answer_submitted,
+        'inicio_pergunta': st.session_state.question_started_at,
+        'feedback': [st.session_state.feedback_message, st.session_state.get('feedback_type')]
+    })
+
+
+def resume_quiz(token, name=None):
+    """Continua uma partida salva a partir do código de retomada (e do nome, se informado)"""
+    token = (token or '').strip().upper()
+    checkpoint = get_checkpoint_store().find_token(token) if token else None
+    if checkpoint is None or (name and normalize_name(name) != normalize_name(checkpoint['nome'])):
+        st.error("🚫 Código de retomada inválido ou expirado.")
+        return False
+    if check_user_participation(checkpoint['nome']):
+        get_checkpoint_store().delete(token)
+        st.error("🚫 Essa partida já foi concluída.")
+        return False
+
+    questions_df = load_data(st.session_state.sheet_id, st.session_state.questions_tab)
+    by_id = {question_id(q): q for q in questions_df.dropna(subset=['pergunta']).to_dict('records')} \
+        if 'pergunta' in questions_df else {}
+    questions = [by_id.get(qid) for qid in checkpoint['perguntas']]
+    if not questions or any(q is None for q in questions):
+        st.error("🚫 As perguntas mudaram desde a interrupção. Procure a organização do evento.")
+        return False
+
+    controller = get_admission_controller()
+    if not controller.request(get_session_key()):
+        st.warning("⏳ Muitas pessoas jogando agora. Tente continuar em alguns instantes.")
+        return False
+    if not get_checkpoint_store().claim(token, get_session_key()):
+        st.error("🚫 Essa partida está aberta em outro aparelho. "
+                 "Se você fechou a outra página, tente de novo em alguns segundos.")
+        controller.release(get_session_key())
+        return False
+
+    st.session_state.player_name = checkpoint['nome']
+    st.session_state.player_sector = checkpoint['setor']
+    st.session_state.questions = questions
+    st.session_state.question_ids = checkpoint['perguntas']
+    st.session_state.resume_token = token
+    st.session_state.current_question = checkpoint['atual']
+    st.session_state.score = checkpoint['pontuacao']
+    st.session_state.total_time = checkpoint['tempo_total']
+    st.session_state.answer_submitted = checkpoint['respondida']
+    st.session_state.feedback_message, st.session_state.feedback_type = checkpoint['feedback']
+    # O relógio da pergunta continuou correndo durante a interrupção
+    st.session_state.question_started_at = checkpoint['inicio_pergunta']
+    elapsed = int(time.time() - checkpoint['inicio_pergunta'])
+    st.session_state.timer = max(0, QUESTION_TIMER - elapsed)
+    st.query_params[RESUME_QUERY_PARAM] = token
+    controller.mark_playing(get_session_key())
+    st.session_state.screen = 'quiz'
+    return True
+
+
 # --- FUNÇÕES DO QUIZ ---
 def start_quiz():
     # Verificar se o quiz está habilitado
@@ -669,26 +2615,71 @@ def start_quiz():
         st.warning("Por favor, digite seu nome.")
         return
 
+    sector = st.session_state.get('player_sector_input')
+    if load_sectors() and not sector:
+        st.warning("Por favor, selecione seu setor.")
+        return
+    st.session_state.player_sector = sector or ''
+
+    st.session_state.player_name = name.strip()
+
+    # Com um jogo ao vivo aberto, todos entram na sala do apresentador
+    if get_live_game().phase in ('lobby', 'question', 'reveal'):
+        join_live_game()
+        return
+
+    # Controle de admissão: sem vaga, o jogador vai para a sala de espera
+    if not get_admission_controller().request(get_session_key()):
+        st.session_state.screen = 'waiting'
+        return
+
+    begin_quiz()
+
+
+def begin_quiz():
+    """Carrega o quiz para uma sessão já admitida; retorna False (e libera a vaga) se não puder jogar"""
+    controller = get_admission_controller()
+
     # Verificar se o usuário já participou
-    if check_user_participation(name):
+    if check_user_participation(st.session_state.player_name):
         st.error(
             "🚫 Você já participou do quiz. Em caso de erro, verificar com a administração para uma nova tentativa.")
-        return
+        controller.release(get_session_key())
+        return False
+
+    # O mesmo nome não joga em dois aparelhos ao mesmo tempo; uma partida abandonada não impede
+    # começar de novo, mas é descartada para não ser retomada depois
+    if get_checkpoint_store().active(st.session_state.player_name):
+        st.error("⏸️ Já existe um quiz em andamento com esse nome. "
+                 "Use o código de retomada para continuar de onde parou.")
+        controller.release(get_session_key())
+        return False
+    get_checkpoint_store().delete_name(st.session_state.player_name)
 
     # Prosseguir com o quiz se passou em todas as verificações
-    st.session_state.player_name = name.strip()
     questions_df = load_data(st.session_state.sheet_id, st.session_state.questions_tab)
     if not questions_df.empty and not questions_df['pergunta'].isnull().all():
         st.session_state.questions = questions_df.dropna(subset=['pergunta']).to_dict('records')
+        prefetch_question_images(st.session_state.questions)
         st.session_state.current_question = 0
         st.session_state.score = 0
         st.session_state.total_time = 0.0
+        st.session_state.end_ranking_invalidated = False
         st.session_state.feedback_message = None
         st.session_state.answer_submitted = False
         st.session_state.timer = QUESTION_TIMER
+        st.session_state.question_started_at = time.time()
+        st.session_state.question_ids = [question_id(q) for q in st.session_state.questions]
+        st.session_state.resume_token = new_resume_token()
+        st.query_params[RESUME_QUERY_PARAM] = st.session_state.resume_token
+        save_checkpoint()
         st.session_state.screen = 'quiz'
+        controller.mark_playing(get_session_key())
+        return True
     else:
         st.error("Nenhuma pergunta encontrada.")
+        controller.release(get_session_key())
+        return False
 
 
 def next_question():
@@ -696,13 +2687,415 @@ def next_question():
         st.session_state.current_question += 1
         st.session_state.answer_submitted = False
         st.session_state.timer = QUESTION_TIMER
+        st.session_state.question_started_at = time.time()
         st.session_state.feedback_message = None
+        save_checkpoint()
     else:
-        append_row_to_sheet(st.session_state.sheet_id, "Ranking",
-                            [st.session_state.player_name, st.session_state.score, st.session_state.total_time])
+        saved = append_row_to_sheet(st.session_state.sheet_id, "Ranking", ranking_row_for(st.session_state.sheet_id, {
+            'nome': st.session_state.player_name,
+            'pontuacao': st.session_state.score,
+            'tempo_total': st.session_state.total_time,
+            'setor': st.session_state.get('player_sector', '')
+        }))
+        if not saved:
+            # Fica na última pergunta com o progresso salvo: o botão tenta gravar de novo
+            st.warning("⚠️ Seu resultado ainda não foi gravado. Clique em \"Finalizar e Ver Ranking\" de novo "
+                       "em alguns instantes; seu progresso continua salvo.")
+            return
+        shared = get_shared_state()
+        if shared is not None:
+            shared.add_participant(st.session_state.player_name)
+        get_checkpoint_store().delete(st.session_state.resume_token)
+        st.query_params.pop(RESUME_QUERY_PARAM, None)
+        get_admission_controller().release(get_session_key(), finished=True)
         st.session_state.screen = 'end'
 
 
+# --- IMPORTAÇÃO DE PERGUNTAS EM BLOCOS ---
+def iter_upload_chunks(uploaded_file, chunk_rows=UPLOAD_CHUNK_ROWS):
+    """Lê o arquivo enviado em blocos, indexados pelo número da linha na planilha"""
+    uploaded_file.seek(0)
+    if uploaded_file.name.lower().endswith('.csv'):
+        text = io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline='')
+        try:
+            reader = csv.reader(text)
+            header = next(reader, None)
+            if header is None:
+                return
+            columns = [str(c).strip() for c in header]
+            width = len(columns)
+            buffer, lines = [], []
+            previous_line = reader.line_num
+            for values in reader:
+                # line_num conta linhas físicas: o número fica certo com linhas em branco e células com quebra de linha
+                line, previous_line = previous_line + 1, reader.line_num
+                if not any(v.strip() for v in values):
+                    continue
+                buffer.append(values[:width] + [''] * (width - len(values)))
+                lines.append(line)
+                if len(buffer) >= chunk_rows:
+                    yield pd.DataFrame(buffer, columns=columns, index=lines)
+                    buffer, lines = [], []
+            if buffer:
+                yield pd.DataFrame(buffer, columns=columns, index=lines)
+        finally:
+            text.detach()  # Não fecha o arquivo enviado, que ainda é relido depois
+        return
+
+    load_workbook = lazy_import('openpyxl').load_workbook
+    workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = ['' if c is None else str(c).strip() for c in header]
+        width = len(columns)
+        buffer, lines = [], []
+        for line, row in enumerate(rows, start=2):
+            values = ['' if v is None else str(v) for v in row[:width]]
+            if not any(v.strip() for v in values):
+                continue  # Linhas totalmente vazias são ignoradas
+            values += [''] * (width - len(values))
+            buffer.append(values)
+            lines.append(line)
+            if len(buffer) >= chunk_rows:
+                yield pd.DataFrame(buffer, columns=columns, index=lines)
+                buffer, lines = [], []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=columns, index=lines)
+    finally:
+        workbook.close()
+
+
+def validate_questions_upload(uploaded_file):
+    """Valida o arquivo inteiro, bloco a bloco, sem manter o conteúdo completo na memória"""
+    result = {'columns': None, 'missing': [], 'total': 0, 'valid': 0,
+              'errors': pd.DataFrame(columns=['linha', 'coluna', 'erro']), 'preview': pd.DataFrame()}
+    seen_questions = {}
+    error_frames, preview_frames = [], []
+    preview_rows = 0
+
+    for chunk in iter_upload_chunks(uploaded_file):
+        if result['columns'] is None:
+            result['columns'] = list(chunk.columns)
+            result['missing'] = [c for c in REQUIRED_QUESTION_COLS if c not in chunk.columns]
+            if result['missing']:
+                return result
+
+        valid, errors = validate_questions_chunk(chunk, seen_questions)
+        result['total'] += len(chunk)
+        result['valid'] += len(valid)
+        if not errors.empty:
+            error_frames.append(errors)
+        if preview_rows < UPLOAD_PREVIEW_ROWS and not valid.empty:
+            preview_frames.append(valid.head(UPLOAD_PREVIEW_ROWS - preview_rows))
+            preview_rows += len(preview_frames[-1])
+
+    if result['columns'] is None:
+        result['missing'] = list(REQUIRED_QUESTION_COLS)
+    if error_frames:
+        result['errors'] = pd.concat(error_frames, ignore_index=True).sort_values('linha', kind='stable')
+    if preview_frames:
+        result['preview'] = pd.concat(preview_frames)
+    return result
+
+
+def write_questions_in_batches(sheet_id, sheet_name, uploaded_file, columns, total_valid, on_progress=None):
+    """Grava as linhas válidas numa aba temporária e só então a troca pela aba de perguntas.
+
+    A troca (apagar a aba antiga e renomear a nova) é um único batchUpdate, que o Google
+    aplica de forma atômica: se o envio falhar no meio, as perguntas atuais continuam intactas.
+    """
+    staging_name = f"{sheet_name} (importando)"
+    workbook = None
+    staging = None
+    try:
+        workbook = get_gsheets_client().open_by_key(sheet_id)
+        current = workbook.worksheet(sheet_name)
+        try:
+            workbook.del_worksheet(workbook.worksheet(staging_name))  # Sobra de uma importação interrompida
+        except lazy_import('gspread').exceptions.WorksheetNotFound:
+            pass
+        staging = workbook.add_worksheet(title=staging_name, rows=total_valid + 1, cols=len(columns))
+        staging.update(range_name='A1', values=[columns])
+
+        next_row, written = 2, 0
+        seen_questions = {}
+        for chunk in iter_upload_chunks(uploaded_file):
+            valid, _ = validate_questions_chunk(chunk, seen_questions)
+            values = valid[columns].values.tolist()
+            for start in range(0, len(values), SHEET_WRITE_BATCH_ROWS):
+                batch = values[start:start + SHEET_WRITE_BATCH_ROWS]
+                staging.update(range_name=f'A{next_row}', values=batch)
+                next_row += len(batch)
+                written += len(batch)
+                if on_progress:
+                    on_progress(written, total_valid)
+
+        workbook.batch_update({'requests': [
+            {'deleteSheet': {'sheetId': current.id}},
+            {'updateSheetProperties': {
+                'properties': {'sheetId': staging.id, 'title': sheet_name, 'index': current.index},
+                'fields': 'title,index'}}
+        ]})
+        return True
+    except Exception as e:
+        if workbook is not None and staging is not None:
+            try:
+                workbook.del_worksheet(staging)
+            except Exception:
+                pass
+        st.error(f"Erro ao atualizar planilha (as perguntas atuais foram mantidas): {e}")
+        return False
+
+
+def get_upload_report(uploaded_file):
+    """Valida o arquivo uma única vez por upload, reaproveitando o relatório nos reruns"""
+    upload_key = getattr(uploaded_file, 'file_id', None) or (uploaded_file.name, uploaded_file.size)
+    cached = st.session_state.get('upload_report')
+    if cached is None or cached[0] != upload_key:
+        cached = (upload_key, validate_questions_upload(uploaded_file))
+        st.session_state.upload_report = cached
+    return cached[1]
+
+
+# --- EDITOR PAGINADO DE PERGUNTAS ---
+def normalize_search_text(series):
+    """Minúsculas e sem acentos, para a busca não depender da grafia"""
+    return (series.astype(str).str.normalize('NFKD')
+            .str.encode('ascii', 'ignore').str.decode('ascii').str.lower())
+
+
+def _question_search_state(snapshot):
+    """Texto de busca e categorias da aba, recalculados só quando a aba é baixada de novo"""
+    state = st.session_state.get('question_search')
+    if state is None or state['generation'] != snapshot.get('generation'):
+        frame = snapshot['frame']
+        text = pd.Series('', index=frame.index)
+        for column in frame.columns:
+            text = text + ' ' + frame[column].astype(str)
+        categories = []
+        if QUESTION_CATEGORY_COLUMN in frame.columns:
+            values = frame[QUESTION_CATEGORY_COLUMN].astype(str).str.strip()
+            categories = sorted(v for v in values.unique() if v)
+        state = {'generation': snapshot.get('generation'), 'text': normalize_search_text(text),
+                 'categories': categories, 'filters': {}}
+        st.session_state.question_search = state
+    return state
+
+
+def question_categories(snapshot):
+    return _question_search_state(snapshot)['categories']
+
+
+def filter_questions(snapshot, query, category=None):
+    """Índices das perguntas que atendem à busca; cada filtro percorre a aba uma única vez"""
+    state = _question_search_state(snapshot)
+    key = (query, category)
+    if key not in state['filters']:
+        frame = snapshot['frame']
+        mask = pd.Series(True, index=frame.index)
+        if category:
+            mask &= frame[QUESTION_CATEGORY_COLUMN].astype(str).str.strip() == category
+        if query:
+            needle = normalize_search_text(pd.Series([query])).iloc[0]
+            mask &= state['text'].str.contains(needle, regex=False)
+        if len(state['filters']) >= QUESTION_FILTER_CACHE:
+            state['filters'].pop(next(iter(state['filters'])))
+        state['filters'][key] = frame.index[mask.to_numpy()].to_numpy()
+    return state['filters'][key]
+
+
+def _row_signature(values):
+    return [str(cell_value(v)).strip() for v in values]
+
+
+def get_question_edits(sheet_id, sheet_name):
+    """Alterações pendentes do editor, guardadas por linha até o admin salvar.
+
+    Cada linha alterada ou marcada para exclusão guarda também o conteúdo original,
+    para detectar na hora de salvar se a planilha mudou por baixo da edição.
+    """
+    edits = st.session_state.get('question_edits')
+    if edits is None or edits['tab'] != (sheet_id, sheet_name):
+        edits = {'tab': (sheet_id, sheet_name), 'changed': {}, 'deleted': {}, 'added': []}
+        st.session_state.question_edits = edits
+    return edits
+
+
+def discard_question_edits():
+    st.session_state.pop('question_edits', None)
+    # Nova chave para o data_editor, senão ele reaplicaria as edições guardadas no widget
+    st.session_state.question_editor_revision = st.session_state.get('question_editor_revision', 0) + 1
+
+
+def build_question_page(frame, rows, edits):
+    """Só as linhas da página, com as alterações pendentes já aplicadas"""
+    page = frame.loc[rows].copy()
+    for index in rows:
+        change = edits['changed'].get(index)
+        if change is not None:
+            page.loc[index] = change['values']
+    page[QUESTION_DELETE_COLUMN] = [index in edits['deleted'] for index in rows]
+    return page
+
+
+def buffer_page_edits(frame, edited_page, edits):
+    """Compara a página editada com a aba e guarda só as linhas que mudaram"""
+    columns = list(frame.columns)
+    for index, values, delete in zip(edited_page.index, edited_page[columns].itertuples(index=False, name=None),
+                                     edited_page[QUESTION_DELETE_COLUMN]):
+        previous = edits['changed'].get(index) or edits['deleted'].get(index)
+        original = previous['original'] if isinstance(previous, dict) else previous
+        if original is None:
+            original = list(frame.loc[index, columns])
+
+        if _row_signature(values) != _row_signature(original):
+            edits['changed'][index] = {'original': original, 'values': list(values)}
+        else:
+            edits['changed'].pop(index, None)
+        if delete:
+            edits['deleted'][index] = original
+        else:
+            edits['deleted'].pop(index, None)
+
+
+def save_question_edits(sheet_id, sheet_name, columns, edits):
+    """Envia só as linhas alteradas: uma leitura de conferência e no máximo três escritas.
+
+    Linhas que mudaram na planilha desde a edição não são sobrescritas nem excluídas;
+    retorna (linhas aplicadas, linhas em conflito) ou None em caso de erro.
+    """
+    rowcol_to_a1 = lazy_import('gspread.utils').rowcol_to_a1
+    try:
+        workbook = get_gsheets_client().open_by_key(sheet_id)
+        sheet = workbook.worksheet(sheet_name)
+        touched = sorted(set(edits['changed']) | set(edits['deleted']))
+        ranges = [f"A{i + 2}:{rowcol_to_a1(i + 2, len(columns))}" for i in touched]
+        current = sheet.batch_get(['1:1'] + ranges) if touched else [[columns]]
+        if _trim_row(current[0][0] if current[0] else []) != _trim_row(columns):
+            st.error("A aba de perguntas mudou de colunas desde a edição. Descarte as alterações e recarregue.")
+            return None
+
+        conflicts, still_there = [], set()
+        for index, values in zip(touched, current[1:]):
+            original = (edits['changed'].get(index) or {}).get('original') or edits['deleted'].get(index)
+            if _row_signature(_pad_row(values[0] if values else [], len(columns))) == _row_signature(original):
+                still_there.add(index)
+            else:
+                conflicts.append(index + 2)
+
+        updates = [{'range': f"A{i + 2}:{rowcol_to_a1(i + 2, len(columns))}",
+                    'values': [[cell_value(v) for v in edits['changed'][i]['values']]]}
+                   for i in sorted(still_there) if i in edits['changed'] and i not in edits['deleted']]
+        if updates:
+            sheet.batch_update(updates)
+
+        # De baixo para cima, para que cada exclusão não desloque as seguintes
+        deletions = sorted((i for i in still_there if i in edits['deleted']), reverse=True)
+        if deletions:
+            workbook.batch_update({'requests': [
+                {'deleteDimension': {'range': {'sheetId': sheet.id, 'dimension': 'ROWS',
+                                               'startIndex': i + 1, 'endIndex': i + 2}}}
+                for i in deletions]})
+
+        if edits['added']:
+            sheet.append_rows([[cell_value(v) for v in values] for values in edits['added']])
+        return len(updates) + len(deletions) + len(edits['added']), conflicts
+    except Exception as e:
+        st.error(f"Erro ao atualizar planilha: {e}")
+        return None
+
+
+def show_question_editor():
+    """Editor paginado: cada rerun monta e renderiza só a página atual"""
+    sheet_id, sheet_name = st.session_state.sheet_id, st.session_state.questions_tab
+    try:
+        snapshot = get_sheet_cache().get_snapshot(sheet_id, sheet_name)
+    except Exception as e:
+        st.error(f"Erro ao carregar dados: {e}")
+        return
+    frame = snapshot['frame'] if snapshot else pd.DataFrame()
+    if frame.empty:
+        st.info("📋 Nenhuma pergunta para editar.")
+        return
+    columns = list(frame.columns)
+    edits = get_question_edits(sheet_id, sheet_name)
+
+    col1, col2, col3 = st.columns([3, 2, 1])
+    query = col1.text_input("🔎 Buscar", placeholder="Trecho da pergunta, das opções ou da resposta").strip()
+    categories = question_categories(snapshot)
+    category = col2.selectbox("Categoria", ["Todas"] + categories) if categories else "Todas"
+    page_size = col3.selectbox("Por página", QUESTION_PAGE_SIZES)
+    category = None if category == "Todas" else category
+
+    indices = filter_questions(snapshot, query, category)
+    if len(indices) == 0:
+        st.info("Nenhuma pergunta encontrada com esses filtros.")
+    else:
+        total_pages = -(-len(indices) // page_size)
+        filter_key = f"{query}|{category}|{page_size}"
+        page = st.number_input(f"Página (de {total_pages})", min_value=1, max_value=total_pages, value=1,
+                               step=1, key=f"question_page_number_{filter_key}") - 1
+        rows = indices[page * page_size:(page + 1) * page_size]
+        st.caption(f"{len(indices)} de {len(frame)} perguntas · mostrando "
+                   f"{page * page_size + 1}–{page * page_size + len(rows)}")
+
+        revision = st.session_state.get('question_editor_revision', 0)
+        edited_page = st.data_editor(
+            build_question_page(frame, rows, edits), num_rows="fixed", use_container_width=True,
+            column_config={QUESTION_DELETE_COLUMN: st.column_config.CheckboxColumn(QUESTION_DELETE_COLUMN)},
+            key=f"question_editor_{revision}_{filter_key}_{page}"
+        )
+        buffer_page_edits(frame, edited_page, edits)
+
+    with st.expander("➕ Nova Pergunta", expanded=False):
+        with st.form("new_question", clear_on_submit=True):
+            new_values = [st.text_input(column) for column in columns]
+            if st.form_submit_button("Adicionar às alterações"):
+                edits['added'].append(new_values)
+
+    pending = len(edits['changed']) + len(edits['deleted']) + len(edits['added'])
+    if pending:
+        st.info(f"✏️ Alterações pendentes: {len(edits['changed'])} editadas, "
+                f"{len(edits['deleted'])} para excluir, {len(edits['added'])} novas")
+        if edits['added']:
+            st.dataframe(pd.DataFrame(edits['added'], columns=columns), use_container_width=True, hide_index=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("💾 Salvar Alterações", disabled=not pending, use_container_width=True):
+            errors = validate_question_edits(frame, edits)
+            if not errors.empty:
+                st.error("❌ Corrija as linhas abaixo antes de salvar.")
+                st.dataframe(errors, use_container_width=True, hide_index=True)
+            else:
+                with st.spinner("Salvando..."):
+                    result = save_question_edits(sheet_id, sheet_name, columns, edits)
+                if result is not None:
+                    applied, conflicts = result
+                    discard_question_edits()
+                    invalidate_sheet_cache()
+                    st.success(f"✅ {applied} alterações salvas!")
+                    if conflicts:
+                        st.warning(f"⚠️ Linhas alteradas por outra pessoa desde a edição, não sobrescritas: "
+                                   f"{', '.join(map(str, conflicts))}")
+    with col2:
+        if st.button("↩️ Descartar Alterações", disabled=not pending, use_container_width=True):
+            discard_question_edits()
+            st.rerun()
+
+
+def admin_section(label):
+    """Seção do painel que só executa quando aberta.
+
+    O corpo de um st.expander roda a cada rerun mesmo fechado; seções que leem planilhas,
+    o disco ou o cliente do Google ficam atrás de um toggle.
+    """
+    return st.toggle(label, key=f"admin_section_{label}")
+
+
 def show_admin_panel():
     # CONTROLE DE ESTADO DO QUIZ
     st.header("🎮 Controle do Quiz")
@@ -725,7 +3118,7 @@ def show_admin_panel():
                 with st.spinner("Desabilitando quiz..."):
                     if save_quiz_status(False):
                         st.success("Quiz desabilitado com sucesso!")
-                        st.cache_data.clear()  # Limpar cache para atualizar status
+                        invalidate_sheet_cache()  # Revalidar cache para atualizar status
                         time.sleep(1)
                         st.rerun()
                     else:
@@ -735,12 +3128,63 @@ def show_admin_panel():
                 with st.spinner("Habilitando quiz..."):
                     if save_quiz_status(True):
                         st.success("Quiz habilitado com sucesso!")
-                        st.cache_data.clear()  # Limpar cache para atualizar status
+                        invalidate_sheet_cache()  # Revalidar cache para atualizar status
                         time.sleep(1)
                         st.rerun()
                     else:
                         st.error("Erro ao habilitar quiz.")
 
+    # Limites da sala de espera
+    controller = get_admission_controller()
+    with st.expander("🎤 Modo Ao Vivo (apresentador conduz as perguntas)", expanded=False):
+        game = get_live_game()
+        view = game.view()
+        phase_labels = {'off': "Desligado", 'lobby': "Sala aberta", 'question': "Pergunta em andamento",
+                        'reveal': "Resposta revelada", 'finished': "Encerrado"}
+        st.write("Com a sala aberta, quem entrar pela tela inicial vai para o jogo ao vivo: todos respondem "
+                 "a mesma pergunta ao mesmo tempo e o resultado é gravado no Ranking ao encerrar.")
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Situação", phase_labels[view['phase']])
+        col2.metric("Jogadores", view['players'])
+        col3.metric("Pergunta", f"{view['index'] + 1}/{view['total_questions']}" if view['question'] else "-")
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            if st.button("🚪 Abrir Sala", disabled=view['phase'] in ('lobby', 'question', 'reveal')):
+                questions_df = load_data(st.session_state.sheet_id, st.session_state.questions_tab)
+                questions = questions_df.dropna(subset=['pergunta']).to_dict('records') if 'pergunta' in questions_df else []
+                if questions:
+                    game.open(st.session_state.sheet_id, questions)
+                    prefetch_question_images(questions)
+                    st.success(f"✅ Sala aberta com {len(questions)} perguntas.")
+                else:
+                    st.error("Nenhuma pergunta encontrada.")
+        with col2:
+            if st.button("📽️ Abrir Tela do Projetor", disabled=not game.active):
+                st.session_state.screen = 'projector'
+                st.rerun()
+        with col3:
+            if st.button("⏹️ Desligar Modo Ao Vivo", disabled=not game.active):
+                game.close()
+                st.rerun()
+
+    with st.expander("🚦 Sala de Espera (limite de jogadores simultâneos)", expanded=False):
+        status = controller.status()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Jogando", status['playing'])
+        col2.metric("Iniciando", status['starting'])
+        col3.metric("Na fila", status['waiting'])
+
+        col1, col2 = st.columns(2)
+        with col1:
+            max_active = st.number_input("Máximo de jogadores simultâneos", 1, 5000, controller.max_active)
+        with col2:
+            max_starting = st.number_input("Máximo de sessões iniciando ao mesmo tempo", 1, 1000,
+                                           controller.max_starting)
+        if st.button("💾 Aplicar limites"):
+            controller.configure(max_active, max_starting)
+            st.success("✅ Limites atualizados!")
+
     # Instruções para primeira configuração
     st.info("""
     💡 **Primeira vez usando o sistema?**
@@ -751,7 +3195,7 @@ def show_admin_panel():
     """)
 
     # Status detalhado
-    with st.expander("📊 Configuração do Sistema", expanded=False):
+    if admin_section("📊 Configuração do Sistema"):
         try:
             config_df = load_data(st.session_state.sheet_id, "Config")
             if not config_df.empty:
@@ -765,65 +3209,293 @@ def show_admin_panel():
             st.write("👆 Use os botões acima para criar a configuração inicial")
             st.write(f"Detalhes do erro: {str(e)}")
 
+    if admin_section("🖼️ Imagens das Perguntas"):
+        st.write(f"Perguntas com a coluna `{QUESTION_IMAGE_COLUMN}` (URL ou arquivo em `assets/perguntas`) "
+                 f"mostram a foto, preparada uma vez em variantes de {', '.join(map(str, THUMBNAIL_WIDTHS.values()))} px.")
+        thumbnails = get_thumbnail_cache()
+        for column, (label, value) in zip(st.columns(4) + st.columns(3), thumbnails.status().items()):
+            column.metric(label, value)
+        if st.button("🔄 Preparar imagens do banco agora"):
+            questions = load_data(st.session_state.sheet_id, st.session_state.questions_tab).to_dict('records')
+            scheduled = prefetch_question_images(questions)
+            st.success(f"✅ {scheduled} imagens agendadas para preparo em segundo plano.")
+
+    if admin_section("🌐 Conexões com o Google"):
+        transport = getattr(get_gsheets_client(), 'transport', None)
+        if transport is None:
+            st.info("Cliente sem o transporte configurado pelo app.")
+        else:
+            pool_df, token_stats = transport.status()
+            col1, col2, col3 = st.columns(3)
+            for column, (label, value) in zip((col1, col2, col3), token_stats.items()):
+                column.metric(label, value if value is not None else "-")
+            if not pool_df.empty:
+                st.dataframe(pool_df, use_container_width=True, hide_index=True)
+            st.caption(f"Pool de até {HTTP_POOL_SIZE} conexões keep-alive por servidor, timeout de "
+                       f"{HTTP_TIMEOUT[0]}s para conectar e {HTTP_TIMEOUT[1]}s para ler.")
+
+    if admin_section("🗂️ Cache das Planilhas"):
+        cache_df, cache_stats = get_sheet_cache().status()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Downloads completos", cache_stats.get('downloads', 0))
+        col2.metric("Revalidadas sem download", cache_stats.get('revalidated', 0))
+        col3.metric("Consultas de revisão", cache_stats.get('version_checks', 0))
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Sincronizações incrementais", cache_stats.get('tail_syncs', 0))
+        col2.metric("Ressincronizações completas", cache_stats.get('full_resyncs', 0))
+        col3.metric("Servidas da cópia local", cache_stats.get('warm_hits', 0),
+                    help=f"{cache_stats.get('warm_loaded', 0)} abas carregadas de {SNAPSHOT_DIR} na inicialização")
+        if not cache_df.empty:
+            st.dataframe(cache_df, use_container_width=True, hide_index=True)
+
+        shared = get_shared_state()
+        if shared is not None:
+            st.write(f"🔗 Estado compartilhado entre réplicas: `{shared.path}`")
+            col1, col2, col3 = st.columns(3)
+            for column, (label, value) in zip((col1, col2, col3), shared.status().items()):
+                column.metric(label, value)
+            st.caption(f"Snapshots adotados de outras réplicas: {cache_stats.get('shared_hits', 0)} · "
+                       f"leituras adiadas pelo limite: {cache_stats.get('rate_limited', 0)}")
+        elif os.environ.get(SHARED_STATE_ENV_VAR):
+            st.warning(f"⚠️ {SHARED_STATE_ENV_VAR} está definido, mas o estado compartilhado foi recusado "
+                       f"(disco de rede ou arquivo em uso por outra máquina; detalhes no log). "
+                       f"Rodando como réplica única.")
+        else:
+            st.caption(f"Réplica única. Defina {SHARED_STATE_ENV_VAR} para compartilhar o estado entre réplicas "
+                       f"(todas na mesma máquina, com o arquivo num disco local).")
+
+    with st.expander("⏱️ Tempo de Inicialização do Servidor", expanded=False):
+        st.write("Tempos medidos na primeira execução após o último reinício (importações, autorização e renderização).")
+        st.dataframe(get_startup_report().to_dataframe(), use_container_width=True, hide_index=True)
+
+    with st.expander("🔬 Perfilamento das Telas", expanded=False):
+        profiler = get_render_profiler()
+        profiler.enabled = st.toggle("Ativar perfilamento", value=profiler.enabled,
+                                     help=f"Também pode ser ligado com a variável de ambiente {PROFILE_ENV_VAR}=1")
+        summary_df = profiler.summary()
+        if not summary_df.empty:
+            st.dataframe(summary_df, use_container_width=True, hide_index=True)
+        elif profiler.enabled:
+            st.info("Aguardando execuções para medir...")
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            capture_reruns = st.number_input("Execuções a capturar com cProfile", 1, 1000, 50)
+            if st.button("🎯 Capturar", disabled=not profiler.enabled):
+                profiler.request_capture(int(capture_reruns))
+                st.success(f"As próximas {int(capture_reruns)} execuções serão perfiladas.")
+        with col2:
+            show_stacks = st.button("📸 Pilhas das threads agora")
+        with col3:
+            if st.button("🧹 Limpar medições"):
+                profiler.reset()
+
+        if show_stacks:
+            st.code(dump_thread_stacks(), language=None)
+        for elapsed, _, name, captured_at, stats_text in profiler.slowest_dumps():
+            st.markdown(f"**🐢 {name} — {elapsed * 1000:.0f} ms às {captured_at}**")
+            st.code(stats_text, language=None)
+
     st.markdown("---")
 
     # CONTROLE DE PARTICIPAÇÕES
     st.header("👥 Gerenciar Participações")
 
+    checkpoints = get_checkpoint_store().status()
+    st.caption(f"⏸️ Partidas em andamento com progresso salvo: {checkpoints['Partidas salvas']} "
+               f"({checkpoints['Aguardando gravação']} aguardando gravação). "
+               "\"Permitir Nova Tentativa\" também descarta o progresso salvo da pessoa.")
+
     ranking_df = load_data(st.session_state.sheet_id, "Ranking")
     if not ranking_df.empty:
         total_participants = len(ranking_df)
         st.metric("Total de Participantes", total_participants)
+    else:
+        st.info("📊 Nenhum participante ainda.")
 
-        col1, col2 = st.columns(2)
+    # Com o ranking vazio ainda pode haver progresso salvo para descartar
+    col1, col2 = st.columns(2)
 
-        with col1:
-            # Resetar um participante específico
-            st.subheader("🔄 Permitir Nova Tentativa")
-            st.write("Digite o nome exato para permitir que a pessoa jogue novamente:")
-
-            participant_name = st.text_input("Nome do participante:", placeholder="Nome completo...")
-
-            if st.button("🔓 Permitir Nova Tentativa"):
-                if participant_name and check_user_participation(participant_name):
-                    try:
-                        # Remover participante do ranking
-                        updated_df = ranking_df[
-                            ranking_df['nome'].str.lower().str.strip() != participant_name.lower().strip()]
-                        if update_sheet_from_df(st.session_state.sheet_id, "Ranking", updated_df):
-                            st.success(f"✅ {participant_name} pode jogar novamente!")
-                            st.cache_data.clear()
-                        else:
-                            st.error("❌ Erro ao atualizar ranking.")
-                    except Exception as e:
-                        st.error(f"Erro: {e}")
-                elif participant_name:
-                    st.warning("⚠️ Participante não encontrado no ranking.")
+    with col1:
+        # Resetar um participante específico
+        st.subheader("🔄 Permitir Nova Tentativa")
+        st.write("Digite o nome exato para permitir que a pessoa jogue novamente:")
+
+        participant_name = st.text_input("Nome do participante:", placeholder="Nome completo...")
+
+        if st.button("🔓 Permitir Nova Tentativa"):
+            # O progresso salvo sai mesmo sem linha no ranking (partida abandonada no meio)
+            discarded = get_checkpoint_store().delete_name(participant_name) if participant_name else 0
+            if participant_name and check_user_participation(participant_name):
+                try:
+                    # Remover participante do ranking
+                    updated_df = ranking_df[
+                        normalize_names(ranking_df['nome']) != normalize_name(participant_name)]
+                    if update_sheet_from_df(st.session_state.sheet_id, "Ranking", updated_df):
+                        if get_shared_state() is not None:
+                            get_shared_state().remove_participant(participant_name)
+                        st.success(f"✅ {participant_name} pode jogar novamente!")
+                        invalidate_sheet_cache()
+                    else:
+                        st.error("❌ Erro ao atualizar ranking.")
+                except Exception as e:
+                    st.error(f"Erro: {e}")
+            elif discarded:
+                st.success(f"✅ Progresso salvo de {participant_name} descartado. A pessoa pode começar de novo.")
+            elif participant_name:
+                st.warning("⚠️ Participante não encontrado no ranking.")
+            else:
+                st.warning("⚠️ Digite um nome válido.")
+
+    with col2:
+        # Resetar tudo
+        st.subheader("⚠️ Reset Completo")
+        st.write("**ATENÇÃO:** Isso apagará todos os resultados!")
+
+        confirm_reset = st.checkbox("Confirmo que quero resetar TUDO")
+
+        if st.button("💣 RESETAR RANKING COMPLETO", type="secondary", disabled=not confirm_reset):
+            if confirm_reset:
+                empty_df = pd.DataFrame(columns=RANKING_COLUMNS)
+                if update_sheet_from_df(st.session_state.sheet_id, "Ranking", empty_df):
+                    if get_shared_state() is not None:
+                        get_shared_state().clear_participants()
+                    get_checkpoint_store().clear()
+                    st.success("✅ Ranking resetado! Todos podem jogar novamente.")
+                    invalidate_sheet_cache()
                 else:
-                    st.warning("⚠️ Digite um nome válido.")
+                    st.error("❌ Erro ao resetar ranking.")
 
-        with col2:
-            # Resetar tudo
-            st.subheader("⚠️ Reset Completo")
-            st.write("**ATENÇÃO:** Isso apagará todos os resultados!")
-
-            confirm_reset = st.checkbox("Confirmo que quero resetar TUDO")
-
-            if st.button("💣 RESETAR RANKING COMPLETO", type="secondary", disabled=not confirm_reset):
-                if confirm_reset:
-                    empty_df = pd.DataFrame(columns=['nome', 'pontuacao', 'tempo_total'])
-                    if update_sheet_from_df(st.session_state.sheet_id, "Ranking", empty_df):
-                        st.success("✅ Ranking resetado! Todos podem jogar novamente.")
-                        st.cache_data.clear()
-                    else:
-                        st.error("❌ Erro ao resetar ranking.")
+    if not ranking_df.empty:
+        # Placar por setor
+        if admin_section("🏢 Ranking por Setor"):
+            team_board = build_team_board(st.session_state.sheet_id)
+            if not team_board.empty:
+                st.dataframe(team_board, use_container_width=True)
+            else:
+                st.info(f"Cadastre os setores na aba '{SECTORS_TAB}' (colunas setor e colaboradores) "
+                        f"para ativar a competição por setor.")
+
+        # Participantes repetidos
+        if admin_section("🕵️ Possíveis Participantes Duplicados"):
+            st.write("Nomes parecidos (acentos, espaços, 'da/de/dos', grafias próximas) que podem ser a mesma pessoa.")
+            if st.button("🔎 Procurar duplicados"):
+                started = time.time()
+                st.session_state.duplicate_report = find_duplicate_names(ranking_df)
+                st.session_state.duplicate_report_seconds = time.time() - started
+
+            duplicates_df = st.session_state.get('duplicate_report')
+            if duplicates_df is not None:
+                if duplicates_df.empty:
+                    st.success("✅ Nenhum possível duplicado encontrado.")
+                else:
+                    total = duplicates_df.attrs.get('total', len(duplicates_df))
+                    st.caption(f"{total} pares encontrados em {st.session_state.duplicate_report_seconds:.2f}s"
+                               + (f"; listando os {len(duplicates_df)} mais parecidos" if total > len(duplicates_df) else ""))
+                    for pair in duplicates_df.head(50).itertuples():
+                        first, repeat = sorted([pair.linha_a, pair.linha_b])
+                        col_a, col_b, col_action = st.columns([3, 3, 2])
+                        col_a.write(f"**{pair.nome_a}** ({pair.pontuacao_a} pts, linha {pair.linha_a + 2})")
+                        col_b.write(f"**{pair.nome_b}** ({pair.pontuacao_b} pts, linha {pair.linha_b + 2}) "
+                                    f"— {pair.similaridade:.0%}")
+                        if col_action.button("🧹 Manter 1ª participação", key=f"merge_{first}_{repeat}"):
+                            if delete_ranking_row(st.session_state.sheet_id, ranking_df.loc[repeat], repeat):
+                                repeat_name, kept_name = ranking_df.loc[repeat, 'nome'], ranking_df.loc[first, 'nome']
+                                if get_shared_state() is not None and normalize_name(repeat_name) != normalize_name(kept_name):
+                                    get_shared_state().remove_participant(repeat_name)
+                                st.success(f"✅ Participação repetida de {ranking_df.loc[repeat, 'nome']} removida!")
+                                st.session_state.duplicate_report = None
+                                invalidate_sheet_cache()
+                                st.rerun()
 
         # Lista de participantes
-        with st.expander("📋 Lista de Participantes", expanded=False):
+        if admin_section("📋 Lista de Participantes"):
             st.dataframe(ranking_df[['nome', 'pontuacao', 'tempo_total']], use_container_width=True)
 
+        # Certificados
+        with st.expander("🎓 Certificados de Participação", expanded=False):
+            st.write(f"Gera um certificado em PDF para cada um dos {total_participants} participantes do ranking.")
+            if st.button("🖨️ Gerar Certificados"):
+                progress = st.progress(0.0, text="Gerando certificados...")
+                started = time.time()
+                try:
+                    zip_path = generate_certificates_zip(
+                        prepare_ranking(ranking_df),
+                        lambda done, total: progress.progress(done / total, text=f"Certificados: {done}/{total}"))
+                    previous = st.session_state.get('certificates_zip')
+                    if previous and os.path.exists(previous):
+                        os.remove(previous)
+                    st.session_state.certificates_zip = zip_path
+                    st.success(f"✅ {total_participants} certificados gerados em {time.time() - started:.1f}s.")
+                except Exception as e:
+                    st.error(f"Erro ao gerar certificados: {e}")
+            zip_path = st.session_state.get('certificates_zip')
+            if zip_path and os.path.exists(zip_path):
+                # O ZIP só é lido do disco quando o botão é clicado, não a cada rerun
+                st.download_button("📥 Baixar Certificados (ZIP)", lambda: Path(zip_path).read_bytes(),
+                                   "certificados.zip", "application/zip")
+
+    # Arquivamento de edições
+    with st.expander("📦 Arquivar Edição (encerrar evento)", expanded=False):
+        st.write("Move os resultados da aba Ranking para uma aba de arquivo e para o histórico local, "
+                 "deixando a aba ao vivo vazia para a próxima edição.")
+        archive_event = st.text_input("Identificador da edição:", value=EVENT_ID)
+        confirm_archive = st.checkbox("Confirmo que o evento terminou")
+        if st.button("📦 Arquivar Ranking", disabled=not (confirm_archive and archive_event.strip())):
+            with st.spinner("Arquivando..."):
+                moved = archive_ranking(st.session_state.sheet_id, archive_event.strip())
+            if moved is not None:
+                if get_shared_state() is not None:
+                    get_shared_state().clear_participants()
+                st.success(f"✅ {moved} resultados arquivados em 'Ranking_{archive_event.strip()}'.")
+                invalidate_sheet_cache()
+
+    if admin_section("🔎 Histórico de Participações"):
+        history = get_participant_history()
+        history_df = history.summary()
+        if not history_df.empty:
+            st.dataframe(history_df, use_container_width=True, hide_index=True)
+        lookup_name = st.text_input("Nome para consultar:", placeholder="Nome completo...", key="history_lookup")
+        if lookup_name:
+            events = history.lookup(lookup_name)
+            if events:
+                st.info(f"📅 {lookup_name} participou de: {', '.join(events)}")
+            else:
+                st.write("Nenhuma participação em edições arquivadas.")
+
+    st.markdown("---")
+
+    # ANÁLISE POR PERGUNTA
+    st.header("📈 Análise por Pergunta")
+    analytics = get_answer_analytics()
+    summary_df = analytics.summary()
+    if not summary_df.empty:
+        st.write("Perguntas ordenadas da menor para a maior taxa de acerto — os riscos que mais passam despercebidos aparecem primeiro.")
+        st.dataframe(summary_df.drop(columns=['id']), use_container_width=True, hide_index=True)
     else:
-        st.info("📊 Nenhum participante ainda.")
+        st.info("📊 Nenhuma resposta registrada desde o último reinício do servidor.")
+
+    if admin_section("🗄️ Arquivo Histórico de Respostas"):
+        archive = get_answer_archive()
+        st.caption(f"Cada resposta é gravada aqui em lotes (a cada {ARCHIVE_FLUSH_BATCH} respostas, "
+                   f"{ARCHIVE_FLUSH_INTERVAL}s ou no encerramento do servidor); não há cópia na planilha.")
+        if st.button("💾 Gravar buffer no arquivo agora"):
+            st.success(f"✅ {archive.flush()} eventos gravados.")
+        partitions_df = archive.partitions()
+        if not partitions_df.empty:
+            st.dataframe(partitions_df, use_container_width=True, hide_index=True)
+            events = sorted(partitions_df['evento'].unique())
+            export_event = st.selectbox("Edição para exportar:", ["Todas"] + events)
+            if st.button("📦 Exportar respostas"):
+                with st.spinner("Lendo arquivo..."):
+                    st.session_state.archive_export = (
+                        export_event, export_answer_archive(None if export_event == "Todas" else export_event))
+            if st.session_state.get('archive_export'):
+                exported_event, exported_bytes = st.session_state.archive_export
+                st.download_button("📥 Baixar CSV", exported_bytes,
+                                   f"respostas_{exported_event.lower()}.csv", "text/csv")
+        else:
+            st.info("📂 O arquivo ainda não tem respostas gravadas.")
 
     st.markdown("---")
 
@@ -834,50 +3506,78 @@ def show_admin_panel():
         uploaded_file = st.file_uploader("Substituir perguntas com um novo arquivo", type=['csv', 'xlsx'])
         if uploaded_file:
             try:
-                new_questions_df = pd.read_csv(uploaded_file) if uploaded_file.name.endswith('.csv') else pd.read_excel(
-                    uploaded_file)
-                required_cols = {'pergunta', 'opcoes', 'resposta_correta'}
-                if not required_cols.issubset(new_questions_df.columns):
-                    st.error(f"O arquivo precisa ter as colunas: {', '.join(required_cols)}")
+                report = get_upload_report(uploaded_file)
+                if report['missing']:
+                    st.error(f"O arquivo precisa ter as colunas: {', '.join(REQUIRED_QUESTION_COLS)}")
                 else:
-                    st.dataframe(new_questions_df, use_container_width=True)
-                    if st.button("✅ Confirmar e Substituir Tudo"):
-                        with st.spinner("Atualizando..."):
-                            if update_sheet_from_df(st.session_state.sheet_id, st.session_state.questions_tab,
-                                                    new_questions_df):
-                                st.success("✅ Perguntas substituídas com sucesso!")
-                                st.cache_data.clear()
+                    col1, col2, col3 = st.columns(3)
+                    col1.metric("Linhas lidas", report['total'])
+                    col2.metric("Linhas válidas", report['valid'])
+                    col3.metric("Linhas com erro", report['total'] - report['valid'])
+
+                    if not report['errors'].empty:
+                        st.warning("⚠️ Algumas linhas têm problemas e não serão importadas:")
+                        st.dataframe(report['errors'].head(500), use_container_width=True, hide_index=True)
+                        st.download_button(
+                            "📥 Baixar relatório de erros",
+                            report['errors'].to_csv(index=False).encode('utf-8'),
+                            "relatorio_erros.csv",
+                            "text/csv"
+                        )
+
+                    if report['valid'] > 0:
+                        st.write(f"Prévia das primeiras {len(report['preview'])} linhas válidas:")
+                        st.dataframe(report['preview'], use_container_width=True)
+                        if st.button("✅ Confirmar e Substituir Tudo"):
+                            progress = st.progress(0.0, text="Atualizando...")
+
+                            def on_progress(written, total):
+                                progress.progress(written / total, text=f"Enviando perguntas: {written}/{total}")
+
+                            if write_questions_in_batches(st.session_state.sheet_id, st.session_state.questions_tab,
+                                                          uploaded_file, report['columns'], report['valid'],
+                                                          on_progress):
+                                st.success(f"✅ {report['valid']} perguntas importadas com sucesso!")
+                                invalidate_sheet_cache()
                             else:
                                 st.error("❌ Falha ao atualizar.")
+                    else:
+                        st.error("❌ Nenhuma linha válida encontrada no arquivo.")
             except Exception as e:
                 st.error(f"Erro ao processar o arquivo: {e}")
 
     st.subheader("📝 Editar Perguntas")
-    questions_df = load_data(st.session_state.sheet_id, st.session_state.questions_tab)
-    if not questions_df.empty:
-        edited_df = st.data_editor(questions_df, num_rows="dynamic", use_container_width=True)
-        if st.button("💾 Salvar Alterações"):
-            with st.spinner("Salvando..."):
-                if update_sheet_from_df(st.session_state.sheet_id, st.session_state.questions_tab, edited_df):
-                    st.success("✅ Alterações salvas!")
-                    st.cache_data.clear()
-                else:
-                    st.error("❌ Não foi possível salvar.")
-    else:
-        st.info("📋 Nenhuma pergunta para editar.")
+    show_question_editor()
 
 
 def show_qrcode_generator():
     st.header("📱 Gerador de QR Code")
     app_url = st.text_input("Cole a URL do aplicativo aqui:", placeholder="https://seu-app.streamlit.app")
+    col1, col2 = st.columns(2)
+    level_label = col1.selectbox("Correção de erros", list(QR_ERROR_LEVELS), index=3,
+                                 help="Níveis maiores continuam legíveis com o cartaz amassado ou sujo")
+    box_size = col2.slider("Tamanho na tela", min_value=4, max_value=20, value=10)
+    error_level = QR_ERROR_LEVELS[level_label]
     if app_url:
-        qr = qrcode.QRCode(version=1, box_size=10, border=4)
-        qr.add_data(app_url)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
-        buf = BytesIO()
-        img.save(buf, format='PNG')
-        st.image(buf.getvalue(), caption="📱 Escaneie para acessar o quiz!", width=300)
+        st.image(render_qr_png(app_url.strip(), box_size, error_level),
+                 caption="📱 Escaneie para acessar o quiz!", width=300)
+
+    with st.expander("🖨️ Cartazes para impressão (vários QR Codes)", expanded=False):
+        st.write("Um cartaz por linha: uma URL, `rótulo | URL` ou só o código do local "
+                 f"(prédio, turno, sala), que aponta para a URL acima com `?{QR_LOCATION_PARAM}=<código>`.")
+        entries_text = st.text_area("Locais ou URLs", height=150,
+                                    placeholder="Prédio A - Turno 1\nPrédio B - Sala 12\nRefeitório | https://...")
+        per_page = st.selectbox("Cartazes por página (A4)", list(QR_POSTER_LAYOUTS), index=2)
+        entries, invalid = parse_qr_entries(entries_text, app_url)
+        if invalid:
+            st.warning(f"⚠️ Linhas sem URL ignoradas (preencha a URL do aplicativo acima): "
+                       f"{', '.join(map(str, invalid))}")
+        if entries:
+            pages = -(-len(entries) // per_page)
+            with st.spinner("Montando os cartazes..."):
+                pdf_bytes = build_qr_posters_pdf(tuple(entries), per_page, error_level)
+            st.download_button(f"📥 Baixar PDF ({len(entries)} cartazes, {pages} páginas)", pdf_bytes,
+                               "cartazes_qrcode.pdf", "application/pdf")
 
 
 def show_home():
@@ -891,8 +3591,8 @@ def show_home():
     </div>
     """, unsafe_allow_html=True)
 
-    # Verificar se o quiz está disponível
-    quiz_available = check_quiz_availability()
+    # Status já conhecido, sem esperar o Google; start_quiz confere de novo no clique
+    quiz_available = peek_quiz_status() is not False
 
     tab_player, tab_admin = st.tabs(["🎮 Jogar Quiz", "🔑 Administrador"])
 
@@ -929,8 +3629,30 @@ def show_home():
                 key="player_name_input",
                 placeholder="Seu nome aqui..."
             )
+            sectors = load_sectors()
+            if sectors:
+                st.selectbox(
+                    "Seu setor/departamento:",
+                    list(sectors),
+                    index=None,
+                    key="player_sector_input",
+                    placeholder="Selecione seu setor..."
+                )
             st.button("🚀 Iniciar Quiz", on_click=start_quiz)
 
+            # Recarregou a página no meio do quiz: o link ainda traz o código de retomada
+            resume_token = st.query_params.get(RESUME_QUERY_PARAM)
+            checkpoint = get_checkpoint_store().find_token(resume_token.upper()) if resume_token else None
+            if checkpoint is not None:
+                st.info(f"⏸️ {checkpoint['nome']}, seu quiz foi interrompido na pergunta {checkpoint['atual'] + 1}.")
+                st.button("▶️ Continuar de onde parei", on_click=resume_quiz, args=(resume_token,))
+
+            with st.expander("🔁 Continuar um quiz interrompido"):
+                st.text_input("Seu nome completo:", key="resume_name_input")
+                st.text_input("Código de retomada:", key="resume_token_input", max_chars=RESUME_TOKEN_LENGTH)
+                st.button("▶️ Continuar", key="resume_button", on_click=lambda: resume_quiz(
+                    st.session_state.resume_token_input, st.session_state.resume_name_input or None))
+
     with tab_admin:
         st.markdown("""
         <div class="info-section">
@@ -961,20 +3683,71 @@ def show_home():
                 st.error("❌ Credenciais inválidas.")
 
 
+def show_waiting_room():
+    controller = get_admission_controller()
+    if controller.request(get_session_key()):
+        if begin_quiz():
+            st.rerun()
+        st.session_state.screen = 'home'
+        if st.button("⬅️ Voltar"):
+            st.rerun()
+        return
+
+    lazy_import('streamlit_autorefresh').st_autorefresh(interval=WAITING_REFRESH_MS, key="waiting_room")
+    position = controller.position(get_session_key())
+    wait_seconds = controller.estimated_wait(position)
+    wait_text = f"{wait_seconds:.0f} segundos" if wait_seconds < 90 else f"{wait_seconds / 60:.0f} minutos"
+
+    st.markdown(f"""
+    <div class="quiz-header">
+        <h2 class="sipat-title">⏳ SALA DE ESPERA ⏳</h2>
+        <h1>Olá, {st.session_state.player_name}!</h1>
+        <p class="subtitle">Muita gente jogando agora. Você entra automaticamente assim que uma vaga abrir.</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Sua posição na fila", position)
+    with col2:
+        st.metric("Espera estimada", wait_text)
+    st.info("📱 Mantenha esta página aberta — sair da tela faz você perder o lugar na fila.")
+
+    if st.button("🚪 Sair da fila"):
+        controller.release(get_session_key())
+        st.session_state.screen = 'home'
+        st.rerun()
+
+
 def show_quiz():
+    if not get_admission_controller().heartbeat(get_session_key()):
+        # A vaga expirou (celular bloqueado) e o jogo está lotado: o progresso fica na sessão
+        lazy_import('streamlit_autorefresh').st_autorefresh(interval=WAITING_REFRESH_MS, key="quiz_readmission")
+        st.warning("⏳ Sua vaga expirou enquanto a página estava parada e o jogo está lotado. "
+                   "Você continua de onde parou assim que uma vaga abrir.")
+        return
+    if not get_checkpoint_store().touch(st.session_state.resume_token, get_session_key()):
+        st.warning("⚠️ Esta partida continuou em outro aparelho.")
+        get_admission_controller().release(get_session_key())
+        if st.button("⬅️ Voltar para a Tela Inicial"):
+            st.session_state.screen = 'home'
+            st.rerun()
+        return
     q_index = st.session_state.current_question
     question_data = st.session_state.questions[q_index]
     correct_answer = str(question_data.get('resposta_correta', ''))
 
     # Timer logic
     if not st.session_state.answer_submitted and st.session_state.timer > 0:
-        st_autorefresh(interval=1000, key=f"timer_{q_index}")
+        lazy_import('streamlit_autorefresh').st_autorefresh(interval=1000, key=f"timer_{q_index}")
         st.session_state.timer -= 1
     elif st.session_state.timer <= 0 and not st.session_state.answer_submitted:
         st.session_state.total_time += QUESTION_TIMER
         st.session_state.answer_submitted = True
         st.session_state.feedback_message = f"Tempo esgotado! A resposta era: **{correct_answer}**"
         st.session_state.feedback_type = "error"
+        record_answer(question_data, -1, False)
+        save_checkpoint()
 
     # Header do quiz
     col1, col2 = st.columns(2)
@@ -983,6 +3756,8 @@ def show_quiz():
     with col2:
         st.markdown(f"### Pontos: {st.session_state.score}")
 
+    st.caption(f"🔁 Se a página fechar, continue com o código **{st.session_state.resume_token}**")
+
     # Timer
     timer_class = "timer-critical" if st.session_state.timer <= 10 else ""
     st.markdown(f"""
@@ -999,6 +3774,13 @@ def show_quiz():
     </div>
     """, unsafe_allow_html=True)
 
+    # Foto da situação de risco (variante pequena, já pronta em disco)
+    image_source = question_image_sources([question_data])
+    if image_source:
+        image_path = get_thumbnail_cache().variant(image_source[0], 'celular')
+        if image_path:
+            st.image(image_path, use_container_width=True, output_format="JPEG")
+
     # Feedback
     if st.session_state.feedback_message:
         if st.session_state.feedback_type == "success":
@@ -1007,27 +3789,24 @@ def show_quiz():
             st.error(st.session_state.feedback_message)
 
     # Opções de resposta
-    options = str(question_data.get('opcoes', '')).split(';')
-    styles = [
-        {"class": "red", "shape": "🔺"},
-        {"class": "blue", "shape": "♦️"},
-        {"class": "yellow", "shape": "🟡"},
-        {"class": "green", "shape": "🟩"}
-    ]
+    options = parse_options(question_data)
+    styles = ANSWER_STYLES
 
     cols = st.columns(2)
     for i, option in enumerate(options):
         if i < len(styles):
             with cols[i % 2]:
                 style = styles[i]
-                button_label = f"{style['shape']} {option.strip()}"
+                button_label = f"{style['shape']} {option}"
                 st.markdown(f'<div class="answer-btn {style["class"]}">', unsafe_allow_html=True)
                 if st.button(button_label, key=f"q{q_index}_opt{i}", disabled=st.session_state.answer_submitted):
                     time_taken = QUESTION_TIMER - st.session_state.timer
                     st.session_state.total_time += time_taken
                     st.session_state.answer_submitted = True
 
-                    if option.strip().lower() == correct_answer.strip().lower():
+                    is_correct = option.lower() == correct_answer.strip().lower()
+                    record_answer(question_data, i, is_correct)
+                    if is_correct:
                         st.session_state.score += 10
                         st.session_state.feedback_message = f"{random.choice(CORRECT_MESSAGES)}"
                         st.session_state.feedback_type = "success"
@@ -1035,6 +3814,7 @@ def show_quiz():
                     else:
                         st.session_state.feedback_message = f"{random.choice(WRONG_MESSAGES)} A resposta correta era: **{correct_answer}**"
                         st.session_state.feedback_type = "error"
+                    save_checkpoint()
                 st.markdown('</div>', unsafe_allow_html=True)
 
     # Botão próxima pergunta
@@ -1045,6 +3825,142 @@ def show_quiz():
             st.button("Finalizar e Ver Ranking", on_click=next_question)
 
 
+def show_live_player():
+    game = get_live_game()
+    view = game.view()
+    me = game.player(get_session_key())
+    if me is None or view['phase'] == 'off':
+        st.warning("⚠️ O jogo ao vivo foi encerrado pela organização.")
+        if st.button("⬅️ Voltar para a Tela Inicial"):
+            st.session_state.screen = 'home'
+            st.rerun()
+        return
+    if view['phase'] == 'finished':
+        st.session_state.score = me['pontuacao']
+        st.session_state.total_time = me['tempo_total']
+        st.session_state.screen = 'end'
+        st.rerun()
+
+    st.session_state.live_revision = view['revision']
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown(f"### Jogador: {me['nome']}")
+    with col2:
+        st.markdown(f"### Pontos: {me['pontuacao']}")
+    watch_live_game()
+
+    question_data = view['question']
+    if question_data is None:
+        st.markdown("""
+        <div class="info-section">
+            <h3>📺 Olhe para o telão!</h3>
+            <p>O apresentador vai começar em instantes. As perguntas aparecem aqui automaticamente.</p>
+        </div>
+        """, unsafe_allow_html=True)
+        return
+
+    st.markdown(f"""
+    <div class="question-box">
+        <h3>Pergunta {view['index'] + 1} de {view['total_questions']}</h3>
+        <h3>{question_data['pergunta']}</h3>
+    </div>
+    """, unsafe_allow_html=True)
+
+    correct_answer = str(question_data.get('resposta_correta', ''))
+    answered = me['resposta']
+    if view['phase'] == 'reveal':
+        if answered is not None and answered[1]:
+            st.success(f"{random.choice(CORRECT_MESSAGES)} +{LIVE_POINTS} pontos")
+        else:
+            st.error(f"{random.choice(WRONG_MESSAGES)} A resposta correta era: **{correct_answer}**")
+        st.info("⏳ Aguarde a próxima pergunta do apresentador.")
+        return
+    if answered is not None:
+        st.info("✅ Resposta registrada! Aguarde o resultado no telão.")
+        return
+
+    shown_at = game.mark_shown(get_session_key()) or view['started_at']
+    options = parse_options(question_data)
+    cols = st.columns(2)
+    for i, option in enumerate(options[:len(ANSWER_STYLES)]):
+        with cols[i % 2]:
+            style = ANSWER_STYLES[i]
+            st.markdown(f'<div class="answer-btn {style["class"]}">', unsafe_allow_html=True)
+            if st.button(f"{style['shape']} {option}", key=f"live{view['index']}_opt{i}"):
+                is_correct = option.lower() == correct_answer.strip().lower()
+                if game.answer(get_session_key(), i, is_correct) is not None:
+                    st.session_state.question_started_at = shown_at
+                    record_answer(question_data, i, is_correct)
+                st.rerun()
+            st.markdown('</div>', unsafe_allow_html=True)
+
+
+def show_projector():
+    """Tela do telão: pergunta atual, distribuição das respostas e controles do apresentador"""
+    game = get_live_game()
+    view = game.view()
+    st.session_state.live_revision = view['revision']
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        if st.button("⬅️ Painel de Administração"):
+            st.session_state.screen = 'admin'
+            st.rerun()
+    with col2:
+        if view['phase'] in ('lobby', 'reveal') and view['index'] + 1 < view['total_questions']:
+            label = "▶️ Começar" if view['phase'] == 'lobby' else "▶️ Próxima Pergunta"
+            if st.button(label, use_container_width=True):
+                game.next_question()
+                st.rerun()
+        elif view['phase'] == 'question':
+            if st.button("👁️ Revelar Resposta", use_container_width=True):
+                game.reveal()
+                st.rerun()
+    with col3:
+        if view['phase'] == 'reveal' or (view['phase'] == 'lobby' and view['players']):
+            if st.button("🏁 Encerrar e Gravar Resultados", use_container_width=True):
+                with st.spinner("Gravando resultados..."):
+                    saved = save_live_results(game)
+                if saved is None:
+                    st.error("❌ Não foi possível gravar os resultados. Tente novamente.")
+                else:
+                    game.finish()
+                    st.rerun()
+
+    if view['phase'] == 'off':
+        st.info("Nenhum jogo ao vivo aberto. Abra a sala no Painel de Administração.")
+        return
+    if view['phase'] == 'finished':
+        st.markdown("## 🏆 Resultado Final")
+        top = pd.DataFrame(game.results()[:10])
+        if not top.empty:
+            top.index = range(1, len(top) + 1)
+            st.dataframe(top[['nome', 'pontuacao', 'tempo_total']].round({'tempo_total': 1}), use_container_width=True)
+        return
+
+    question_data = view['question']
+    if question_data is None:
+        st.markdown("""
+        <div class="quiz-header">
+            <h1 class="main-title">🏆 De olho no risco 👁️</h1>
+            <p class="subtitle">Entre pelo celular com o QR Code e aguarde o início!</p>
+        </div>
+        """, unsafe_allow_html=True)
+    else:
+        st.markdown(f"""
+        <div class="question-box">
+            <h3>Pergunta {view['index'] + 1} de {view['total_questions']}</h3>
+            <h3>{question_data['pergunta']}</h3>
+        </div>
+        """, unsafe_allow_html=True)
+        image_source = question_image_sources([question_data])
+        if image_source:
+            image_path = get_thumbnail_cache().variant(image_source[0], 'projetor')
+            if image_path:
+                st.image(image_path, use_container_width=True, output_format="JPEG")
+    show_live_distribution()
+
+
 def show_end_screen():
     st.balloons()
 
@@ -1058,46 +3974,44 @@ def show_end_screen():
 
     st.subheader("🏆 Ranking Geral - Top 100")
 
-    # Limpar cache e carregar ranking
-    st.cache_data.clear()
+    # Revalida o Ranking uma vez por sessão (para incluir o próprio resultado) e carrega
+    if not st.session_state.get('end_ranking_invalidated'):
+        invalidate_sheet_cache("Ranking")
+        st.session_state.end_ranking_invalidated = True
     ranking_df = load_data(st.session_state.sheet_id, "Ranking")
 
     if not ranking_df.empty:
-        ranking_df['nome'] = ranking_df['nome'].astype(str)
-        if 'tempo_total' not in ranking_df.columns:
-            ranking_df['tempo_total'] = 999.0
-        ranking_df['pontuacao'] = pd.to_numeric(ranking_df['pontuacao'], errors='coerce').fillna(0)
-        ranking_df['tempo_total'] = pd.to_numeric(ranking_df['tempo_total'], errors='coerce').fillna(999)
-
-        sorted_ranking = ranking_df.sort_values(
-            by=['pontuacao', 'tempo_total'],
-            ascending=[False, True]
-        ).head(100).reset_index(drop=True)
-
-        sorted_ranking['Tempo (s)'] = sorted_ranking['tempo_total'].apply(lambda t: f"{t:.1f}")
-        display_ranking = sorted_ranking[['nome', 'pontuacao', 'Tempo (s)']]
-        display_ranking.columns = ['Nome', 'Pontuação', 'Tempo (s)']
-        display_ranking.index += 1
+        with profile_section('montagem do ranking'):
+            sorted_ranking, display_ranking = build_top_ranking(ranking_df, 100)
 
         st.dataframe(display_ranking, use_container_width=True)
 
+        with profile_section('exportação do ranking'):
+            csv_bytes = sorted_ranking.to_csv(index=False).encode('utf-8')
+            excel_bytes = df_to_excel_bytes(sorted_ranking)
+
         col1, col2 = st.columns(2)
         with col1:
             st.download_button(
                 "📥 Baixar CSV",
-                sorted_ranking.to_csv(index=False).encode('utf-8'),
+                csv_bytes,
                 "ranking.csv",
                 "text/csv"
             )
         with col2:
             st.download_button(
                 "📊 Baixar Excel",
-                df_to_excel_bytes(sorted_ranking),
+                excel_bytes,
                 "ranking.xlsx"
             )
     else:
         st.info("🎯 Você é o primeiro! Ainda não há outras pontuações no ranking.")
 
+    team_board = build_team_board(st.session_state.sheet_id)
+    if not team_board.empty:
+        st.subheader("🏢 Ranking por Setor")
+        st.dataframe(team_board, use_container_width=True)
+
     if st.button("🔄 Jogar Novamente"):
         st.session_state.screen = 'home'
         st.session_state.player_name = ''
@@ -1133,24 +4047,30 @@ def show_admin_screen():
 
 
 def main():
-    inject_custom_styles()
+    startup_report = get_startup_report()
+    with startup_report.phase('injeção de estilos CSS'), profile_section('estilos'):
+        inject_custom_styles()
     st.markdown('<div class="main-container">', unsafe_allow_html=True)
 
     current_screen = st.session_state.get('screen', 'home')
-    if current_screen == 'admin' and not st.session_state.get('is_admin', False):
+    if current_screen in ('admin', 'projector') and not st.session_state.get('is_admin', False):
         st.warning("⚠️ Acesso negado.")
         st.session_state.screen = 'home'
         current_screen = 'home'
 
     screen_functions = {
         'home': show_home,
+        'waiting': show_waiting_room,
         'quiz': show_quiz,
+        'live': show_live_player,
+        'projector': show_projector,
         'end': show_end_screen,
         'admin': show_admin_screen
     }
 
     screen_to_show = screen_functions.get(current_screen, show_home)
-    screen_to_show()
+    get_render_profiler().run_screen(current_screen, screen_to_show)
+    startup_report.record('primeira execução completa do script', time.perf_counter() - _SCRIPT_STARTED, 'total')
 
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -0,0 +1,255 @@
+"""Microbenchmarks dos caminhos de dados do app que crescem com o tamanho do evento.
+
+Uso:
+    python benchmarks.py                      # todos os casos, saída JSON Lines no terminal
+    python benchmarks.py --quick              # só os tamanhos menores
+    python benchmarks.py --output atual.jsonl --compare anterior.jsonl
+
+Cada linha da saída é um objeto JSON com chaves estáveis:
+    caso, tamanho, repeticoes, segundos_min, segundos_mediana, pico_memoria_bytes,
+    python, pandas, schema
+O tempo é medido sem tracemalloc; o pico de memória vem de uma execução separada.
+Com --compare, casos cuja mediana piorou mais que --tolerancia são listados e o
+script termina com código 1. Cada caso também tem um limite absoluto (LIMITES_SEGUNDOS)
+e falha quando a mediana passa dele, mesmo sem arquivo de comparação.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import string
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+import app
+
+SCHEMA_VERSION = 1
+RANKING_SIZES = [1_000, 10_000, 100_000]
+QUESTION_SIZES = [100, 1_000, 10_000]
+FIRST_NAMES = ["José", "Maria", "Ana", "João", "Antônio", "Francisca", "Carlos", "Paulo", "Luíza", "Márcia"]
+LAST_NAMES = ["Silva", "Santos", "Oliveira", "Souza", "Conceição", "Pereira", "Lima", "Gonçalves", "Araújo"]
+DUPLICATE_SIZES = [1_000, 10_000, 30_000]
+# Mediana máxima aceita por caso e tamanho, em segundos: cerca de 3x a linha de base medida
+# (Python 3.11, pandas 3), exceto duplicados_nomes em 30 mil, que tem o orçamento de 1 s
+LIMITES_SEGUNDOS = {
+    ('participacao_busca', 1_000): 0.02, ('participacao_busca', 10_000): 0.1,
+    ('participacao_busca', 100_000): 1.0,
+    ('ranking_preparo_top100', 1_000): 0.02, ('ranking_preparo_top100', 10_000): 0.02,
+    ('ranking_preparo_top100', 100_000): 0.05,
+    ('planilha_payload_ranking', 1_000): 0.005, ('planilha_payload_ranking', 10_000): 0.02,
+    ('planilha_payload_ranking', 100_000): 0.3,
+    ('excel_ranking', 1_000): 0.2, ('excel_ranking', 10_000): 2.0, ('excel_ranking', 100_000): 20.0,
+    ('duplicados_nomes', 1_000): 0.05, ('duplicados_nomes', 10_000): 0.4, ('duplicados_nomes', 30_000): 1.0,
+    ('opcoes_parse', 100): 0.002, ('opcoes_parse', 1_000): 0.01, ('opcoes_parse', 10_000): 0.05,
+    ('planilha_payload_perguntas', 100): 0.002, ('planilha_payload_perguntas', 1_000): 0.005,
+    ('planilha_payload_perguntas', 10_000): 0.02,
+    ('excel_perguntas', 100): 0.05, ('excel_perguntas', 1_000): 0.3, ('excel_perguntas', 10_000): 3.0,
+}
+# Distribuição realista de nomes brasileiros (mais comuns primeiro, pesos ~Zipf)
+PEOPLE_FIRST_NAMES = [
+    "Maria", "José", "Ana", "João", "Antônio", "Francisco", "Carlos", "Paulo", "Pedro", "Lucas",
+    "Luiz", "Marcos", "Luís", "Gabriel", "Rafael", "Francisca", "Daniel", "Marcelo", "Bruno", "Eduardo",
+    "Felipe", "Raimundo", "Rodrigo", "Antônia", "Adriana", "Juliana", "Márcia", "Fernanda", "Patrícia", "Aline",
+    "Sandra", "Camila", "Amanda", "Bruna", "Jéssica", "Letícia", "Júlia", "Luciana", "Vanessa", "Mariana",
+    "Thiago", "Matheus", "Gustavo", "Leonardo", "Vinícius", "Diego", "Sérgio", "Cláudio", "Fábio", "Ricardo",
+]
+PEOPLE_MIDDLE_NAMES = [
+    "Aparecida", "Eduarda", "Luiza", "Helena", "Clara", "Vitória", "Fernanda", "Cristina", "Carolina", "Beatriz",
+    "Henrique", "Augusto", "Eduardo", "Gabriel", "Miguel", "Vinícius", "Felipe", "Antônio", "Carlos", "Roberto",
+]
+PEOPLE_LAST_NAMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+    "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa",
+    "Rocha", "Dias", "Nascimento", "Andrade", "Moreira", "Nunes", "Marques", "Machado", "Mendes", "Freitas",
+    "Cardoso", "Ramos", "Gonçalves", "Santana", "Teixeira", "Araújo", "Conceição", "Pinto", "Moura", "Cavalcanti",
+]
+
+
+def make_ranking(rows, seed=42):
+    rng = random.Random(seed)
+    names = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}" for i in range(rows)]
+    return pd.DataFrame({
+        'nome': names,
+        'pontuacao': [rng.randrange(0, 110, 10) for _ in range(rows)],
+        'tempo_total': [round(rng.uniform(20, 300), 1) for _ in range(rows)]
+    })
+
+
+def _zipf_weights(items):
+    return [1 / rank for rank in range(1, len(items) + 1)]
+
+
+def _misspell(name, rng):
+    """Variações que aparecem quando a mesma pessoa digita o nome de novo"""
+    tokens = name.split()
+    kind = rng.randrange(5)
+    if kind == 0:  # Letra trocada
+        i = rng.randrange(len(tokens))
+        word = tokens[i]
+        if len(word) > 3:
+            j = rng.randrange(1, len(word) - 1)
+            tokens[i] = word[:j] + word[j + 1] + word[j] + word[j + 2:]
+    elif kind == 1:  # Sem acentos e em maiúsculas
+        return app.normalize_name(name).upper()
+    elif kind == 2 and len(tokens) > 2:  # Sem o nome do meio
+        del tokens[1]
+    elif kind == 3:  # Sobrenome primeiro
+        tokens = tokens[-1:] + tokens[:-1]
+    else:  # Grafia alternativa
+        return name.replace('s', 'z', 1).replace('Luís', 'Luiz').replace('Th', 'T')
+    return ' '.join(tokens)
+
+
+def make_people(rows, seed=42, duplicate_rate=0.05):
+    """Ranking com nomes reais (muitos homônimos parciais) e ~5% de repetições com variações"""
+    rng = random.Random(seed)
+    first_weights = _zipf_weights(PEOPLE_FIRST_NAMES)
+    last_weights = _zipf_weights(PEOPLE_LAST_NAMES)
+    names = []
+    for _ in range(rows):
+        if names and rng.random() < duplicate_rate:
+            names.append(_misspell(rng.choice(names), rng))
+            continue
+        tokens = [rng.choices(PEOPLE_FIRST_NAMES, first_weights)[0]]
+        if rng.random() < 0.6:
+            tokens.append(rng.choice(PEOPLE_MIDDLE_NAMES))
+        if rng.random() < 0.3:
+            tokens.append(rng.choice(["da", "de", "dos"]))
+        tokens.extend(rng.choices(PEOPLE_LAST_NAMES, last_weights, k=rng.choice([1, 1, 2])))
+        names.append(' '.join(tokens))
+    return pd.DataFrame({
+        'nome': names,
+        'pontuacao': [rng.randrange(0, 110, 10) for _ in range(rows)],
+        'tempo_total': [round(rng.uniform(20, 300), 1) for _ in range(rows)]
+    })
+
+
+def make_questions(count, seed=42):
+    rng = random.Random(seed)
+
+    def text(size):
+        return ''.join(rng.choice(string.ascii_lowercase + ' ') for _ in range(size)).strip() or 'x'
+
+    questions = []
+    for i in range(count):
+        options = [text(20) for _ in range(4)]
+        questions.append({
+            'pergunta': f"{i} - {text(80)}?",
+            'opcoes': '; '.join(options),
+            'resposta_correta': rng.choice(options)
+        })
+    return questions
+
+
+def build_cases(quick):
+    ranking_sizes = RANKING_SIZES[:1] if quick else RANKING_SIZES
+    question_sizes = QUESTION_SIZES[:1] if quick else QUESTION_SIZES
+
+    for size in ranking_sizes:
+        ranking = make_ranking(size)
+        last_name = ranking['nome'].iloc[-1].upper()
+        yield 'participacao_busca', size, lambda r=ranking, n=last_name: app.is_name_in_ranking(r, n)
+        yield 'ranking_preparo_top100', size, lambda r=ranking: app.build_top_ranking(r, 100)
+        yield 'planilha_payload_ranking', size, lambda r=ranking: app.build_sheet_payload(r)
+        yield 'excel_ranking', size, lambda r=ranking: app.df_to_excel_bytes(r)
+
+    for size in DUPLICATE_SIZES[:1] if quick else DUPLICATE_SIZES:
+        people = make_people(size)
+        yield 'duplicados_nomes', size, lambda p=people: app.find_duplicate_names(p)
+
+    for size in question_sizes:
+        questions = make_questions(size)
+        questions_df = pd.DataFrame(questions)
+        yield 'opcoes_parse', size, lambda q=questions: [app.parse_options(item) for item in q]
+        yield 'planilha_payload_perguntas', size, lambda q=questions_df: app.build_sheet_payload(q)
+        yield 'excel_perguntas', size, lambda q=questions_df: app.df_to_excel_bytes(q)
+
+
+def measure(function, repeat):
+    function()  # Aquecimento (imports sob demanda, caches do pandas)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(timings), statistics.median(timings), peak
+
+
+def compare(results, baseline_path, tolerance):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['caso'], r['tamanho']): r for r in map(json.loads, f) if r.get('schema') == SCHEMA_VERSION}
+
+    regressions = []
+    for result in results:
+        previous = baseline.get((result['caso'], result['tamanho']))
+        if previous and result['segundos_mediana'] > previous['segundos_mediana'] * (1 + tolerance):
+            ratio = result['segundos_mediana'] / previous['segundos_mediana']
+            regressions.append(f"{result['caso']} [{result['tamanho']}]: {ratio:.2f}x mais lento")
+    return regressions
+
+
+def check_limits(results):
+    over = []
+    for result in results:
+        limit = LIMITES_SEGUNDOS.get((result['caso'], result['tamanho']))
+        if limit is not None and result['segundos_mediana'] > limit:
+            over.append(f"{result['caso']} [{result['tamanho']}]: {result['segundos_mediana']:.3f}s "
+                        f"(limite {limit:.3f}s)")
+    return over
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quick', action='store_true', help='roda só o menor tamanho de cada caso')
+    parser.add_argument('--repeat', type=int, default=5, help='repetições cronometradas por caso')
+    parser.add_argument('--output', help='arquivo JSON Lines de saída (padrão: terminal)')
+    parser.add_argument('--compare', help='resultado anterior para detectar regressões')
+    parser.add_argument('--tolerancia', type=float, default=0.2, help='piora relativa aceita (padrão: 0.2)')
+    args = parser.parse_args(argv)
+
+    environment = {'python': platform.python_version(), 'pandas': pd.__version__, 'schema': SCHEMA_VERSION}
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    results = []
+    try:
+        for case, size, function in build_cases(args.quick):
+            fastest, median, peak = measure(function, args.repeat)
+            result = {
+                'caso': case,
+                'tamanho': size,
+                'repeticoes': args.repeat,
+                'segundos_min': round(fastest, 6),
+                'segundos_mediana': round(median, 6),
+                'pico_memoria_bytes': peak,
+                **environment
+            }
+            results.append(result)
+            output.write(json.dumps(result, sort_keys=True) + '\n')
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    over_limit = check_limits(results)
+    for line in over_limit:
+        print(f"ACIMA DO LIMITE: {line}", file=sys.stderr)
+    regressions = []
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerancia)
+        for line in regressions:
+            print(f"REGRESSÃO: {line}", file=sys.stderr)
+    return 1 if regressions or over_limit else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
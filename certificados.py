@@ -0,0 +1,135 @@
+"""Geração de certificados de participação em PDF.
+
+Fica num módulo separado do app.py para que as funções possam ser executadas
+por um pool de processos: cada processo prepara a fonte e a imagem de fundo
+uma única vez (init_worker) e depois só renderiza os certificados.
+"""
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+
+from fpdf import FPDF
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+BACKGROUND_PATH = os.path.join(ASSETS_DIR, "certificado_fundo.png")
+FONT_PATH = os.path.join(ASSETS_DIR, "certificado_fonte.ttf")
+PAGE_WIDTH, PAGE_HEIGHT = 297, 210  # A4 paisagem, em mm
+BACKGROUND_PIXELS = (3508, 2480)  # A4 paisagem a 300 dpi
+FONT_FAMILY = 'Certificado'
+# Latim básico, Latin-1 e Latin Extended-A/B + pontuação geral: cobre nomes em português
+FONT_UNICODES = list(range(0x20, 0x250)) + list(range(0x2010, 0x2070))
+
+_worker = {}
+
+
+def init_worker(event_title, event_date):
+    """Inicializa o processo: textos fixos, imagem de fundo já redimensionada e fonte"""
+    _worker['title'] = event_title
+    _worker['date'] = event_date
+    _worker['background'] = None
+    _worker['font'] = None
+
+    if os.path.exists(BACKGROUND_PATH):
+        from PIL import Image
+        with Image.open(BACKGROUND_PATH) as img:
+            img = img.convert('RGB')
+            img.thumbnail(BACKGROUND_PIXELS)
+            buf = BytesIO()
+            # JPEG é embutido no PDF sem recodificação, então a imagem é preparada só aqui
+            img.save(buf, format='JPEG', quality=85, optimize=True)
+            _worker['background'] = buf.getvalue()
+
+    if os.path.exists(FONT_PATH):
+        _worker['font'] = subset_font(FONT_PATH)
+
+
+def subset_font(path, directory=None):
+    """Arquivo da fonte reduzida aos caracteres latinos, em cache no disco.
+
+    O nome leva o hash da fonte original, então os processos do pool (e as próximas
+    gerações) reaproveitam o mesmo arquivo; cada PDF o registra com FPDF.add_font, e
+    o parse de uma fonte só com caracteres latinos é rápido.
+    """
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:16]
+    subset_path = os.path.join(directory or tempfile.gettempdir(), f"certificado_fonte-{digest}.ttf")
+    if os.path.exists(subset_path):
+        return subset_path
+
+    from fontTools import subset, ttLib
+    ttfont = ttLib.TTFont(path, recalcTimestamp=False)
+    subsetter = subset.Subsetter(subset.Options(notdef_outline=True, recommended_glyphs=True))
+    subsetter.populate(unicodes=FONT_UNICODES)
+    subsetter.subset(ttfont)
+    # Nome temporário por processo: os outros processos nunca leem um arquivo pela metade
+    tmp_path = f"{subset_path}.{os.getpid()}.tmp"
+    try:
+        ttfont.save(tmp_path)
+        os.replace(tmp_path, subset_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return subset_path
+
+
+def _text(value):
+    # As fontes padrão do PDF só cobrem latin-1 (suficiente para nomes em português)
+    if _worker['font']:
+        return str(value)
+    return str(value).encode('latin-1', 'replace').decode('latin-1')
+
+
+def render_certificate(entry):
+    """Gera o PDF de um participante. entry = (posição, nome, pontuação, tempo_total)"""
+    position, name, score, total_time = entry
+
+    pdf = FPDF(orientation='L', unit='mm', format='A4')
+    pdf.set_auto_page_break(False)
+    pdf.add_page()
+    if _worker['font']:
+        pdf.add_font(FONT_FAMILY, fname=_worker['font'])
+        family = FONT_FAMILY
+    else:
+        family = 'Helvetica'
+
+    if _worker['background']:
+        pdf.image(BytesIO(_worker['background']), x=0, y=0, w=PAGE_WIDTH, h=PAGE_HEIGHT)
+    else:
+        pdf.set_draw_color(4, 120, 87)
+        pdf.set_line_width(3)
+        pdf.rect(10, 10, PAGE_WIDTH - 20, PAGE_HEIGHT - 20)
+
+    pdf.set_text_color(6, 78, 59)
+    pdf.set_font(family, size=16)
+    pdf.set_xy(20, 35)
+    pdf.cell(PAGE_WIDTH - 40, 10, _text(_worker['title']), align='C')
+
+    pdf.set_font(family, size=32)
+    pdf.set_xy(20, 55)
+    pdf.cell(PAGE_WIDTH - 40, 16, _text("CERTIFICADO DE PARTICIPAÇÃO"), align='C')
+
+    pdf.set_font(family, size=14)
+    pdf.set_xy(20, 85)
+    pdf.cell(PAGE_WIDTH - 40, 10, _text("Certificamos que"), align='C')
+
+    pdf.set_font(family, size=28)
+    pdf.set_xy(20, 100)
+    pdf.cell(PAGE_WIDTH - 40, 16, _text(name), align='C')
+
+    pdf.set_font(family, size=14)
+    pdf.set_xy(30, 125)
+    pdf.multi_cell(PAGE_WIDTH - 60, 8, _text(
+        f"participou do quiz \"De olho no risco\", obtendo {score} pontos "
+        f"em {total_time:.1f} segundos ({position}º lugar no ranking geral)."), align='C')
+
+    pdf.set_font(family, size=12)
+    pdf.set_xy(20, PAGE_HEIGHT - 35)
+    pdf.cell(PAGE_WIDTH - 40, 8, _text(_worker['date']), align='C')
+
+    return certificate_filename(position, name), bytes(pdf.output())
+
+
+def certificate_filename(position, name):
+    safe_name = ''.join(c if c.isalnum() else '_' for c in str(name)).strip('_') or 'participante'
+    return f"{position:04d}_{safe_name}.pdf"
@@ -0,0 +1,72 @@
+"""Índice compacto dos participantes de edições arquivadas do Ranking.
+
+Sem Streamlit: o app guarda uma instância por processo (get_participant_history) e a
+atualiza ao arquivar uma edição.
+"""
+import collections
+import json
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from nomes import normalize_name, normalize_names
+
+
+
+
+class ParticipantHistory:
+    """Índice compacto dos participantes de edições arquivadas: nome normalizado -> edições.
+
+    Fica em disco como JSON ({"eventos": [...], "nomes": {nome: [índices de eventos]}}),
+    para que consultas históricas não precisem ler a aba Ranking nem as abas de arquivo.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.events = []
+        self.names = {}
+        if self.path.exists():
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            self.events, self.names = data['eventos'], data['nomes']
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'eventos': self.events, 'nomes': self.names}, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def add_event(self, event_id, names):
+        with self.lock:
+            if event_id not in self.events:
+                self.events.append(event_id)
+            event_index = self.events.index(event_id)
+            for name in normalize_names(pd.Series(names)).unique():
+                if not name:
+                    continue
+                indexes = self.names.setdefault(name, [])
+                if event_index not in indexes:
+                    indexes.append(event_index)
+            self._save()
+
+    def lookup(self, name):
+        """Edições arquivadas em que o nome participou"""
+        with self.lock:
+            return [self.events[i] for i in self.names.get(normalize_name(name), [])]
+
+    def participated(self, name, event_id):
+        """Se o nome está arquivado na edição, sem percorrer as outras"""
+        with self.lock:
+            if event_id not in self.events:
+                return False
+            return self.events.index(event_id) in self.names.get(normalize_name(name), ())
+
+    def summary(self):
+        with self.lock:
+            counts = collections.Counter(i for indexes in self.names.values() for i in indexes)
+            return pd.DataFrame([{'Edição': event, 'Participantes': counts.get(i, 0)}
+                                 for i, event in enumerate(self.events)])
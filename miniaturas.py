@@ -0,0 +1,229 @@
+"""Variantes redimensionadas das fotos das perguntas, preparadas em segundo plano e guardadas em disco.
+
+Sem Streamlit: o app guarda um cache por processo (get_thumbnail_cache) e só exibe o
+caminho devolvido por ThumbnailCache.variant().
+"""
+import collections
+import hashlib
+import importlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+logger = logging.getLogger("deolho_no_risco")
+
+QUESTION_IMAGES_DIR = Path(__file__).resolve().parent / "assets" / "perguntas"
+# Largura máxima de cada variante, em pixels. O st.image redimensiona (e recodifica) a cada
+# renderização qualquer imagem acima de 1460 px, então nenhuma variante passa disso
+THUMBNAIL_WIDTHS = {'celular': 640, 'projetor': 1440}
+THUMBNAIL_QUALITY = 70
+THUMBNAIL_SOURCE_MAX_BYTES = 20 * 1024 * 1024
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_DOWNLOAD_TIMEOUT = 10  # Tempo máximo do download de uma imagem de origem
+THUMBNAIL_RETRY_SECONDS = 300  # Fontes que falharam só são tentadas de novo depois disso
+
+
+def _image_source_url(source):
+    """Links de compartilhamento do Google Drive viram links de download direto"""
+    match = re.match(r'https?://drive\.google\.com/(?:file/d/|open\?id=)([\w-]+)', source)
+    if match:
+        return f"https://drive.google.com/uc?export=download&id={match.group(1)}"
+    return source
+
+
+def _local_image_path(source):
+    path = (QUESTION_IMAGES_DIR / source).resolve()
+    if QUESTION_IMAGES_DIR.resolve() not in path.parents:
+        raise ValueError(f"Caminho fora de {QUESTION_IMAGES_DIR}: {source}")
+    return path
+
+
+class ThumbnailCache:
+    """Variantes redimensionadas das imagens das perguntas, guardadas em disco.
+
+    Cada imagem é baixada e recodificada uma única vez, em JPEG, em uma variante por
+    largura de THUMBNAIL_WIDTHS. JPEG dentro do limite de largura do st.image é servido
+    com os bytes do arquivo, sem recodificação a cada renderização (WebP seria convertido
+    para JPEG toda vez). Os arquivos são nomeados pelo hash do conteúdo, então a mesma
+    foto usada em várias perguntas ocupa espaço uma vez só; acima do limite de bytes, as
+    menos usadas são apagadas.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix='miniaturas')
+        self.pending = {}  # fonte -> Future do preparo
+        self.failed = {}  # fonte -> momento da última falha
+        self.stats = collections.Counter()
+
+        # Variantes WebP de versões anteriores são recodificadas pelo st.image a cada uso
+        for stale in self.directory.glob('*-*.webp'):
+            stale.unlink(missing_ok=True)
+
+        # Do menos para o mais recentemente usado (mtime é atualizado a cada uso)
+        self.files = collections.OrderedDict()
+        variants = [p for p in self.directory.glob('*-*.jpg') if not p.name.startswith('.')]
+        for path in sorted(variants, key=lambda p: p.stat().st_mtime):
+            self.files[path.name] = path.stat().st_size
+        self.total_bytes = sum(self.files.values())
+
+        self.sources_path = self.directory / 'fontes.json'
+        self.sources = {}  # fonte -> hash do conteúdo
+        if self.sources_path.exists():
+            try:
+                with open(self.sources_path, encoding='utf-8') as f:
+                    self.sources = json.load(f)
+            except (OSError, ValueError):
+                self.sources = {}
+
+    def _variant_name(self, digest, width):
+        return f"{digest}-{width}.jpg"
+
+    def _write_atomic(self, path, data):
+        # Nome temporário único: vários processos podem preparar a mesma imagem ao mesmo tempo
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def _ready(self, source):
+        digest = self.sources.get(source)
+        return digest is not None and all(self._variant_name(digest, w) in self.files
+                                          for w in THUMBNAIL_WIDTHS.values())
+
+    def _read_source(self, source):
+        if re.match(r'https?://', source):
+            with urllib.request.urlopen(_image_source_url(source), timeout=THUMBNAIL_DOWNLOAD_TIMEOUT) as response:
+                data = response.read(THUMBNAIL_SOURCE_MAX_BYTES + 1)
+        else:
+            data = _local_image_path(source).read_bytes()
+        if len(data) > THUMBNAIL_SOURCE_MAX_BYTES:
+            raise ValueError(f"Imagem maior que {THUMBNAIL_SOURCE_MAX_BYTES // (1024 * 1024)} MB: {source}")
+        return data
+
+    def _encode(self, image, width):
+        Image = importlib.import_module('PIL.Image')
+        if image.width > width:
+            image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+        buf = BytesIO()
+        image.save(buf, format='JPEG', quality=THUMBNAIL_QUALITY, optimize=True, progressive=True)
+        return buf.getvalue()
+
+    def _prepare(self, source):
+        data = self._read_source(source)
+        digest = hashlib.sha256(data).hexdigest()[:24]
+        missing = [w for w in THUMBNAIL_WIDTHS.values() if self._variant_name(digest, w) not in self.files]
+        if missing:
+            Image = importlib.import_module('PIL.Image')
+            ImageOps = importlib.import_module('PIL.ImageOps')
+            with Image.open(BytesIO(data)) as original:
+                image = ImageOps.exif_transpose(original).convert('RGB')
+            for width in missing:
+                name = self._variant_name(digest, width)
+                encoded = self._encode(image, width)
+                self._write_atomic(self.directory / name, encoded)
+                self._track(name, len(encoded))
+            self.stats['encoded'] += 1
+
+        with self.lock:
+            self.sources[source] = digest
+            sources = dict(self.sources)
+        self._write_atomic(self.sources_path, json.dumps(sources).encode('utf-8'))
+        return digest
+
+    def _track(self, name, size):
+        """Registra uma variante nova e apaga as menos usadas se o limite foi ultrapassado"""
+        with self.lock:
+            self.total_bytes += size - self.files.pop(name, 0)
+            self.files[name] = size
+            while self.total_bytes > self.max_bytes and len(self.files) > 1:
+                oldest, oldest_size = self.files.popitem(last=False)
+                self.total_bytes -= oldest_size
+                self.stats['evicted'] += 1
+                try:
+                    (self.directory / oldest).unlink()
+                except FileNotFoundError:
+                    pass
+
+    def _submit(self, source):
+        with self.lock:
+            future = self.pending.get(source)
+            if future is not None:
+                return future
+            future = self.pending[source] = self.executor.submit(self._prepare, source)
+        # Fora do lock: se o preparo já terminou, o callback roda aqui mesmo e precisa do lock
+        future.add_done_callback(lambda f, s=source: self._finished(s, f))
+        return future
+
+    def _finished(self, source, future):
+        with self.lock:
+            self.pending.pop(source, None)
+            if future.exception() is not None:
+                self.failed[source] = time.time()
+                self.stats['failed'] += 1
+                logger.warning("Não foi possível preparar a imagem %s: %s", source, future.exception())
+            else:
+                self.failed.pop(source, None)
+
+    def _should_try(self, source):
+        failed_at = self.failed.get(source)
+        return failed_at is None or time.time() - failed_at > THUMBNAIL_RETRY_SECONDS
+
+    def prefetch(self, sources):
+        """Agenda em segundo plano o preparo das imagens que ainda não estão no cache"""
+        scheduled = 0
+        for source in dict.fromkeys(sources):
+            if not self._ready(source) and source not in self.pending and self._should_try(source):
+                self._submit(source)
+                scheduled += 1
+        return scheduled
+
+    def variant(self, source, size='celular'):
+        """Caminho da variante pronta (servida como está, sem recodificar).
+
+        Enquanto a variante não fica pronta, agenda o preparo e devolve None: a pergunta
+        aparece só com o texto, sem baixar a original inteira no celular nem recodificá-la
+        a cada renderização. Fontes que falharam recentemente também devolvem None.
+        """
+        if not self._ready(source):
+            if self._should_try(source):
+                self._submit(source)
+                self.stats['waiting'] += 1
+            return None
+
+        name = self._variant_name(self.sources[source], THUMBNAIL_WIDTHS[size])
+        path = self.directory / name
+        with self.lock:
+            if name not in self.files:
+                return None
+            self.files.move_to_end(name)
+        self.stats['served'] += 1
+        try:
+            os.utime(path)  # Mantém a ordem de uso depois de um reinício
+        except FileNotFoundError:
+            return None
+        return str(path)
+
+    def status(self):
+        return {
+            'Imagens preparadas': len(self.sources),
+            'Variantes em disco': len(self.files),
+            'Espaço usado (MB)': round(self.total_bytes / (1024 * 1024), 1),
+            'Na fila': len(self.pending),
+            'Com falha': len(self.failed),
+            'Removidas (LRU)': self.stats['evicted'],
+            'Exibidas sem imagem (preparando)': self.stats['waiting']
+        }
@@ -0,0 +1,179 @@
+"""Normalização de nomes e detecção de participantes repetidos no Ranking.
+
+Funções puras sobre pandas, sem Streamlit, usadas pelo app (controle de participação e
+relatório de duplicados no painel admin), pelos benchmarks e pelos testes.
+"""
+import difflib
+import functools
+import heapq
+import re
+import unicodedata
+
+import pandas as pd
+
+# Detecção de nomes duplicados
+NAME_PARTICLES = {'da', 'de', 'do', 'das', 'dos', 'e'}
+DUPLICATE_MIN_SIMILARITY = 0.85
+DUPLICATE_MIN_TOKEN_SIMILARITY = 0.6  # Quando só um token difere, ele precisa parecer um erro de digitação
+DUPLICATE_WINDOW = 25  # Em cada bloco, cada nome é comparado só com os vizinhos em ordem alfabética
+DUPLICATE_MAX_PAIRS = 500  # O relatório lista só os pares mais parecidos (e informa o total)
+_PHONETIC_RULES = [(re.compile(pattern), replacement) for pattern, replacement in [
+    (r'ph', 'f'), (r'[cs]h', 'x'), (r'lh', 'l'), (r'nh', 'n'), (r'h', ''),
+    (r'c(?=[ei])', 's'), (r'z', 's'), (r'[qk]', 'c'), (r'w', 'v'), (r'y', 'i'),
+    (r'(.)\1+', r'\1')
+]]
+
+
+def normalize_name(name):
+    """Minúsculas, sem acentos e com espaços simples: 'JOSÉ  Silva' -> 'jose silva'"""
+    folded = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(folded.lower().split())
+
+
+def normalize_names(names):
+    """Versão vetorizada de normalize_name para uma Series"""
+    return (names.astype(str).str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+            .str.lower().str.split().str.join(' '))
+
+
+@functools.lru_cache(maxsize=65536)
+def phonetic_key(token):
+    """Chave fonética simplificada para o português: 'sylva', 'silva' -> 'slv'"""
+    if token.isdigit():
+        return token
+    for pattern, replacement in _PHONETIC_RULES:
+        token = pattern.sub(replacement, token)
+    return token[:1] + re.sub('[aeiou]', '', token[1:])
+
+
+def _name_blocking_keys(tokens):
+    """Chaves seletivas: só nomes que podem ser a mesma pessoa caem no mesmo bloco"""
+    if not tokens:
+        return ()
+    # Chaves em texto (não tuplas): dezenas de milhares delas não pesam no coletor de lixo
+    return ['f ' + ' '.join(sorted(map(phonetic_key, tokens))),  # Grafias e ordem diferentes
+            'l ' + ' '.join(sorted(map(_sorted_letters, tokens))),  # Letras trocadas de lugar
+            'c ' + ''.join(tokens)]  # Espaços a mais ou a menos
+
+
+@functools.lru_cache(maxsize=65536)
+def _sorted_letters(token):
+    return ''.join(sorted(token))
+
+
+def _without_middle_name(tokens):
+    """O nome sem cada um dos tokens do meio: 'maria helena silva' -> 'maria silva'"""
+    return [tokens[:i] + tokens[i + 1:] for i in range(1, len(tokens) - 1)]
+
+
+def _ratio_at_least(a, b, min_similarity):
+    """difflib só roda quando os limites baratos (tamanho e letras em comum) permitem"""
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    if matcher.real_quick_ratio() < min_similarity or matcher.quick_ratio() < min_similarity:
+        return 0.0
+    return matcher.ratio()
+
+
+@functools.lru_cache(maxsize=65536)
+def _token_similarity(a, b):
+    return difflib.SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+def _name_similarity(tokens_a, tokens_b, min_similarity=0.0):
+    if tokens_a == tokens_b:
+        return 1.0
+    set_a, set_b = set(tokens_a), set(tokens_b)
+    only_a, only_b = set_a - set_b, set_b - set_a
+    if len(only_a) == 1 and len(only_b) == 1:
+        # Filtro barato: com um único token diferente, ele precisa soar igual ou parecer
+        # erro de digitação. Números diferentes (matrícula, "João 2") distinguem pessoas
+        (token_a,), (token_b,) = only_a, only_b
+        if phonetic_key(token_a) != phonetic_key(token_b) and (
+                token_a.isdigit() or token_b.isdigit()
+                or _token_similarity(*sorted((token_a, token_b))) < DUPLICATE_MIN_TOKEN_SIMILARITY):
+            return 0.0
+    if not only_a and not only_b and sorted(tokens_a) == sorted(tokens_b):
+        return 1.0  # Mesmos nomes em outra ordem
+    best = 0.9 if (not only_a or not only_b) and len(set_a & set_b) >= 2 else 0.0
+    if len(tokens_a) == len(tokens_b) and tuple(map(phonetic_key, tokens_a)) == tuple(map(phonetic_key, tokens_b)):
+        best = 0.9
+    # Nome contido no outro ou mesma pronúncia já bastam; difflib fica para os casos incertos.
+    # Erros de digitação e inversões mantêm todos os tokens menos um
+    if best >= min_similarity or len(only_a) > 1 or len(only_b) > 1:
+        return best
+    threshold = max(min_similarity, best)
+    joined = _ratio_at_least(' '.join(tokens_a), ' '.join(tokens_b), threshold)
+    sorted_a, sorted_b = sorted(tokens_a), sorted(tokens_b)
+    if sorted_a == sorted_b:
+        reordered = 1.0
+    elif sorted_a != list(tokens_a) or sorted_b != list(tokens_b):
+        reordered = _ratio_at_least(' '.join(sorted_a), ' '.join(sorted_b), max(threshold, joined))
+    else:
+        reordered = 0.0
+    return max(joined, reordered, best)
+
+
+def find_duplicate_names(ranking_df, min_similarity=DUPLICATE_MIN_SIMILARITY, max_pairs=DUPLICATE_MAX_PAIRS):
+    """Pares prováveis de participantes repetidos no ranking.
+
+    Compara apenas nomes distintos que compartilham uma chave de blocagem (fonética,
+    letras de cada token ou sem espaços), e dentro de cada bloco só os
+    DUPLICATE_WINDOW vizinhos em ordem alfabética; um nome com nome do meio é
+    comparado direto com o mesmo nome sem ele. Nomes idênticos após a normalização
+    são pareados com a primeira ocorrência. Retorna os max_pairs pares mais
+    parecidos; o total encontrado fica em attrs['total'].
+    """
+    if ranking_df.empty or 'nome' not in ranking_df.columns:
+        return pd.DataFrame()
+
+    normalized = normalize_names(ranking_df['nome'])
+    first_row = {}  # tokens -> primeira linha com esse nome
+    tokens_by_name = {}
+    scored = {}
+    for row_index, name in zip(ranking_df.index, normalized.values):
+        tokens = tokens_by_name.get(name)
+        if tokens is None:
+            tokens = tuple(t for t in name.split() if t not in NAME_PARTICLES) or tuple(name.split())
+            tokens_by_name[name] = tokens
+        first = first_row.setdefault(tokens, row_index)
+        if first != row_index:
+            scored[(first, row_index)] = 1.0
+
+    # Nomes distintos em ordem alfabética: os blocos já saem ordenados e os pares viram inteiros.
+    # Só chaves com dois ou mais nomes ganham uma lista (a maioria fica só em first_in_block)
+    uniques = sorted(first_row)
+    position_of = {tokens: position for position, tokens in enumerate(uniques)}
+    first_in_block, blocks = {}, {}
+    candidates = set()
+    for position, tokens in enumerate(uniques):
+        for key in _name_blocking_keys(tokens):
+            first = first_in_block.setdefault(key, position)
+            if first != position:
+                blocks.setdefault(key, [first]).append(position)
+        for shorter in _without_middle_name(tokens):
+            other = position_of.get(shorter)
+            if other is not None:
+                candidates.add((min(position, other), max(position, other)))
+    for members in blocks.values():
+        for i, a in enumerate(members):
+            candidates.update((a, b) for b in members[i + 1:i + 1 + DUPLICATE_WINDOW])
+
+    for a, b in candidates:
+        similarity = _name_similarity(uniques[a], uniques[b], min_similarity)
+        if similarity >= min_similarity:
+            row_a, row_b = sorted((first_row[uniques[a]], first_row[uniques[b]]))
+            scored[(row_a, row_b)] = similarity
+
+    if not scored:
+        return pd.DataFrame()
+    top = heapq.nsmallest(max_pairs, scored.items(), key=lambda item: (-item[1], item[0]))
+    listed = ranking_df.loc[sorted({row for pair, _ in top for row in pair})]
+    names = listed['nome'].to_dict()
+    scores = listed['pontuacao'].to_dict() if 'pontuacao' in listed.columns else {}
+    report = pd.DataFrame([{
+        'linha_a': a, 'nome_a': names[a], 'pontuacao_a': scores.get(a, ''),
+        'linha_b': b, 'nome_b': names[b], 'pontuacao_b': scores.get(b, ''),
+        'similaridade': round(similarity, 3)
+    } for (a, b), similarity in top])
+    report.attrs['total'] = len(scored)
+    return report
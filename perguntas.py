@@ -0,0 +1,125 @@
+"""Regras do banco de perguntas: opções, identificador e validação.
+
+Funções puras sobre pandas, sem Streamlit: a importação em blocos e o editor paginado do
+app usam as mesmas regras, e os testes as exercitam sem servidor.
+"""
+import hashlib
+
+import pandas as pd
+
+# Colunas obrigatórias e limites de opções (importação e editor)
+REQUIRED_QUESTION_COLS = ['pergunta', 'opcoes', 'resposta_correta']
+MIN_OPTIONS = 2
+MAX_OPTIONS = 4
+
+
+def parse_options(question_data):
+    """Opções de resposta da pergunta, separadas por ';' (trechos vazios não viram opção)"""
+    options = (option.strip() for option in str(question_data.get('opcoes', '')).split(';'))
+    return [option for option in options if option]
+
+
+def question_id(question_data):
+    """Identificador estável da pergunta: coluna 'id' se existir, senão hash do texto"""
+    explicit_id = str(question_data.get('id', '') or '').strip()
+    if explicit_id:
+        return explicit_id
+    text = ' '.join(str(question_data.get('pergunta', '')).lower().split())
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:10]
+
+
+def question_keys(questions):
+    """Texto da pergunta normalizado (minúsculas, espaços simples), usado para achar duplicadas"""
+    return questions.astype(str).str.strip().str.lower().str.split().str.join(' ')
+
+
+def validate_questions_chunk(chunk, seen_questions, labels=None):
+    """Valida um bloco de perguntas de forma vetorizada.
+
+    O índice do bloco é a posição (inteira, crescente) de cada linha; `labels` é o nome da
+    linha no relatório (por padrão, a própria posição). Retorna as linhas válidas e o
+    relatório de erros (linha, coluna, erro) do bloco. `seen_questions` mapeia pergunta
+    normalizada -> nome da primeira linha (texto) e é atualizado aqui.
+    """
+    cells = pd.DataFrame({col: chunk[col].astype(str).str.strip() for col in REQUIRED_QUESTION_COLS})
+    lines = pd.Series(chunk.index, index=chunk.index)
+    labels = lines if labels is None else pd.Series(list(labels), index=chunk.index)
+    invalid = pd.Series(False, index=chunk.index)
+    reports = []
+
+    def report(mask, column, message):
+        nonlocal invalid
+        if mask.any():
+            reports.append(pd.DataFrame({
+                'linha': labels[mask],
+                'coluna': column,
+                'erro': message[mask] if isinstance(message, pd.Series) else message
+            }))
+            invalid |= mask
+
+    # Células obrigatórias vazias
+    empty = cells.eq('')
+    for col in REQUIRED_QUESTION_COLS:
+        report(empty[col], col, "Célula vazia")
+
+    # Quantidade de opções e presença da resposta correta entre elas (mesma regra de parse_options)
+    options = cells['opcoes'].str.split(';', expand=True).apply(lambda c: c.str.strip())
+    present = options.notna() & options.ne('')
+    option_count = present.sum(axis=1)
+    bad_count = ~empty['opcoes'] & ((option_count < MIN_OPTIONS) | (option_count > MAX_OPTIONS))
+    report(bad_count, 'opcoes',
+           option_count.astype(str) + f" opções (esperado entre {MIN_OPTIONS} e {MAX_OPTIONS})")
+
+    answer = cells['resposta_correta'].str.lower()
+    found = options.apply(lambda c: c.str.lower()).eq(answer, axis=0).any(axis=1)
+    report(~found & ~empty['opcoes'] & ~empty['resposta_correta'], 'resposta_correta',
+           "Resposta correta não está entre as opções")
+
+    # Perguntas duplicadas (no bloco e em blocos anteriores). Só linhas válidas contam como
+    # primeira ocorrência: uma linha rejeitada não pode bloquear uma cópia correta mais abaixo
+    keys = question_keys(cells['pergunta'])
+    has_key = ~empty['pergunta']
+    earlier = keys.map(seen_questions)
+    candidates = has_key & ~invalid
+    first_valid = keys.map(lines[candidates].groupby(keys[candidates]).min())
+    in_chunk = first_valid[first_valid < lines].astype(int)
+    duplicate_of = earlier.fillna(pd.Series(labels.loc[in_chunk].astype(str).to_numpy(), index=in_chunk.index))
+    duplicated = has_key & duplicate_of.notna()
+    report(duplicated, 'pergunta', "Pergunta duplicada (igual à linha " + duplicate_of.astype(str) + ")")
+
+    accepted = has_key & ~invalid
+    seen_questions.update(zip(keys[accepted].tolist(), labels[accepted].astype(str).tolist()))
+
+    errors = pd.concat(reports, ignore_index=True) if reports else pd.DataFrame(columns=['linha', 'coluna', 'erro'])
+    return chunk[~invalid], errors
+
+
+def cell_value(value):
+    """Valor de célula pronto para o gspread (sem tipos do numpy nem NaN)"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ''
+    return value.item() if hasattr(value, 'item') else value
+
+
+def validate_question_edits(frame, edits):
+    """Valida linhas editadas e novas com as mesmas regras da importação.
+
+    As perguntas que continuam como estão na aba contam como anteriores: uma edição ou uma
+    pergunta nova igual a uma delas é duplicada.
+    """
+    columns = list(frame.columns)
+    rows = {index + 2: change['values'] for index, change in edits['changed'].items() if index not in edits['deleted']}
+    rows.update((f"nova {i + 1}", values) for i, values in enumerate(edits['added']))
+    if not rows:
+        return pd.DataFrame(columns=['linha', 'coluna', 'erro'])
+    chunk = pd.DataFrame([[cell_value(v) for v in values] for values in rows.values()], columns=columns).astype(str)
+
+    seen_questions = {}
+    if 'pergunta' in frame:
+        kept = frame[~frame.index.isin(list(edits['changed']) + list(edits['deleted']))]
+        kept_keys = question_keys(kept['pergunta'])
+        kept_keys = kept_keys[kept_keys != '']
+        # Invertido para que a primeira ocorrência de cada pergunta vença no dicionário
+        seen_questions = dict(zip(kept_keys[::-1], (kept_keys.index[::-1] + 2).astype(str)))
+    _, errors = validate_questions_chunk(chunk, seen_questions, labels=rows.keys())
+    return errors
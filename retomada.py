@@ -0,0 +1,210 @@
+"""Progresso das partidas em andamento, para retomar o quiz depois de recarregar a página.
+
+Sem Streamlit: o app guarda uma instância por processo (get_checkpoint_store), no arquivo
+do estado compartilhado quando houver réplicas.
+"""
+import collections
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from nomes import normalize_name
+
+logger = logging.getLogger("deolho_no_risco")
+
+CHECKPOINT_FLUSH_INTERVAL = 1.0  # Gravações que chegam nesse intervalo viram uma única transação
+CHECKPOINT_MAX_AGE = 6 * 3600  # Partidas paradas há mais tempo que isso não podem ser retomadas
+CHECKPOINT_SESSION_LEASE = 5  # Sem sinal da sessão dona por esse tempo, outra sessão pode retomar a partida
+
+
+class CheckpointStore:
+    """Progresso de cada partida em andamento, pelo código de retomada, num arquivo SQLite.
+
+    save() confere a dona da partida no arquivo e substitui a entrada num dicionário em
+    memória; uma thread grava as entradas pendentes numa única transação a cada
+    CHECKPOINT_FLUSH_INTERVAL, então uma resposta custa uma leitura, não uma transação. Cada partida pertence a uma
+    sessão por vez: claim() só a passa para outra sessão quando a dona não dá sinal
+    (touch) há mais de CHECKPOINT_SESSION_LEASE, e as gravações da antiga dona são ignoradas.
+    touch() roda a cada segundo e só consulta a memória; o arquivo (onde uma réplica pode
+    ter assumido a partida) é consultado em save(), a cada resposta.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.lock = threading.Lock()
+        self.db_lock = threading.Lock()
+        self.pending = {}  # código -> checkpoint (None = apagar)
+        self.seen = {}  # código -> (sessão, último sinal)
+        self.owners = {}  # código -> sessão dona, como esta réplica a conhece
+        self.wakeup = threading.Event()
+        self.stats = collections.Counter()
+        self.conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS partidas (token TEXT PRIMARY KEY, name TEXT, session TEXT,
+                                                 seen_at REAL, payload TEXT, updated_at REAL);
+            CREATE INDEX IF NOT EXISTS partidas_name ON partidas (name);
+        """)
+        threading.Thread(target=self._flush_loop, daemon=True, name='checkpoints').start()
+
+    def save(self, token, checkpoint):
+        """Agenda a gravação da partida; checkpoint traz 'nome' e 'sessao' (a dona).
+
+        Retorna False (sem gravar) se a partida passou para outra sessão.
+        """
+        session = checkpoint['sessao']
+        with self.db_lock:
+            row = self.conn.execute("SELECT session FROM partidas WHERE token = ?", (token,)).fetchone()
+        with self.lock:
+            if row is not None:
+                self.owners[token] = row[0]
+            if self.owners.setdefault(token, session) != session:
+                return False
+            self.pending[token] = dict(checkpoint, updated_at=time.time())
+        self.wakeup.set()
+        return True
+
+    def touch(self, token, session):
+        """Sinal de vida da sessão dona; retorna False se a partida passou para outra sessão"""
+        with self.lock:
+            if self.owners.get(token, session) != session:
+                return False
+            self.seen[token] = (session, time.time())
+        self.wakeup.set()
+        return True
+
+    def claim(self, token, session):
+        """Passa a partida para a sessão; retorna False se outra sessão ainda está jogando com ela"""
+        self.flush()
+        now = time.time()
+        with self.db_lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute("SELECT session, seen_at FROM partidas WHERE token = ?",
+                                        (token,)).fetchone()
+                if row is None or (row[0] != session and now - row[1] < CHECKPOINT_SESSION_LEASE):
+                    self.conn.execute("ROLLBACK")
+                    return False
+                self.conn.execute("UPDATE partidas SET session = ?, seen_at = ? WHERE token = ?",
+                                  (session, now, token))
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        with self.lock:
+            self.owners[token] = session
+        return True
+
+    def delete(self, token):
+        with self.lock:
+            self.pending[token] = None
+            self.seen.pop(token, None)
+            self.owners.pop(token, None)
+        self.wakeup.set()
+
+    def delete_name(self, name):
+        """Descarta na hora todas as partidas salvas com esse nome; retorna quantas havia"""
+        key = normalize_name(name)
+        with self.lock:
+            deleted = 0
+            for token, checkpoint in self.pending.items():
+                if checkpoint is not None and normalize_name(checkpoint['nome']) == key:
+                    self.pending[token] = None
+                    deleted += 1
+        with self.db_lock:
+            deleted += self.conn.execute("DELETE FROM partidas WHERE name = ?", (key,)).rowcount
+        return deleted
+
+    def active(self, name):
+        """Se alguma sessão está jogando agora uma partida salva com esse nome"""
+        key = normalize_name(name)
+        with self.db_lock:
+            last_seen = dict(self.conn.execute("SELECT token, seen_at FROM partidas WHERE name = ?",
+                                               (key,)).fetchall())
+        with self.lock:
+            for token, checkpoint in self.pending.items():
+                if checkpoint is not None and normalize_name(checkpoint['nome']) == key:
+                    last_seen[token] = max(last_seen.get(token, 0), checkpoint['updated_at'])
+            for token in last_seen:
+                last_seen[token] = max(last_seen[token], self.seen.get(token, (None, 0))[1])
+        return any(time.time() - seen < CHECKPOINT_SESSION_LEASE for seen in last_seen.values())
+
+    def clear(self):
+        with self.lock:
+            self.pending.clear()
+            self.seen.clear()
+            self.owners.clear()
+        with self.db_lock:
+            self.conn.execute("DELETE FROM partidas")
+
+    def _flush_loop(self):
+        while True:
+            self.wakeup.wait()
+            time.sleep(CHECKPOINT_FLUSH_INTERVAL)
+            self.wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            batch, self.pending = self.pending, {}
+            seen, self.seen = self.seen, {}
+        if not batch and not seen:
+            return 0
+        upserts = [(token, normalize_name(c['nome']), c['sessao'], seen.get(token, (None, c['updated_at']))[1],
+                    json.dumps(c, ensure_ascii=False), c['updated_at'])
+                   for token, c in batch.items() if c is not None]
+        deletes = [(token,) for token, c in batch.items() if c is None]
+        touches = [(seen_at, token, session) for token, (session, seen_at) in seen.items()]
+        try:
+            with self.db_lock:
+                self.conn.execute("BEGIN IMMEDIATE")
+                try:
+                    # Gravação de uma sessão que perdeu a partida para outra não sobrescreve nada
+                    self.conn.executemany("""
+                        INSERT INTO partidas VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (token) DO UPDATE SET payload = excluded.payload,
+                            updated_at = excluded.updated_at, seen_at = MAX(seen_at, excluded.seen_at)
+                        WHERE partidas.session = excluded.session
+                    """, upserts)
+                    self.conn.executemany("DELETE FROM partidas WHERE token = ?", deletes)
+                    self.conn.executemany("UPDATE partidas SET seen_at = MAX(seen_at, ?) WHERE token = ? AND session = ?",
+                                          touches)
+                    self.conn.execute("COMMIT")
+                except BaseException:
+                    self.conn.execute("ROLLBACK")
+                    raise
+        except Exception as e:
+            logger.error("Erro ao gravar o progresso das partidas: %s", e)
+            with self.lock:
+                for token, checkpoint in batch.items():
+                    self.pending.setdefault(token, checkpoint)  # Não sobrescreve um mais recente
+                for token, signal in seen.items():
+                    self.seen.setdefault(token, signal)
+            self.wakeup.set()
+            return 0
+        self.stats['flushes'] += 1
+        self.stats['written'] += len(batch)
+        return len(batch)
+
+    def _valid(self, checkpoint):
+        if checkpoint is None or time.time() - checkpoint['updated_at'] > CHECKPOINT_MAX_AGE:
+            return None
+        return checkpoint
+
+    def find_token(self, token):
+        with self.lock:
+            if token in self.pending:  # Apagado ou regravado e ainda não gravado em disco
+                return self._valid(self.pending[token])
+        with self.db_lock:
+            row = self.conn.execute("SELECT payload FROM partidas WHERE token = ?", (token,)).fetchone()
+        return self._valid(json.loads(row[0]) if row else None)
+
+    def status(self):
+        with self.db_lock:
+            saved = self.conn.execute("SELECT COUNT(*) FROM partidas WHERE updated_at > ?",
+                                      (time.time() - CHECKPOINT_MAX_AGE,)).fetchone()[0]
+        return {'Partidas salvas': saved, 'Aguardando gravação': len(self.pending),
+                'Gravações em lote': self.stats['flushes']}
@@ -0,0 +1,53 @@
+import pytest
+
+import admissao
+
+
+@pytest.fixture
+def controller():
+    controller = admissao.AdmissionController()
+    controller.configure(max_active=2, max_starting=2)
+    return controller
+
+
+def fill(controller, *keys):
+    for key in keys:
+        assert controller.request(key)
+        controller.mark_playing(key)
+
+
+def test_queue_is_fifo_and_position_follows_tickets(controller):
+    fill(controller, 'a', 'b')
+    assert not controller.request('c') and not controller.request('d')
+    assert (controller.position('c'), controller.position('d')) == (1, 2)
+
+    controller.release('a', finished=True)
+
+    assert not controller.request('d')
+    assert controller.request('c')
+    assert controller.position('d') == 1
+
+
+def test_expired_player_is_not_readmitted_over_the_cap(controller):
+    fill(controller, 'a', 'b')
+    controller.playing['a'] = (0, 0)  # Sem sinal desde sempre: a vaga expira
+    assert controller.request('c')
+    controller.mark_playing('c')
+
+    assert not controller.heartbeat('a')
+    assert controller.status() == {'starting': 0, 'playing': 2, 'waiting': 1}
+
+    controller.release('b', finished=True)
+
+    assert controller.heartbeat('a')
+    assert controller.status() == {'starting': 0, 'playing': 2, 'waiting': 0}
+
+
+def test_released_player_waits_behind_the_queue(controller):
+    fill(controller, 'a', 'b')
+    assert not controller.request('c')
+    controller.release('a')
+
+    assert not controller.heartbeat('a')
+    assert controller.position('a') == 2
+    assert controller.request('c')
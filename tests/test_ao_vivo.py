@@ -0,0 +1,37 @@
+import pytest
+
+import ao_vivo
+
+QUESTION_SECONDS = 30
+
+
+@pytest.fixture
+def game():
+    game = ao_vivo.LiveGame(QUESTION_SECONDS)
+    game.open('planilha', [{'pergunta': 'Qual EPI?', 'opcoes': 'Capacete; Chinelo', 'resposta_correta': 'Capacete'}])
+    assert game.join('a', 'Ana', '', 'x') is None
+    assert game.join('b', 'Bruno', '', 'y') is None
+    assert game.next_question()
+    return game
+
+
+def test_question_ends_by_the_clock_without_polling(game):
+    assert game.answer('a', 0, True) is not None
+    game.deadline -= QUESTION_SECONDS + 1
+
+    view = game.view()
+
+    assert view['phase'] == 'reveal' and game.phase == 'reveal'
+    assert game.player('b')['tempo_total'] == QUESTION_SECONDS
+    assert game.answer('b', 0, True) is None
+
+
+def test_last_answer_reveals_at_once(game):
+    revision = game.poll()
+    game.answer('a', 0, True)
+    assert game.phase == 'question'
+
+    game.answer('b', 1, False)
+
+    assert game.phase == 'reveal' and game.poll() == revision + 1
+    assert game.player('a')['pontuacao'] == ao_vivo.LIVE_POINTS
@@ -0,0 +1,104 @@
+import pandas as pd
+import pytest
+import streamlit as st
+
+import app
+import historico
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    history = historico.ParticipantHistory(tmp_path / 'historico.json')
+    monkeypatch.setattr(app, 'get_participant_history', lambda: history)
+    monkeypatch.setattr(app, 'get_shared_state', lambda: None)
+    monkeypatch.setattr(app, 'load_data', lambda sheet_id, sheet_name: pd.DataFrame(columns=['nome', 'pontuacao']))
+    st.session_state.sheet_id = 'planilha'
+    yield history
+    st.session_state.clear()
+
+
+def test_archived_player_of_this_edition_cannot_play_again(history):
+    history.add_event(app.EVENT_ID, ['Maria Conceição'])
+
+    assert app.check_user_participation('maria conceicao')
+    assert not app.check_user_participation('João Silva')
+
+
+def test_previous_editions_do_not_block(history):
+    history.add_event('sipat-2024', ['Maria Conceição'])
+
+    assert not app.check_user_participation('Maria Conceição')
+    assert history.lookup('MARIA CONCEICAO') == ['sipat-2024']
+
+
+def test_index_survives_a_restart(history, tmp_path):
+    history.add_event(app.EVENT_ID, ['Ana Lima', 'ana  lima'])
+
+    reloaded = historico.ParticipantHistory(tmp_path / 'historico.json')
+
+    assert reloaded.participated('Ana Lima', app.EVENT_ID)
+    assert reloaded.summary().to_dict('records') == [{'Edição': app.EVENT_ID, 'Participantes': 1}]
+
+
+class FakeSheet:
+    def __init__(self, title, values, fail_delete=False):
+        self.title = title
+        self.values = [list(row) for row in values]
+        self.fail_delete = fail_delete
+
+    def get_all_values(self):
+        return [list(row) for row in self.values]
+
+    def row_values(self, number):
+        return list(self.values[number - 1])
+
+    def col_values(self, number):
+        return [row[number - 1] if len(row) >= number else '' for row in self.values]
+
+    def append_rows(self, rows):
+        self.values.extend(list(row) for row in rows)
+
+    def update(self, values):
+        self.values = [list(row) for row in values]
+
+    def delete_rows(self, start, end):
+        if self.fail_delete:
+            self.fail_delete = False
+            raise ConnectionError("queda de rede")
+        del self.values[start - 1:end]
+
+
+class FakeWorkbook:
+    def __init__(self, ranking):
+        self.sheets = {'Ranking': ranking}
+
+    def open_by_key(self, sheet_id):
+        return self
+
+    def worksheet(self, title):
+        if title not in self.sheets:
+            raise app.lazy_import('gspread').exceptions.WorksheetNotFound(title)
+        return self.sheets[title]
+
+    def add_worksheet(self, title, rows, cols):
+        self.sheets[title] = FakeSheet(title, [])
+        return self.sheets[title]
+
+
+def test_archive_retry_after_a_failure_does_not_duplicate_rows(history, tmp_path, monkeypatch):
+    ranking = FakeSheet('Ranking', [['nome', 'pontuacao'], ['Ana', '10'], ['Bruno', '20']], fail_delete=True)
+    workbook = FakeWorkbook(ranking)
+    monkeypatch.setattr(app, 'get_gsheets_client', lambda: workbook)
+    monkeypatch.setattr(app, 'DATA_DIR', tmp_path)
+
+    assert app.archive_ranking('planilha', 'sipat-2024') is None  # Falhou ao compactar a aba ao vivo
+    ranking.values.append(['Carla', '30'])  # Alguém terminou antes da nova tentativa
+
+    assert app.archive_ranking('planilha', 'sipat-2024') == 2
+
+    archived = workbook.sheets['Ranking_sipat-2024'].values
+    assert [row[0] for row in archived] == ['nome', 'Ana', 'Bruno']
+    assert ranking.values == [['nome', 'pontuacao'], ['Carla', '30']]
+    local = pd.read_csv(tmp_path / 'ranking_arquivo' / 'sipat-2024.csv.gz', dtype=str)
+    assert local['nome'].tolist() == ['Ana', 'Bruno']
+    assert history.summary().to_dict('records') == [{'Edição': 'sipat-2024', 'Participantes': 2}]
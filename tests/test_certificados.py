@@ -0,0 +1,37 @@
+import glob
+import os
+
+import pytest
+
+import certificados
+
+FONTS = glob.glob('/usr/share/fonts/**/*.ttf', recursive=True) + \
+    glob.glob(os.path.expanduser('~/.rbenv/**/Lato-Regular.ttf'), recursive=True)
+
+
+@pytest.fixture
+def font(tmp_path, monkeypatch):
+    if not FONTS:
+        pytest.skip("nenhuma fonte TTF disponível")
+    monkeypatch.setattr(certificados.tempfile, 'gettempdir', lambda: str(tmp_path))
+    return FONTS[0]
+
+
+def test_subset_font_is_written_once_and_reused(font, tmp_path):
+    path = certificados.subset_font(font)
+    written_at = os.stat(path).st_mtime_ns
+
+    assert certificados.subset_font(font) == path
+    assert os.stat(path).st_mtime_ns == written_at
+    assert os.path.dirname(path) == str(tmp_path) and os.path.getsize(path) < os.path.getsize(font)
+
+
+def test_certificate_uses_the_subset_font(font, monkeypatch):
+    monkeypatch.setattr(certificados, 'FONT_PATH', font)
+    monkeypatch.setattr(certificados, 'BACKGROUND_PATH', '/nao/existe.png')
+    certificados.init_worker('SIPAT - De olho no risco', '19/10/2026')
+
+    filename, pdf = certificados.render_certificate((1, 'João Conceição', 100, 42.5))
+
+    assert filename == '0001_João_Conceição.pdf'
+    assert pdf.startswith(b'%PDF') and b'/FontFile2' in pdf
@@ -0,0 +1,107 @@
+import time
+
+import pytest
+import streamlit as st
+
+import app
+import retomada
+
+
+class CountingConnection:
+    def __init__(self, conn):
+        self.conn = conn
+        self.statements = 0
+
+    def execute(self, *args):
+        self.statements += 1
+        return self.conn.execute(*args)
+
+    def executemany(self, *args):
+        self.statements += 1
+        return self.conn.executemany(*args)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(retomada, 'CHECKPOINT_FLUSH_INTERVAL', 60)  # Só grava quando o teste chama flush()
+    monkeypatch.setattr(retomada, 'CHECKPOINT_SESSION_LEASE', 0.2)
+    return retomada.CheckpointStore(tmp_path / 'progresso.sqlite')
+
+
+def checkpoint(session, current=0):
+    return {'nome': 'Ana Silva', 'setor': '', 'token': 'ABC234', 'sessao': session, 'atual': current}
+
+
+def test_touch_stays_in_memory(store):
+    store.save('ABC234', checkpoint('S1'))
+    store.flush()
+    store.conn = CountingConnection(store.conn)
+
+    for _ in range(100):
+        assert store.touch('ABC234', 'S1')
+
+    assert store.conn.statements == 0
+
+
+def test_second_session_waits_for_the_lease(store):
+    store.save('ABC234', checkpoint('S1'))
+    store.touch('ABC234', 'S1')
+
+    assert not store.claim('ABC234', 'S2')
+    time.sleep(0.3)
+    assert store.claim('ABC234', 'S2')
+
+
+def test_previous_session_stops_after_takeover(store):
+    store.save('ABC234', checkpoint('S1'))
+    store.flush()
+    time.sleep(0.3)
+    assert store.claim('ABC234', 'S2')
+
+    assert not store.touch('ABC234', 'S1')
+    assert not store.save('ABC234', checkpoint('S1', current=5))
+    assert store.save('ABC234', checkpoint('S2', current=2))
+    store.flush()
+    assert store.find_token('ABC234')['atual'] == 2
+
+
+def test_takeover_by_another_replica_is_seen_on_save(store, tmp_path):
+    store.save('ABC234', checkpoint('S1'))
+    store.flush()
+    other = retomada.CheckpointStore(tmp_path / 'progresso.sqlite')
+    time.sleep(0.3)
+    assert other.claim('ABC234', 'S2')
+
+    assert store.touch('ABC234', 'S1')  # Só a memória: ainda não sabe
+    assert not store.save('ABC234', checkpoint('S1', current=1))
+    assert not store.touch('ABC234', 'S1')
+
+
+def test_abandoned_game_does_not_block_the_name(store):
+    store.save('ABC234', checkpoint('S1'))
+    store.flush()
+    assert store.active('ana silva')
+    time.sleep(0.3)
+    assert not store.active('ana silva')
+
+
+def test_failed_ranking_append_keeps_the_checkpoint(store, monkeypatch):
+    monkeypatch.setattr(app, 'get_checkpoint_store', lambda: store)
+    monkeypatch.setattr(app, 'get_shared_state', lambda: None)
+    monkeypatch.setattr(app, 'ranking_row_for', lambda sheet_id, values: list(values.values()))
+    monkeypatch.setattr(app, 'append_row_to_sheet', lambda sheet_id, sheet_name, row: False)
+    st.session_state.update({
+        'sheet_id': 'planilha', 'questions': [{'pergunta': 'P'}], 'current_question': 0,
+        'player_name': 'Ana Silva', 'player_sector': '', 'score': 10, 'total_time': 3.0,
+        'resume_token': 'ABC234', 'screen': 'quiz'})
+    st.query_params[app.RESUME_QUERY_PARAM] = 'ABC234'
+    store.save('ABC234', checkpoint(app.get_session_key()))
+    try:
+        app.next_question()
+
+        assert st.session_state.screen == 'quiz'
+        assert st.query_params.get(app.RESUME_QUERY_PARAM) == 'ABC234'
+        assert store.find_token('ABC234') is not None
+    finally:
+        st.session_state.clear()
+        st.query_params.clear()
@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+import streamlit as st
+
+import app
+import historico
+import nomes
+
+
+def ranking(*names):
+    return pd.DataFrame({'nome': list(names), 'pontuacao': range(len(names))})
+
+
+def pairs(report):
+    return {(row.nome_a, row.nome_b) for row in report.itertuples()}
+
+
+def test_variants_of_the_same_person_are_paired():
+    report = nomes.find_duplicate_names(ranking(
+        'José da Silva', 'JOSE  SILVA', 'Maria Souza', 'Maria Sousa', 'Ana Paula Lima', 'Ana Lima',
+        'Carlos Pereira', 'Pereira Carlos', 'Fernanda Rocha', 'Fenrnada Rocha'))
+
+    assert pairs(report) == {('José da Silva', 'JOSE  SILVA'), ('Maria Souza', 'Maria Sousa'),
+                             ('Ana Paula Lima', 'Ana Lima'), ('Carlos Pereira', 'Pereira Carlos'),
+                             ('Fernanda Rocha', 'Fenrnada Rocha')}
+
+
+def test_different_people_are_not_paired():
+    report = nomes.find_duplicate_names(ranking('João Silva 1', 'João Silva 2', 'Maria Souza', 'Maria Santos',
+                                              'Ana Clara Lima', 'Ana Beatriz Lima'))
+
+    assert report.empty
+
+
+def test_report_lists_only_the_most_similar_pairs():
+    names = [f'Participante {i}' for i in range(20)] + ['Participante 1'] * 5 + ['Paula Dias', 'Paulla Dias']
+
+    report = nomes.find_duplicate_names(ranking(*names), max_pairs=3)
+
+    assert len(report) == 3 and report.attrs['total'] == 6
+    assert (report['similaridade'] == 1.0).all()
+
+
+@pytest.fixture
+def live_ranking(monkeypatch, tmp_path):
+    history = historico.ParticipantHistory(tmp_path / 'historico.json')
+    monkeypatch.setattr(app, 'get_participant_history', lambda: history)
+    monkeypatch.setattr(app, 'get_shared_state', lambda: None)
+    monkeypatch.setattr(app, 'load_data', lambda sheet_id, sheet_name: ranking('José da Conceição'))
+    st.session_state.sheet_id = 'planilha'
+    yield
+    st.session_state.clear()
+
+
+def test_participation_ignores_accents_case_and_spaces(live_ranking):
+    # Mudança de comportamento: antes só minúsculas e espaços nas pontas eram ignorados
+    assert app.check_user_participation('jose da conceicao')
+    assert app.check_user_participation('  JOSÉ  DA  CONCEIÇÃO ')
+    assert not app.check_user_participation('José Conceição')
@@ -0,0 +1,36 @@
+import pytest
+from PIL import Image
+
+import miniaturas
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    images = tmp_path / 'perguntas'
+    images.mkdir()
+    Image.new('RGB', (2000, 1000), 'red').save(images / 'risco.png')
+    monkeypatch.setattr(miniaturas, 'QUESTION_IMAGES_DIR', images)
+    thumbnails = miniaturas.ThumbnailCache(tmp_path / 'miniaturas', 10 * 1024 * 1024)
+    yield thumbnails
+    thumbnails.executor.shutdown(wait=True)
+
+
+def test_variant_is_none_until_prepared(cache):
+    assert cache.variant('risco.png') is None
+    cache._submit('risco.png').result()
+
+    path = cache.variant('risco.png', 'celular')
+
+    assert path.endswith('-640.jpg')
+    with Image.open(path) as image:
+        assert image.size == (640, 320)
+
+
+def test_variant_is_encoded_once(cache):
+    cache.prefetch(['risco.png'])
+    cache._submit('risco.png').result()
+
+    paths = {cache.variant('risco.png', size) for size in ('celular', 'projetor', 'celular')}
+
+    assert len(paths) == 2
+    assert cache.stats['encoded'] == 1 and cache.stats['served'] == 3 and cache.stats['waiting'] == 0
@@ -0,0 +1,86 @@
+import pandas as pd
+
+import perguntas
+
+COLUMNS = ['pergunta', 'opcoes', 'resposta_correta']
+
+
+def bank(*questions):
+    return pd.DataFrame([[q, 'a;b;c', 'a'] for q in questions], columns=COLUMNS)
+
+
+def no_edits():
+    return {'tab': ('planilha', 'Perguntas'), 'changed': {}, 'deleted': {}, 'added': []}
+
+
+def test_edited_and_new_row_with_same_question():
+    frame = bank('Pergunta 1', 'Pergunta 2')
+    edits = no_edits()
+    edits['changed'][1] = {'original': list(frame.loc[1]), 'values': ['Repetida', 'a;b;c', 'a']}
+    edits['added'].append(['repetida', 'a;b;c', 'a'])
+
+    errors = perguntas.validate_question_edits(frame, edits)
+
+    assert errors.to_dict('records') == [
+        {'linha': 'nova 1', 'coluna': 'pergunta', 'erro': 'Pergunta duplicada (igual à linha 3)'}]
+
+
+def test_duplicate_among_many_new_rows():
+    edits = no_edits()
+    edits['added'] = [[f'Pergunta nova {i}', 'a;b;c', 'a'] for i in range(11)]
+    edits['added'][10][0] = 'Pergunta nova 2'
+
+    errors = perguntas.validate_question_edits(bank('Outra'), edits)
+
+    assert errors.to_dict('records') == [
+        {'linha': 'nova 11', 'coluna': 'pergunta', 'erro': 'Pergunta duplicada (igual à linha nova 3)'}]
+
+
+def test_edits_are_checked_against_unchanged_questions():
+    frame = bank('Pergunta 1', 'Pergunta 2', 'Pergunta 3')
+    edits = no_edits()
+    edits['changed'][2] = {'original': list(frame.loc[2]), 'values': ['pergunta  1', 'a;b;c', 'a']}
+    edits['added'].append(['Pergunta 2', 'a;b;c', 'a'])
+
+    errors = perguntas.validate_question_edits(frame, edits)
+
+    assert errors['linha'].tolist() == [4, 'nova 1']
+    assert errors['erro'].tolist() == ['Pergunta duplicada (igual à linha 2)', 'Pergunta duplicada (igual à linha 3)']
+
+
+def test_edited_question_frees_its_old_text():
+    frame = bank('Pergunta 1', 'Pergunta 2')
+    edits = no_edits()
+    edits['changed'][0] = {'original': list(frame.loc[0]), 'values': ['Pergunta nova', 'a;b;c', 'a']}
+    edits['added'].append(['Pergunta 1', 'a;b;c', 'a'])
+
+    assert perguntas.validate_question_edits(frame, edits).empty
+
+
+def test_upload_chunk_reports_sheet_lines():
+    chunk = bank('Igual', 'Outra', 'igual')
+    chunk.index = [2, 3, 4]
+    seen = {}
+
+    valid, errors = perguntas.validate_questions_chunk(chunk, seen)
+
+    assert valid.index.tolist() == [2, 3]
+    assert errors.to_dict('records') == [
+        {'linha': 4, 'coluna': 'pergunta', 'erro': 'Pergunta duplicada (igual à linha 2)'}]
+    assert seen == {'igual': '2', 'outra': '3'}
+
+
+def test_empty_option_segments_are_not_options():
+    question = {'pergunta': 'P', 'opcoes': 'a; ;b;c;', 'resposta_correta': 'a'}
+
+    assert perguntas.parse_options(question) == ['a', 'b', 'c']
+    valid, errors = perguntas.validate_questions_chunk(pd.DataFrame([question]), {})
+    assert errors.empty and len(valid) == 1
+
+
+def test_too_few_options_after_dropping_empty_segments():
+    chunk = pd.DataFrame([{'pergunta': 'P', 'opcoes': 'a;;', 'resposta_correta': 'a'}])
+
+    _, errors = perguntas.validate_questions_chunk(chunk, {})
+
+    assert errors['coluna'].tolist() == ['opcoes']
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+import streamlit as st
+
+import app
+
+
+class FakeSheet:
+    def __init__(self, values):
+        self.values = values
+        self.reads = 0
+
+    def get_all_values(self):
+        self.reads += 1
+        return [list(row) for row in self.values]
+
+
+class FakeClient:
+    def __init__(self, sheets):
+        self.sheets = sheets
+
+    def open_by_key(self, sheet_id):
+        return self
+
+    def worksheet(self, name):
+        return self.sheets[name]
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'SNAPSHOT_DIR', tmp_path)
+    monkeypatch.setattr(app, 'get_shared_state', lambda: None)
+    cache = app.SheetSnapshotCache()
+    cache.version = 1
+    cache.current_version = lambda sheet_id: cache.version
+    yield cache
+    cache.persist_executor.shutdown(wait=True)
+
+
+def expire(cache):
+    for snapshot in cache.snapshots.values():
+        snapshot['validated_at'] = 0
+
+
+def test_edit_outside_first_column_is_seen_after_ranking_append(cache, monkeypatch):
+    questions = FakeSheet([['pergunta', 'opcoes', 'resposta_correta'], ['P1', 'a;b', 'a']])
+    monkeypatch.setattr(app, 'get_gsheets_client', lambda: FakeClient({'Perguntas': questions}))
+    assert cache.get('planilha', 'Perguntas').loc[0, 'resposta_correta'] == 'a'
+
+    questions.values[1][2] = 'b'  # Gabarito corrigido; a revisão muda (como num append no Ranking)
+    cache.version = 2
+    expire(cache)
+
+    assert cache.get('planilha', 'Perguntas').loc[0, 'resposta_correta'] == 'b'
+
+
+def test_unchanged_tab_keeps_its_generation_when_the_revision_moves(cache, monkeypatch):
+    sectors = FakeSheet([['setor', 'colaboradores'], ['TI', '10']])
+    monkeypatch.setattr(app, 'get_gsheets_client', lambda: FakeClient({'Setores': sectors}))
+    frame = cache.get('planilha', 'Setores')
+    generation = cache.snapshots[('planilha', 'Setores')]['generation']
+
+    cache.version = 2
+    expire(cache)
+
+    assert cache.get('planilha', 'Setores') is frame
+    assert cache.snapshots[('planilha', 'Setores')]['generation'] == generation
+    assert cache.status()[1]['unchanged_downloads'] == 1
+
+
+def test_peek_never_waits_for_google_and_fetches_in_background(cache, monkeypatch):
+    config = FakeSheet([['quiz_enabled'], ['FALSE']])
+    fetched = threading.Event()
+
+    def client():
+        fetched.set()
+        return FakeClient({'Config': config})
+    monkeypatch.setattr(app, 'get_gsheets_client', client)
+    monkeypatch.setattr(app, 'get_sheet_cache', lambda: cache)
+    st.session_state.sheet_id = 'planilha'
+    try:
+        assert app.peek_quiz_status() is None  # Sem cópia: a tela inicial não espera o download
+        assert fetched.wait(5)
+        for _ in range(50):
+            if ('planilha', 'Config') in cache.snapshots:
+                break
+            time.sleep(0.05)
+
+        assert app.peek_quiz_status() is False
+        assert config.reads == 1
+    finally:
+        st.session_state.clear()
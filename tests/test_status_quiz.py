@@ -0,0 +1,51 @@
+import time
+
+import pandas as pd
+import pytest
+import streamlit as st
+
+import app
+
+
+class FakeShared:
+    def __init__(self):
+        self.values = {}
+
+    def get_value(self, key):
+        return self.values.get(key, (None, 0))
+
+    def set_value(self, key, value):
+        self.values[key] = (value, time.time())
+
+
+@pytest.fixture
+def shared(monkeypatch):
+    shared = FakeShared()
+    monkeypatch.setattr(app, 'get_shared_state', lambda: shared)
+    st.session_state.sheet_id = 'planilha'
+    yield shared
+    st.session_state.clear()
+
+
+def test_loading_from_config_does_not_publish(shared, monkeypatch):
+    monkeypatch.setattr(app, 'load_data', lambda sheet_id, tab: pd.DataFrame({'quiz_enabled': ['FALSE']}))
+
+    assert app.load_quiz_status() is False
+    assert shared.values == {}
+
+
+def test_published_status_wins_over_a_stale_config(shared, monkeypatch):
+    monkeypatch.setattr(app, 'load_data', lambda sheet_id, tab: pd.DataFrame({'quiz_enabled': ['TRUE']}))
+    monkeypatch.setattr(app, 'update_sheet_from_df', lambda sheet_id, tab, df: True)
+
+    assert app.save_quiz_status(False)
+
+    assert shared.values['quiz_enabled'][0] == '0'
+    assert app.load_quiz_status() is False
+
+
+def test_failed_config_write_is_not_published(shared, monkeypatch):
+    monkeypatch.setattr(app, 'update_sheet_from_df', lambda sheet_id, tab, df: False)
+
+    assert not app.save_quiz_status(False)
+    assert shared.values == {}
@@ -0,0 +1,47 @@
+import requests
+
+import app
+
+
+class FakeCredentials:
+    expiry = None
+    token = 'token'
+
+    def refresh(self, request):
+        pass
+
+    def before_request(self, request, method, url, headers):
+        headers['authorization'] = 'Bearer token'
+
+
+class FakeAdapter(requests.adapters.BaseAdapter):
+    def __init__(self, status):
+        super().__init__()
+        self.status = status
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = self.status
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def test_requests_are_counted_per_host_without_pool_internals():
+    transport = app.GoogleTransport(FakeCredentials())
+    transport.session.mount('https://sheets.googleapis.com', FakeAdapter(200))
+    transport.session.mount('https://www.googleapis.com', FakeAdapter(503))
+
+    transport.session.get('https://sheets.googleapis.com/v4/spreadsheets/x')
+    transport.session.get('https://sheets.googleapis.com/v4/spreadsheets/y')
+    transport.session.get('https://www.googleapis.com/drive/v3/files/x')
+
+    rows, token = transport.status()
+    assert rows[['Servidor', 'Requisições', 'Com erro']].to_dict('records') == [
+        {'Servidor': 'sheets.googleapis.com', 'Requisições': 2, 'Com erro': 0},
+        {'Servidor': 'www.googleapis.com', 'Requisições': 1, 'Com erro': 1},
+    ]
+    assert token['Renovações de token'] == 1